@@ -8,12 +8,12 @@ generating PPA (Power, Performance, Area) reports and visualizations.
 
 import os
 import sys
-from prefect import task, flow
+from datetime import datetime
 import logging
 
 # Import utilities
-from flows.utils.config import get_analysis_config, load_config
-from flows.utils.visualization import generate_plots, generate_report
+from flows.utils.lazy import task, flow
+from flows.utils.plan import as_study_plan, load_study_plan
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -27,72 +27,42 @@ def analyze_results(sim_results, synth_results, study_params):
     Args:
         sim_results: Dictionary of simulation results
         synth_results: Dictionary of synthesis results
-        study_params: Dictionary containing study parameters
+        study_params: StudyPlan (or configuration dictionary)
         
     Returns:
-        Dictionary of analysis results and paths to reports
+        Dictionary with the results table, its per-(core, pdk) summary and
+        paths to reports and plots
     """
-    analysis_config = get_analysis_config(study_params)
+    # pandas/matplotlib are only needed here; keep them out of module import
+    from flows.utils.visualization import generate_plots, generate_report
+    from flows.utils.results import build_results_table, summarize_results
+    
+    plan = as_study_plan(study_params)
+    analysis_config = plan.analysis
+    run = plan.get('run_id') or datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    # One row per (core, pdk, benchmark, run); metrics are derived column-wise
+    table = build_results_table(sim_results, synth_results, run=run)
     results = {
-        'power': {},
-        'performance': {},
-        'area': {},
+        'table': table,
+        'summary': summarize_results(table),
         'reports': {},
         'visualizations': {}
     }
     
-    # Analyze each core
-    for core in sim_results:
-        results['performance'][core] = {}
-        
-        # Extract performance metrics from simulation results
-        for benchmark in sim_results[core]:
-            results['performance'][core][benchmark] = {
-                'cycles': sim_results[core][benchmark].get('cycles', 0),
-                'instructions': sim_results[core][benchmark].get('instructions', 0),
-                'cpi': sim_results[core][benchmark].get('cycles', 0) / 
-                      max(1, sim_results[core][benchmark].get('instructions', 1))
-            }
-    
-    # For each synthesized core
-    for core in synth_results:
-        results['power'][core] = {}
-        results['area'][core] = {}
-        
-        # For each PDK
-        for pdk in synth_results[core]:
-            results['power'][core][pdk] = {}
-            results['area'][core][pdk] = {}
-            
-            # For each benchmark
-            for benchmark in synth_results[core][pdk]:
-                # Extract power and area metrics
-                pr_results = synth_results[core][pdk][benchmark]['place_and_route']
-                
-                results['power'][core][pdk][benchmark] = {
-                    'dynamic': pr_results.get('dynamic_power', 0),
-                    'leakage': pr_results.get('leakage_power', 0),
-                    'total': pr_results.get('total_power', 0)
-                }
-                
-                results['area'][core][pdk][benchmark] = {
-                    'logic': pr_results.get('logic_area', 0),
-                    'memory': pr_results.get('memory_area', 0),
-                    'total': pr_results.get('total_area', 0),
-                    'utilization': pr_results.get('utilization', 0)
-                }
-    
     # Generate visualizations
     results['visualizations'] = generate_plots(
         results, 
-        output_dir=analysis_config.get('output_dir', 'analysis/targets/plots')
+        output_dir=analysis_config.get('output_dir', 'analysis/targets/plots'),
+        plot_format=analysis_config['plot_format']
     )
     
     # Generate reports
     results['reports'] = generate_report(
         results,
-        study_params,
-        output_dir=analysis_config.get('output_dir', 'analysis/targets/reports')
+        plan.config,
+        output_dir=analysis_config.get('output_dir', 'analysis/targets/reports'),
+        table_format=analysis_config['table_format']
     )
     
     return results
@@ -103,17 +73,17 @@ def analysis_flow():
     logger.info("Starting Stage 4: PPA Analysis")
     
     # Load configuration and run prerequisite flows
-    config = load_config()
+    plan = load_study_plan()
     from flows.software_flow import compile_software
     from flows.simulation_flow import run_simulations
     from flows.synthesis_flow import run_synthesis
     
-    sw_artifacts = compile_software(config)
-    sim_results = run_simulations(sw_artifacts, config)
-    synth_results = run_synthesis(sim_results, config)
+    sw_artifacts = compile_software(plan)
+    sim_results = run_simulations(sw_artifacts, plan)
+    synth_results = run_synthesis(sim_results, plan)
     
     # Run the analysis
-    analysis_results = analyze_results(sim_results, synth_results, config)
+    analysis_results = analyze_results(sim_results, synth_results, plan)
     
     logger.info("✅ Stage 4: PPA Analysis completed successfully!")
     return analysis_results
@@ -8,7 +8,7 @@ coordinating all subflows and tasks to produce comprehensive analysis results.
 
 import os
 import sys
-from prefect import flow
+import argparse
 import logging
 
 # Import subflows
@@ -19,19 +19,53 @@ from flows.synthesis_flow import synthesis_flow, run_synthesis
 from flows.analysis_flow import analysis_flow, analyze_results
 
 # Import utilities
-from flows.utils.config import load_config
+from flows.utils.lazy import flow
+from flows.utils.plan import load_study_plan
+from flows.utils.shard import write_shard_results, merge_shard_results
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @flow(name="RISC-V PPA Study")
-def main_ppa_study_flow():
-    """Complete RISC-V PPA study orchestration flow."""
+def main_ppa_study_flow(config_path=None, shard_index=None, shard_count=1, merge=False, shard_dir=None):
+    """
+    Complete RISC-V PPA study orchestration flow.
+    
+    With ``shard_index`` set, only that shard of the study matrix is compiled,
+    simulated and implemented, and its partial results are written to
+    ``shard_dir``; analysis is left to a final run with ``merge`` set, which
+    combines the results of all ``shard_count`` shards.
+    
+    Args:
+        config_path: Path to configuration file (default: configs/default.yaml)
+        shard_index: Index of the shard to run (0-based), or None to run the whole study
+        shard_count: Number of shards
+        merge: If True, analyze the merged results of all shards instead of running stages
+        shard_dir: Directory shared by the shards (default: <output_dir>/shards)
+        
+    Returns:
+        Final report, path of the shard results, or False on failure
+    """
     logger.info("🚀 Starting Complete PPA Study Orchestration")
     
-    # Load configuration
-    config = load_config()
+    # Load and validate the configuration once; every stage consumes the plan
+    plan = load_study_plan(config_path)
+    shard_dir = shard_dir or os.path.join(plan.get('output_dir', 'analysis/targets'), 'shards')
+    
+    if merge:
+        logger.info(f"Merging the results of {shard_count} shards...")
+        sim_results, synth_results = merge_shard_results(shard_dir, plan, shard_count)
+        final_report = analyze_results(sim_results, synth_results, plan)
+        logger.info("🎉 Complete PPA Study finished successfully!")
+        return final_report
+    
+    if shard_index is not None:
+        plan = plan.shard(shard_index, shard_count)
+        logger.info(f"Running shard {shard_index + 1}/{shard_count} ({len(plan.cells)} cells)")
+        if not plan.cells:
+            logger.warning(f"Shard {shard_index + 1}/{shard_count} is empty: the study has fewer (core, benchmark) pairs than shards")
+            return write_shard_results(shard_dir, plan, {}, {})
     
     # Stage 0: Verify environment and infrastructure
     logger.info("Stage 0: Verifying environment and infrastructure...")
@@ -43,27 +77,59 @@ def main_ppa_study_flow():
     
     # Stage 1: Compile software for all test cases
     logger.info("Stage 1: Compiling software...")
-    sw_artifacts = compile_software(config)
+    sw_artifacts = compile_software(plan)
     
     # Stage 2: Run simulations on all cores
     logger.info("Stage 2: Running RTL simulations...")
-    sim_results = run_simulations(sw_artifacts, config)
+    sim_results = run_simulations(sw_artifacts, plan)
     
     # Stage 3: Run synthesis for all cores and PDKs
     logger.info("Stage 3: Running synthesis and PNR...")
-    synth_results = run_synthesis(sim_results, config)
+    synth_results = run_synthesis(sim_results, plan)
+    
+    if shard_index is not None:
+        path = write_shard_results(shard_dir, plan, sim_results, synth_results)
+        logger.info(f"✅ Shard {shard_index + 1}/{shard_count} finished")
+        return path
     
     # Stage 4: Analyze the results
     logger.info("Stage 4: Analyzing results and generating reports...")
-    final_report = analyze_results(sim_results, synth_results, config)
+    final_report = analyze_results(sim_results, synth_results, plan)
     
     logger.info("🎉 Complete PPA Study finished successfully!")
     return final_report
 
-def main():
+def parse_args(argv=None):
+    """Parse the command line of the PPA study."""
+    parser = argparse.ArgumentParser(description="Run the RISC-V PPA study")
+    parser.add_argument('--config', help="Path to configuration file")
+    parser.add_argument('--shard-index', type=int,
+                        default=os.environ.get('JOB_COMPLETION_INDEX'),
+                        help="Run only this shard of the study (default: $JOB_COMPLETION_INDEX)")
+    parser.add_argument('--shard-count', type=int, default=1,
+                        help="Number of shards the study is split into")
+    parser.add_argument('--shard-dir',
+                        help="Directory shared by the shards (default: <output_dir>/shards)")
+    parser.add_argument('--merge', action='store_true',
+                        help="Analyze the merged results of all shards")
+    args = parser.parse_args(argv)
+    
+    # A single-shard study runs without writing partial results
+    if args.merge or args.shard_count <= 1:
+        args.shard_index = None
+    return args
+
+def main(argv=None):
     """Main entry point for the PPA study orchestration."""
+    args = parse_args(argv)
     try:
-        result = main_ppa_study_flow()
+        result = main_ppa_study_flow(
+            config_path=args.config,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            merge=args.merge,
+            shard_dir=args.shard_dir
+        )
         return result is not False
     except Exception as e:
         logger.error(f"PPA study flow failed with error: {e}")
@@ -8,57 +8,176 @@ collecting performance metrics and generating switching activity for power analy
 
 import os
 import sys
-from prefect import task, flow
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 # Import utilities
-from flows.utils.config import get_simulation_config, load_config
+from flows.utils.lazy import task, flow
+from flows.utils.plan import as_study_plan, load_study_plan
 from flows.utils.tools import run_verilator, run_vcs
+from flows.utils.cache import get_tool_version
+from flows.utils.store import get_result_store, hash_path, stage_key
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Commands printing the version of each supported simulator
+SIMULATOR_VERSION_CMDS = {
+    'verilator': ["verilator", "--version"],
+    'vcs': ["vcs", "-ID"],
+}
+
+TESTBENCH = "design/hardware/rtl/testbench/universal_tb.sv"
+
+def simulation_key(core, executable, core_config, output_dir=None):
+    """
+    Compute the result store key of a (core, benchmark) simulation.
+    
+    Args:
+        core: Name of the core
+        executable: Compiled software artifact for this core
+        core_config: Core-specific simulation configuration
+        output_dir: Output directory the result refers to (e.g. for its VCD)
+        
+    Returns:
+        Hex digest string covering the RTL, testbench, binary, configuration,
+        simulator version and output location
+    """
+    simulator = core_config.get('simulator', 'verilator')
+    binary = executable.get('path') if isinstance(executable, dict) else executable
+    return stage_key(
+        "simulate",
+        core=core,
+        rtl=hash_path(f"design/hardware/rtl/cores/{core}"),
+        testbench=hash_path(TESTBENCH),
+        binary=hash_path(binary),
+        config=core_config,
+        tool=get_tool_version(SIMULATOR_VERSION_CMDS.get(simulator, [simulator, "--version"])),
+        output_dir=os.path.abspath(output_dir) if output_dir else None
+    )
+
+def outputs_exist(result):
+    """Return True if the files a stored simulation result refers to still exist."""
+    switching = result.get('switching')
+    return switching is None or os.path.exists(switching)
+
+def simulate_core_benchmark(core, benchmark, executable, core_config, output_dir):
+    """
+    Run a single (core, benchmark) simulation in its own output directory.
+    
+    Args:
+        core: Name of the core
+        benchmark: Name of the benchmark
+        executable: Compiled software artifact for this core
+        core_config: Core-specific simulation configuration
+        output_dir: Output directory for this simulation
+        
+    Returns:
+        Dictionary of simulation results
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    simulator = core_config.get('simulator', 'verilator')
+    if simulator == 'verilator':
+        run_simulator = run_verilator
+    elif simulator == 'vcs':
+        run_simulator = run_vcs
+    else:
+        raise ValueError(f"Unsupported simulator: {simulator}")
+    
+    return run_simulator(
+        core_rtl=f"design/hardware/rtl/cores/{core}",
+        testbench=TESTBENCH,
+        executable=executable,
+        options=core_config.get('options', {}),
+        output_dir=output_dir
+    )
+
 @task
 def run_simulations(sw_artifacts, study_params):
     """
     Run RTL simulations for each core with the compiled software.
     
+    Simulations run on a process pool when ``simulation_workers`` is greater
+    than one. Each (core, benchmark) pair writes to its own directory under
+    ``<output_dir>/simulation/<core>/<benchmark>``. Pairs whose inputs are
+    unchanged since a previous run, and whose output files still exist, are
+    taken from the result store.
+    
     Args:
         sw_artifacts: Dictionary of compiled software artifacts
-        study_params: Dictionary containing study parameters
+        study_params: StudyPlan (or configuration dictionary)
         
     Returns:
         Dictionary of simulation results
     """
-    sim_config = get_simulation_config(study_params)
+    plan = as_study_plan(study_params)
+    sim_config = plan.simulation
+    store = get_result_store(plan.config)
     results = {}
+    jobs = []
+    keys = []
     
-    # For each core
-    for core in sim_config['cores']:
-        results[core] = {}
+    # Collect the plan's (core, benchmark) pairs, skipping pairs already in the store
+    for core, benchmark in plan.pairs("core", "benchmark"):
+        results.setdefault(core, {})
+        artifacts = sw_artifacts.get(benchmark, {})
         
-        # For each benchmark
-        for benchmark, artifacts in sw_artifacts.items():
-            if core in artifacts:
-                # Run simulation
-                simulator = sim_config['cores'][core].get('simulator', 'verilator')
-                if simulator == 'verilator':
-                    results[core][benchmark] = run_verilator(
-                        core_rtl=f"design/hardware/rtl/cores/{core}",
-                        testbench=f"design/hardware/rtl/testbench/universal_tb.sv",
-                        executable=artifacts[core],
-                        options=sim_config['cores'][core].get('options', {})
-                    )
-                elif simulator == 'vcs':
-                    results[core][benchmark] = run_vcs(
-                        core_rtl=f"design/hardware/rtl/cores/{core}",
-                        testbench=f"design/hardware/rtl/testbench/universal_tb.sv",
-                        executable=artifacts[core],
-                        options=sim_config['cores'][core].get('options', {})
-                    )
-                else:
-                    raise ValueError(f"Unsupported simulator: {simulator}")
+        if core in artifacts:
+            # A failed build has nothing to simulate and is never stored
+            artifact = artifacts[core]
+            if isinstance(artifact, dict) and (not artifact.get('success', True) or not artifact.get('path')):
+                logger.error(f"Skipping simulation of {benchmark} on {core}: the software build failed")
+                results[core][benchmark] = {
+                    'success': False,
+                    'error': artifact.get('error') or "Software build failed"
+                }
+                continue
+            
+            # The study-wide cycle limit applies unless the core sets its own
+            core_config = dict(plan.core_config(core))
+            core_config['options'] = dict(core_config.get('options') or {})
+            core_config['options'].setdefault('max_cycles', sim_config['max_cycles'])
+            output_dir = os.path.join(sim_config['output_dir'], 'simulation', core, benchmark)
+            key = simulation_key(core, artifacts[core], core_config, output_dir)
+            stored = store.get("simulate", key)
+            if stored is not None and outputs_exist(stored):
+                logger.info(f"Reusing simulation of {benchmark} on {core} ({key[:12]})")
+                results[core][benchmark] = stored
+                continue
+            
+            # Reserve the slot so results keep the configured order
+            results[core][benchmark] = None
+            jobs.append((
+                core,
+                benchmark,
+                artifacts[core],
+                core_config,
+                output_dir
+            ))
+            keys.append(key)
+    
+    workers = max(1, int(sim_config['workers'] or 1))
+    if workers == 1 or len(jobs) <= 1:
+        outcomes = [simulate_core_benchmark(*job) for job in jobs]
+    else:
+        logger.info(f"Running {len(jobs)} simulations on {workers} workers")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(simulate_core_benchmark, *job) for job in jobs]
+            outcomes = []
+            for job, future in zip(jobs, futures):
+                # One failed simulation must not discard the others' results
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    logger.error(f"Simulation of {job[1]} on {job[0]} failed: {e}")
+                    outcomes.append({'success': False, 'error': str(e)})
+    
+    for job, key, result in zip(jobs, keys, outcomes):
+        results[job[0]][job[1]] = result
+        if result.get('success', True):
+            store.put("simulate", key, result)
     
     return results
 
@@ -68,12 +187,12 @@ def simulation_flow():
     logger.info("Starting Stage 2: RTL Simulation")
     
     # Load configuration and compile software first
-    config = load_config()
+    plan = load_study_plan()
     from flows.software_flow import compile_software
-    sw_artifacts = compile_software(config)
+    sw_artifacts = compile_software(plan)
     
     # Run the simulations
-    sim_results = run_simulations(sw_artifacts, config)
+    sim_results = run_simulations(sw_artifacts, plan)
     
     logger.info("✅ Stage 2: RTL simulation completed successfully!")
     return sim_results
@@ -8,42 +8,115 @@ producing binaries and executable files for simulation and analysis.
 
 import os
 import sys
-from prefect import task, flow
+import shutil
 import logging
 
 # Import utilities
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
-from build.flows.utils.config import get_software_config, load_config
-from build.flows.utils.bazel import bazel_build
+from build.flows.utils.lazy import task, flow
+from build.flows.utils.plan import as_study_plan, load_study_plan
+from build.flows.utils.bazel import bazel_build_many
+from build.flows.utils.store import get_result_store, hash_path, stage_key
+from build.flows.utils.cache import get_tool_version
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Files pinning the toolchain and the per-core build configurations
+TOOLCHAIN_FILES = ("WORKSPACE.bazel", "MODULE.bazel", ".bazelrc")
+
+def keep_outputs(result, directory):
+    """
+    Copy the outputs of a build out of bazel-out.
+    
+    The per-core configurations only differ by --define, so they share output
+    paths and the next configuration's build would overwrite these outputs.
+    
+    Args:
+        result: Successful result from bazel_build_many
+        directory: Directory receiving the outputs
+        
+    Returns:
+        The result with its paths moved to the directory and the content hash of its program
+    """
+    os.makedirs(directory, exist_ok=True)
+    outputs = []
+    for path in result['outputs']:
+        kept = os.path.join(directory, os.path.basename(path))
+        if os.path.isdir(path):
+            shutil.copytree(path, kept, dirs_exist_ok=True)
+        else:
+            shutil.copyfile(path, kept)
+        outputs.append(kept)
+    return dict(result, path=outputs[0], outputs=outputs, sha256=hash_path(outputs[0]))
+
 @task
 def compile_software(study_params):
     """
     Compile software benchmarks for the specified configurations.
     
+    All benchmarks for a core configuration are built in a single Bazel
+    invocation; builds whose inputs are unchanged are taken from the result
+    store. The per-core configurations write to the same output paths, so a
+    stored build is only reused while its output still has the stored content.
+    
     Args:
-        study_params: Dictionary containing study parameters
+        study_params: StudyPlan (or configuration dictionary)
         
     Returns:
         Dictionary of compiled software artifacts
     """
-    sw_config = get_software_config(study_params)
+    plan = as_study_plan(study_params)
+    sw_config = plan.software
+    store = get_result_store(plan.config)
+    output_dir = os.path.join(plan.get('output_dir', 'analysis/targets'), 'software')
+    common_hash = hash_path("design/software/common")
+    toolchain = {
+        'bazel': get_tool_version(["bazel", "--version"]),
+        'files': {path: hash_path(path) for path in TOOLCHAIN_FILES}
+    }
     artifacts = {}
+    pending = {}
+    
+    source_hashes = {}
     
-    # Compile each benchmark
-    for benchmark in sw_config['benchmarks']:
-        artifacts[benchmark] = {}
+    # Look up each (benchmark, core) build of the plan in the result store
+    for core, benchmark in plan.pairs("core", "benchmark"):
+        artifacts.setdefault(benchmark, {})
+        if benchmark not in source_hashes:
+            source_hashes[benchmark] = hash_path(f"design/software/{benchmark}")
+        source_hash = source_hashes[benchmark]
         
-        # Compile for each core configuration
-        for core in sw_config['target_cores']:
-            artifacts[benchmark][core] = bazel_build(
-                target=f"//design/software/{benchmark}:executable",
-                config=f"--config={core}"
-            )
+        target = f"//design/software/{benchmark}:executable"
+        config = f"--config={core}"
+        key = stage_key(
+            "compile",
+            target=target,
+            config=config,
+            sources=source_hash,
+            common=common_hash,
+            compiler=sw_config['compiler'],
+            compiler_flags=sw_config['compiler_flags'],
+            toolchain=toolchain
+        )
+        stored = store.get("compile", key)
+        if stored is not None and stored.get('path') and stored.get('sha256') == hash_path(stored['path']):
+            logger.info(f"Reusing build of {benchmark} for {core} ({key[:12]})")
+            artifacts[benchmark][core] = stored
+        else:
+            artifacts[benchmark][core] = None
+            pending.setdefault(config, []).append((benchmark, core, target, key))
+    
+    # Build the remaining targets with one Bazel invocation per core configuration
+    for config, builds in pending.items():
+        built = bazel_build_many([target for _, _, target, _ in builds], config=config)
+        for benchmark, core, target, key in builds:
+            result = built[target]
+            if result['success']:
+                result = keep_outputs(result, os.path.join(output_dir, core, benchmark))
+                store.put("compile", key, result)
+            artifacts[benchmark][core] = result
     
     return artifacts
 
@@ -52,11 +125,11 @@ def software_compilation_flow():
     """Main software compilation flow."""
     logger.info("Starting Stage 1: Software Compilation")
     
-    # Load configuration
-    config = load_config()
+    # Load the study plan
+    plan = load_study_plan()
     
     # Run the compilation
-    artifacts = compile_software(config)
+    artifacts = compile_software(plan)
     
     logger.info("✅ Stage 1: Software compilation completed successfully!")
     return artifacts
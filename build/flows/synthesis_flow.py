@@ -8,70 +8,183 @@ including synthesis, place and route, and power analysis.
 
 import os
 import sys
-from prefect import task, flow
+import json
+import hashlib
 import logging
 
 # Import utilities
-from flows.utils.config import get_synthesis_config, load_config
-from flows.utils.tools import run_yosys, run_openroad
+from flows.utils.lazy import task, flow
+from flows.utils.plan import as_study_plan, load_study_plan
+from flows.utils.tools import run_yosys, run_openroad, run_openroad_power
+from flows.utils.cache import hash_files, list_rtl_files, get_tool_version
+from flows.utils.store import get_result_store, hash_path, stage_key
+from flows.utils.activity import switching_activity
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def synthesis_key(core_rtl, pdk, syn_options):
+    """
+    Compute the memoization key for synthesizing a core with a PDK.
+    
+    Args:
+        core_rtl: Path to the core RTL directory
+        pdk: Name of the PDK
+        syn_options: Synthesis options
+        
+    Returns:
+        Hex digest string covering the RTL contents, PDK and options
+    """
+    hasher = hashlib.sha256()
+    hasher.update(pdk.encode())
+    hasher.update(json.dumps(syn_options or {}, sort_keys=True).encode())
+    if os.path.isdir(core_rtl):
+        hash_files(list_rtl_files(core_rtl), hasher)
+    else:
+        hasher.update(core_rtl.encode())
+    return hasher.hexdigest()
+
+def implement_core(core_rtl, pdk_path, core_config):
+    """
+    Synthesize and place and route a core with a PDK.
+    
+    Args:
+        core_rtl: Path to the core RTL directory
+        pdk_path: Path to the PDK
+        core_config: Core-specific synthesis configuration
+        
+    Returns:
+        Dictionary with 'synthesis' and 'place_and_route' results, and
+        'success' if both steps succeeded
+    """
+    syn_tool = core_config.get('syn_tool', 'yosys')
+    if syn_tool == 'yosys':
+        synth_result = run_yosys(
+            core_rtl=core_rtl,
+            pdk=pdk_path,
+            options=core_config.get('syn_options', {})
+        )
+    else:
+        raise ValueError(f"Unsupported synthesis tool: {syn_tool}")
+    
+    pr_tool = core_config.get('pr_tool', 'openroad')
+    if pr_tool == 'openroad':
+        pr_result = run_openroad(
+            netlist=synth_result['netlist'],
+            pdk=pdk_path,
+            options=core_config.get('pr_options', {})
+        )
+    else:
+        raise ValueError(f"Unsupported P&R tool: {pr_tool}")
+    
+    return {
+        'synthesis': synth_result,
+        'place_and_route': pr_result,
+        'success': bool(synth_result.get('success') and pr_result.get('success'))
+    }
+
 @task
 def run_synthesis(sim_results, study_params):
     """
     Run synthesis and physical implementation for each core with the specified PDKs.
     
+    Synthesis and place and route run once per (core, PDK); only the power
+    analysis is repeated for each benchmark's switching activity. Both steps
+    are skipped when their inputs are unchanged since a previous run.
+    
     Args:
         sim_results: Dictionary of simulation results (including switching activity)
-        study_params: Dictionary containing study parameters
+        study_params: StudyPlan (or configuration dictionary)
         
     Returns:
         Dictionary of synthesis results
     """
-    synth_config = get_synthesis_config(study_params)
+    plan = as_study_plan(study_params)
+    store = get_result_store(plan.config)
     results = {}
+    implemented = {}
     
-    # For each core
-    for core in synth_config['cores']:
-        results[core] = {}
+    # For each (core, PDK) of the plan
+    for core, pdk in plan.pairs("core", "pdk"):
+        core_config = plan.core_config(core)
+        core_rtl = f"design/hardware/rtl/cores/{core}"
+        benchmarks = [
+            cell.benchmark for cell in plan.select(core=core, pdk=pdk)
+            if cell.benchmark in sim_results.get(core, {})
+        ]
+        results.setdefault(core, {})[pdk] = {}
+        if not benchmarks:
+            continue
         
-        # For each PDK
-        for pdk in synth_config['pdks']:
-            results[core][pdk] = {}
-            
-            # For each benchmark (to use switching activity)
-            for benchmark in sim_results.get(core, {}):
-                # Run synthesis
-                syn_tool = synth_config['cores'][core].get('syn_tool', 'yosys')
-                if syn_tool == 'yosys':
-                    synth_result = run_yosys(
-                        core_rtl=f"design/hardware/rtl/cores/{core}",
-                        pdk=f"design/hardware/physical/{pdk}",
-                        options=synth_config['cores'][core].get('syn_options', {})
-                    )
-                else:
-                    raise ValueError(f"Unsupported synthesis tool: {syn_tool}")
-                
-                # Run place and route
-                pr_tool = synth_config['cores'][core].get('pr_tool', 'openroad')
-                if pr_tool == 'openroad':
-                    pr_result = run_openroad(
-                        netlist=synth_result['netlist'],
-                        pdk=f"design/hardware/physical/{pdk}",
-                        switching=sim_results[core][benchmark].get('switching', None),
-                        options=synth_config['cores'][core].get('pr_options', {})
-                    )
-                else:
-                    raise ValueError(f"Unsupported P&R tool: {pr_tool}")
-                
-                # Store results
+        pdk_path = f"design/hardware/physical/{pdk}"
+        key = stage_key(
+            "implement",
+            synthesis=synthesis_key(core_rtl, pdk, core_config.get('syn_options', {})),
+            pdk=hash_path(pdk_path),
+            syn_tool=core_config.get('syn_tool', 'yosys'),
+            pr_tool=core_config.get('pr_tool', 'openroad'),
+            pr_options=core_config.get('pr_options', {}),
+            tools=[get_tool_version(["yosys", "-V"]), get_tool_version(["openroad", "-version"])]
+        )
+        
+        # Synthesize and place and route once per (core RTL, PDK, options),
+        # also across the shards of a study sharing the store
+        if key not in implemented:
+            implemented[key] = store.cached(
+                "implement",
+                key,
+                lambda: implement_core(core_rtl, pdk_path, core_config),
+                shared=True
+            )
+        else:
+            logger.info(f"Reusing synthesis of {core} for {pdk} ({key[:12]})")
+        
+        synth_result = implemented[key]['synthesis']
+        pr_result = implemented[key]['place_and_route']
+        
+        # A failed implementation has no routed design to analyze
+        if not implemented[key].get('success', True):
+            logger.error(f"Skipping power analysis of {core} for {pdk}: implementation failed")
+            for benchmark in benchmarks:
                 results[core][pdk][benchmark] = {
                     'synthesis': synth_result,
-                    'place_and_route': pr_result
+                    'place_and_route': pr_result,
+                    'success': False
                 }
+            continue
+        
+        # For each benchmark, re-run power analysis on the shared routed design
+        for benchmark in benchmarks:
+            power_options = core_config.get('power_options', {})
+            
+            # Reduce VCD dumps to SAIF before hashing and power analysis
+            switching = switching_activity(
+                sim_results[core][benchmark].get('switching', None),
+                scope=power_options.get('activity_scope')
+            )
+            power_key = stage_key(
+                "power",
+                implementation=key,
+                switching=hash_path(switching) if switching else None,
+                options=power_options
+            )
+            power_result = store.cached(
+                "power",
+                power_key,
+                lambda: run_openroad_power(
+                    design_db=pr_result['odb'],
+                    pdk=pdk_path,
+                    switching=switching,
+                    options=power_options
+                )
+            )
+            
+            # Store results
+            results[core][pdk][benchmark] = {
+                'synthesis': synth_result,
+                'place_and_route': {**pr_result, **power_result}
+            }
     
     return results
 
@@ -81,15 +194,15 @@ def synthesis_flow():
     logger.info("Starting Stage 3: Synthesis and PNR")
     
     # Load configuration and run prerequisite flows
-    config = load_config()
+    plan = load_study_plan()
     from flows.software_flow import compile_software
     from flows.simulation_flow import run_simulations
     
-    sw_artifacts = compile_software(config)
-    sim_results = run_simulations(sw_artifacts, config)
+    sw_artifacts = compile_software(plan)
+    sim_results = run_simulations(sw_artifacts, plan)
     
     # Run the synthesis
-    synth_results = run_synthesis(sim_results, config)
+    synth_results = run_synthesis(sim_results, plan)
     
     logger.info("✅ Stage 3: Synthesis and PNR completed successfully!")
     return synth_results
@@ -0,0 +1,265 @@
+"""
+Switching activity extraction from VCD dumps for power analysis.
+
+The VCD is streamed through a memory map and reduced to per-net toggle
+counts and time spent at 0/1/X, which are written as a SAIF file. Memory
+use depends only on the number of dumped nets, not on the dump length.
+"""
+
+import os
+import re
+import mmap
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hierarchy divider used in scope filters and SAIF output
+DIVIDER = "."
+
+class _Net:
+    """Activity of one dumped bit."""
+
+    __slots__ = ("value", "since", "t0", "t1", "tx", "tc", "ig")
+
+    def __init__(self):
+        self.value = None
+        self.since = 0
+        self.t0 = 0
+        self.t1 = 0
+        self.tx = 0
+        self.tc = 0
+        self.ig = 0
+
+    def change(self, value, time):
+        """Record a new value at the given time."""
+        old = self.value
+        if old == value:
+            return
+        if old is not None:
+            self._accumulate(time)
+            if old in "01" and value in "01":
+                self.tc += 1
+            else:
+                self.ig += 1
+        self.value = value
+        self.since = time
+
+    def _accumulate(self, time):
+        duration = time - self.since
+        if self.value == "0":
+            self.t0 += duration
+        elif self.value == "1":
+            self.t1 += duration
+        else:
+            self.tx += duration
+
+    def finish(self, time):
+        """Close the last interval at the end of the dump."""
+        if self.value is not None:
+            self._accumulate(time)
+            self.since = time
+
+def _parse_header(lines, scope=None):
+    """
+    Parse the VCD declaration section.
+
+    Args:
+        lines: Iterator over the raw VCD lines (advanced past $enddefinitions)
+        scope: Optional hierarchical scope prefix (e.g. "universal_testbench.dut")
+
+    Returns:
+        Tuple of (timescale string, dict of id code -> list of _Net per bit,
+        list of (scope path, net name, bit names, bit nets) for the output)
+    """
+    tokens = []
+    for line in lines:
+        line_tokens = line.decode("ascii", "replace").split()
+        tokens.extend(line_tokens)
+        if "$enddefinitions" in line_tokens:
+            break
+
+    timescale = "1 ns"
+    scopes = []
+    signals = {}
+    declarations = []
+    prefix = tuple(scope.split(DIVIDER)) if scope else ()
+
+    keyword, body = None, []
+    for token in tokens:
+        if keyword is None:
+            keyword, body = token, []
+            continue
+        if token != "$end":
+            body.append(token)
+            continue
+
+        if keyword == "$timescale":
+            # SAIF wants "<number> <unit>"; VCD allows "1ps" as well as "1 ps"
+            timescale = " ".join(re.match(r"(\d+)\s*(\w+)", " ".join(body)).groups())
+        elif keyword == "$scope":
+            scopes.append(body[-1])
+        elif keyword == "$upscope":
+            scopes.pop()
+        elif keyword == "$var" and len(body) >= 4:
+            width, code, name = int(body[1]), body[2], body[3]
+            path = tuple(scopes)
+            if path[:len(prefix)] == prefix and body[0] != "real":
+                nets = signals.get(code)
+                if nets is None:
+                    nets = signals[code] = [_Net() for _ in range(width)]
+                declarations.append((path, name, _bit_names(name, body[4:], width), nets))
+        keyword = None
+
+    return timescale, signals, declarations
+
+def _bit_names(name, rest, width):
+    """Return the names of the bits of a net, MSB first."""
+    if width == 1 and not rest:
+        return [name]
+    msb, lsb = width - 1, 0
+    if rest and rest[0].startswith("["):
+        bounds = rest[0].strip("[]").split(":")
+        msb = int(bounds[0])
+        lsb = int(bounds[-1])
+    step = -1 if msb >= lsb else 1
+    return [f"{name}[{bit}]" for bit in range(msb, lsb + step, step)][:width]
+
+def _extend(bits, width):
+    """Left-extend a vector value to its declared width (VCD rules)."""
+    if len(bits) >= width:
+        return bits[-width:]
+    fill = bits[0] if bits[0] in "xz" else "0"
+    return fill * (width - len(bits)) + bits
+
+def read_vcd_activity(vcd_path, scope=None):
+    """
+    Compute switching activity from a VCD file in a single streaming pass.
+
+    Args:
+        vcd_path: Path to the VCD file
+        scope: Optional hierarchical scope prefix restricting the nets considered
+
+    Returns:
+        Dictionary with timescale, duration and declarations (scope path,
+        net name, bit names, per-bit activity)
+    """
+    with open(vcd_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Empty VCD file: {vcd_path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = iter(mm.readline, b"")
+            timescale, signals, declarations = _parse_header(lines, scope)
+
+            time = 0
+            for line in lines:
+                head = line[:1]
+                if head == b"#":
+                    time = int(line[1:])
+                elif head and head in b"01xzXZ":
+                    nets = signals.get(line[1:].strip().decode())
+                    if nets is not None:
+                        nets[0].change(head.decode().lower(), time)
+                elif head and head in b"bB":
+                    value, _, code = line[1:].decode().partition(" ")
+                    nets = signals.get(code.strip())
+                    if nets is not None:
+                        for net, bit in zip(nets, _extend(value.lower(), len(nets))):
+                            net.change(bit, time)
+
+    for nets in signals.values():
+        for net in nets:
+            net.finish(time)
+
+    return {
+        "timescale": timescale,
+        "duration": time,
+        "declarations": declarations
+    }
+
+def _saif_name(name):
+    """Escape a net name for SAIF."""
+    return name.replace("[", "\\[").replace("]", "\\]")
+
+def write_saif(activity, saif_path):
+    """
+    Write switching activity as a SAIF 2.0 file.
+
+    Args:
+        activity: Dictionary from read_vcd_activity
+        saif_path: Output path
+    """
+    # Group nets by instance path
+    tree = {}
+    for path, _, bit_names, nets in activity["declarations"]:
+        node = tree
+        for instance in path:
+            node = node.setdefault(instance, {})
+        node.setdefault(None, []).extend(zip(bit_names, nets))
+
+    def write_instance(f, name, node, indent):
+        pad = "  " * indent
+        f.write(f"{pad}(INSTANCE {name}\n")
+        if node.get(None):
+            f.write(f"{pad}  (NET\n")
+            for bit_name, net in node[None]:
+                f.write(f"{pad}    ({_saif_name(bit_name)} (T0 {net.t0}) (T1 {net.t1}) (TX {net.tx}) "
+                        f"(TC {net.tc}) (IG {net.ig}))\n")
+            f.write(f"{pad}  )\n")
+        for child, child_node in node.items():
+            if child is not None:
+                write_instance(f, child, child_node, indent + 1)
+        f.write(f"{pad})\n")
+
+    tmp_path = f"{saif_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("(SAIFILE\n")
+        f.write("(SAIFVERSION \"2.0\")\n")
+        f.write("(DIRECTION \"backward\")\n")
+        f.write("(PROGRAM_NAME \"riscv-sde vcd2saif\")\n")
+        f.write(f"(DIVIDER {DIVIDER} )\n")
+        f.write(f"(TIMESCALE {activity['timescale']})\n")
+        f.write(f"(DURATION {activity['duration']})\n")
+        for name, node in tree.items():
+            write_instance(f, name, node, 0)
+        f.write(")\n")
+    os.replace(tmp_path, saif_path)
+
+def vcd_to_saif(vcd_path, saif_path=None, scope=None):
+    """
+    Convert a VCD dump into a SAIF switching activity file.
+
+    Args:
+        vcd_path: Path to the VCD file
+        saif_path: Output path (default: the VCD path with a .saif extension)
+        scope: Optional hierarchical scope prefix restricting the nets written
+
+    Returns:
+        Path to the SAIF file
+    """
+    saif_path = saif_path or os.path.splitext(vcd_path)[0] + ".saif"
+    logger.info(f"Converting {vcd_path} to {saif_path}" + (f" (scope {scope})" if scope else ""))
+    write_saif(read_vcd_activity(vcd_path, scope), saif_path)
+    return saif_path
+
+def switching_activity(path, scope=None):
+    """
+    Return a compact activity file for power analysis.
+
+    VCD dumps are converted to SAIF next to the dump (one file per scope);
+    the SAIF is reused while it is newer than the VCD. Other files are
+    returned unchanged.
+
+    Args:
+        path: Path to a VCD or SAIF file (or None)
+        scope: Optional hierarchical scope prefix for VCD conversion
+
+    Returns:
+        Path to the activity file, or None
+    """
+    if not path or not path.endswith(".vcd") or not os.path.exists(path):
+        return path
+    suffix = f".{scope}.saif" if scope else ".saif"
+    saif_path = os.path.splitext(path)[0] + suffix
+    if os.path.exists(saif_path) and os.path.getmtime(saif_path) >= os.path.getmtime(path):
+        return saif_path
+    return vcd_to_saif(path, saif_path, scope)
@@ -8,76 +8,177 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def bazel_build(target, config=None, options=None):
-    """
-    Build a target using Bazel.
-    
-    Args:
-        target: Target to build (e.g. //design/software/fft:executable)
-        config: Optional configuration to use (e.g. --config=rocket)
-        options: Additional options to pass to Bazel
-        
-    Returns:
-        Dictionary with paths to built artifacts
-    """
-    cmd = ["bazel", "build"]
+# cquery Starlark expression printing "<label> <output> <output>..." per target;
+# the output paths are relative to the execution root
+_FILES_EXPR = 'str(target.label) + " " + " ".join([f.path for f in target.files.to_list()])'
+
+def _bazel_flags(config=None, options=None):
+    """Translate config/options arguments into Bazel command-line flags."""
+    flags = []
     
     # Add configuration if specified
     if config:
-        cmd.append(config)
+        flags.append(config)
     
     # Add additional options
     if options:
         if isinstance(options, list):
-            cmd.extend(options)
+            flags.extend(options)
         elif isinstance(options, str):
-            cmd.append(options)
+            flags.append(options)
         else:
             for key, value in options.items():
-                cmd.append(f"--{key}={value}")
+                flags.append(f"--{key}={value}")
     
-    # Add target
-    cmd.append(target)
+    return flags
+
+def _normalize_label(label):
+    """Strip the repository prefix Bazel adds to main-repository labels."""
+    return "//" + label.split("//", 1)[1] if "//" in label else label
+
+def _target_errors(stderr, target):
+    """Return the Bazel error lines that mention a target or its package."""
+    label = _normalize_label(target)
+    package = label.split(":", 1)[0]
+    names = (label, f"'{package[2:]}'", f"{package}:", f"{package[2:]}/BUILD")
+    return [
+        line for line in stderr.splitlines()
+        if line.startswith("ERROR") and any(name in line for name in names)
+    ]
+
+def bazel_execution_root(config=None, options=None):
+    """
+    Return the execution root that cquery output paths are relative to.
     
-    logger.info(f"Running Bazel command: {' '.join(cmd)}")
+    The workspace's bazel-out link cannot be used instead: .bazelrc moves the
+    convenience symlinks under output/.
     
-    # Run the command
-    try:
-        result = subprocess.run(
-            cmd, 
-            check=True, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            text=True
-        )
+    Args:
+        config: Optional configuration to use (must match the build)
+        options: Additional options to pass to Bazel
         
-        # Parse output to find built artifacts
-        output_path = None
-        for line in result.stdout.splitlines():
-            if line.startswith("bazel-bin"):
-                output_path = line.strip()
+    Returns:
+        Absolute path of the execution root
+    """
+    cmd = ["bazel", "info"] + _bazel_flags(config, options) + ["execution_root"]
+    result = subprocess.run(
+        cmd,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    return result.stdout.strip()
+
+def bazel_query_outputs(targets, config=None, options=None):
+    """
+    Resolve the output files of targets with a single cquery.
+    
+    The query runs with --keep_going, so targets that cannot be resolved
+    (e.g. a package without a BUILD file) are left out of the result
+    instead of failing the whole query.
+    
+    Args:
+        targets: List of targets
+        config: Optional configuration to use (must match the build)
+        options: Additional options to pass to Bazel
         
-        if not output_path and target.endswith(":executable"):
-            # Try to infer the output path
-            parts = target.split(":")
-            if len(parts) == 2:
-                target_path = parts[0].lstrip("/")
-                output_path = os.path.join("bazel-bin", target_path, "executable")
+    Returns:
+        Dictionary mapping each resolved target to its list of absolute output paths
+    """
+    cmd = (["bazel", "cquery"] + _bazel_flags(config, options) +
+           ["--keep_going", "--output=starlark", f"--starlark:expr={_FILES_EXPR}",
+            f"set({' '.join(targets)})"])
+    
+    logger.info(f"Running Bazel command: {' '.join(cmd)}")
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if result.returncode != 0:
+        logger.warning(f"Bazel cquery could not resolve every target (exit code {result.returncode})")
+        logger.warning(f"STDERR: {result.stderr}")
+    
+    lines = [line.split() for line in result.stdout.splitlines() if line.strip()]
+    if not lines:
+        return {}
+    
+    root = bazel_execution_root(config, options)
+    return {
+        _normalize_label(parts[0]): [os.path.join(root, path) for path in parts[1:]]
+        for parts in lines
+    }
+
+def bazel_build_many(targets, config=None, options=None):
+    """
+    Build several targets in one Bazel invocation.
+    
+    The build uses --keep_going so one broken target does not hide the
+    others, and output paths are resolved with cquery rather than parsed
+    from the build log.
+    
+    Args:
+        targets: List of targets to build
+        config: Optional configuration to use (e.g. --config=rocket)
+        options: Additional options to pass to Bazel
         
-        return {
-            "path": output_path,
+    Returns:
+        Dictionary mapping each target to a result dictionary
+        (path, outputs, target, success[, error])
+    """
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        return {}
+    
+    flags = _bazel_flags(config, options)
+    cmd = ["bazel", "build", "--keep_going"] + flags + targets
+    
+    logger.info(f"Running Bazel command: {' '.join(cmd)}")
+    
+    # Run the build; individual failures are detected from the outputs below
+    build = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if build.returncode != 0:
+        logger.error(f"Bazel build reported failures (exit code {build.returncode})")
+        logger.error(f"STDERR: {build.stderr}")
+    
+    outputs = bazel_query_outputs(targets, config, options)
+    
+    results = {}
+    for target in targets:
+        files = outputs.get(_normalize_label(target), [])
+        built = bool(files) and all(os.path.exists(path) for path in files)
+        results[target] = {
+            "path": files[0] if files else None,
+            "outputs": files,
             "target": target,
-            "success": True
+            "success": built
         }
+        if not built:
+            errors = _target_errors(build.stderr, target)
+            results[target]["error"] = "\n".join(errors) if errors else (
+                f"Bazel did not produce the outputs of {target}" if files else
+                f"Bazel could not resolve {target}"
+            )
+    
+    return results
+
+def bazel_build(target, config=None, options=None):
+    """
+    Build a target using Bazel.
     
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Bazel build failed: {e}")
-        logger.error(f"STDOUT: {e.stdout}")
-        logger.error(f"STDERR: {e.stderr}")
+    Args:
+        target: Target to build (e.g. //design/software/fft:executable)
+        config: Optional configuration to use (e.g. --config=rocket)
+        options: Additional options to pass to Bazel
         
-        return {
-            "path": None,
-            "target": target,
-            "success": False,
-            "error": e.stderr
-        }
+    Returns:
+        Dictionary with paths to built artifacts
+    """
+    return bazel_build_many([target], config=config, options=options)[target]
@@ -0,0 +1,153 @@
+"""
+Content-addressed cache utilities for compiled simulators and other build products.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default location of the compiled simulator cache (relative to the workspace root)
+DEFAULT_CACHE_DIR = os.path.join("output", ".sim_cache")
+
+# File extensions considered part of an RTL include directory
+RTL_EXTENSIONS = (".v", ".sv", ".vh", ".svh")
+
+# Tool versions already queried in this process
+_tool_versions = {}
+
+def hash_files(paths, hasher=None):
+    """
+    Hash the contents of a list of files.
+
+    Args:
+        paths: Iterable of file paths (hashed in the given order)
+        hasher: Optional hashlib object to update (default: new sha256)
+
+    Returns:
+        The updated hashlib object
+    """
+    hasher = hasher or hashlib.sha256()
+    for path in paths:
+        # Include the file name so that renames invalidate the key
+        hasher.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+    return hasher
+
+def list_rtl_files(directory, extensions=RTL_EXTENSIONS):
+    """
+    List RTL source files below a directory in a stable order.
+
+    Args:
+        directory: Directory to scan recursively
+        extensions: File extensions to include
+
+    Returns:
+        Sorted list of file paths
+    """
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith(extensions):
+                files.append(os.path.join(root, name))
+    return files
+
+def get_tool_version(cmd):
+    """
+    Get the version string of an external tool.
+
+    Args:
+        cmd: Command list that prints the tool version (e.g. ["iverilog", "-V"])
+
+    Returns:
+        First line of the tool output, or "unknown" if the tool cannot be run
+    """
+    cache_key = tuple(cmd)
+    if cache_key in _tool_versions:
+        return _tool_versions[cache_key]
+
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        )
+        lines = result.stdout.strip().splitlines()
+        version = lines[0].strip() if lines else "unknown"
+    except (OSError, subprocess.SubprocessError):
+        version = "unknown"
+
+    _tool_versions[cache_key] = version
+    return version
+
+def compute_build_key(sources, include_dirs=None, tool_version="", flags=None):
+    """
+    Compute a content hash identifying a simulator build.
+
+    Args:
+        sources: List of source files (testbench and core RTL)
+        include_dirs: List of include directories whose RTL files are hashed
+        tool_version: Version string of the compiler/simulator
+        flags: Additional command-line flags that affect the build
+
+    Returns:
+        Hex digest string
+    """
+    hasher = hashlib.sha256()
+    hasher.update(tool_version.encode())
+    for flag in flags or []:
+        hasher.update(str(flag).encode())
+    hash_files(sources, hasher)
+    for include_dir in include_dirs or []:
+        hash_files(list_rtl_files(include_dir), hasher)
+    return hasher.hexdigest()
+
+def cached_build(key, build_fn, artifact, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Return a cached build product, building it on a cache miss.
+
+    The build runs in a private temporary directory which is renamed into
+    place once complete, so concurrent builders never see partial results.
+
+    Args:
+        key: Cache key (see compute_build_key)
+        build_fn: Callable taking a build directory and producing the artifact in it
+        artifact: Name of the artifact inside the build directory
+        cache_dir: Root directory of the cache
+
+    Returns:
+        Tuple of (path to the cached artifact, True if it was a cache hit)
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    artifact_path = os.path.join(entry_dir, artifact)
+
+    if os.path.exists(artifact_path):
+        logger.info(f"Cache hit for {artifact} ({key[:12]})")
+        return artifact_path, True
+
+    logger.info(f"Cache miss for {artifact} ({key[:12]}), building")
+    os.makedirs(cache_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=cache_dir)
+
+    try:
+        build_fn(build_dir)
+        try:
+            os.rename(build_dir, entry_dir)
+        except OSError:
+            # Another builder finished first; keep its result
+            if not os.path.exists(artifact_path):
+                raise
+            shutil.rmtree(build_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    return artifact_path, False
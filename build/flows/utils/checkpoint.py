@@ -0,0 +1,270 @@
+"""
+Architectural checkpoints for starting RTL simulation at a region of interest.
+
+A checkpoint is a directory holding the state of the hart after a functional
+run on the ISS:
+
+    checkpoint.json  PC, registers, instruction count and metadata
+    memory.hex       sparse $readmemh image of the memory (@ word addresses)
+    boot.hex         restore stub for the testbench: count, PC, then
+                     (address, instruction) pairs
+
+With the ``checkpoint`` simulator option, the testbench loads the memory
+image into both memories and writes the restore stub over the reset vector.
+The stub sets every register with lui/addi and jumps to the checkpoint PC.
+When the core fetches that PC, the testbench puts back the memory under the
+stub and restarts its cycle and instruction counters, so the statistics
+cover the region of interest only.
+"""
+
+import os
+import re
+import json
+import logging
+from array import array
+
+from .iss import DEFAULT_MAX_INSTRUCTIONS
+from .profiling import load_program_image
+from .testbench import CHECKPOINT_BOOT, CHECKPOINT_MEMORY
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_STATE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+# Bytes reserved for the restore stub at the reset vector (31 lui/addi pairs and a jump)
+STUB_BYTES = 4 * 64
+
+# Largest number of (address, instruction) pairs the testbench boot ROM holds
+MAX_STUB_WORDS = 127
+
+# Shortest run of zero bytes the memory image skips
+_ZERO_GAP = bytes(64)
+_NONZERO = re.compile(rb"[^\x00]")
+
+# Array typecode of a 32-bit word
+_WORD_TYPE = next(code for code in "IL" if array(code).itemsize == 4)
+
+def _lui(rd, upper):
+    return (upper & 0xFFFFF) << 12 | rd << 7 | 0x37
+
+def _addi(rd, rs1, imm):
+    return (imm & 0xFFF) << 20 | rs1 << 15 | rd << 7 | 0x13
+
+def _jal(rd, offset):
+    offset &= 0x1FFFFF
+    return ((offset >> 20) << 31 | ((offset >> 1) & 0x3FF) << 21 | ((offset >> 11) & 1) << 20 |
+            ((offset >> 12) & 0xFF) << 12 | rd << 7 | 0x6F)
+
+def _jalr(rd, rs1, imm):
+    return (imm & 0xFFF) << 20 | rs1 << 15 | rd << 7 | 0x67
+
+def _split(value):
+    """Split a 32-bit value into lui and sign-extended addi immediates."""
+    low = ((value & 0xFFF) ^ 0x800) - 0x800
+    return ((value - low) >> 12) & 0xFFFFF, low
+
+def _set_register(rd, value, fixed=False):
+    """Instructions loading a constant into a register (always two if fixed)."""
+    upper, low = _split(value & 0xFFFFFFFF)
+    if not fixed and upper == 0:
+        return [_addi(rd, 0, low)]
+    if not fixed and low == 0:
+        return [_lui(rd, upper)]
+    return [_lui(rd, upper), _addi(rd, rd, low)]
+
+def restore_stub(registers, pc, reset_pc=0):
+    """
+    Generate the code that restores the registers and jumps to the checkpoint PC.
+
+    The stub runs from the reset vector. It ends with a jal to the PC when
+    it is in range; otherwise x1 carries the jump and a two-instruction
+    trampoline just before the PC restores it.
+
+    Args:
+        registers: Values of x0-x31
+        pc: Checkpoint PC
+        reset_pc: Reset vector of the core
+
+    Returns:
+        List of (address, instruction) pairs
+
+    Raises:
+        ValueError: If the PC lies inside the stub
+    """
+    if reset_pc <= pc < reset_pc + STUB_BYTES:
+        raise ValueError(f"Checkpoint PC 0x{pc:08x} lies inside the restore stub at 0x{reset_pc:08x}")
+
+    words = []
+    for rd in range(2, 32):
+        words.extend(_set_register(rd, registers[rd]))
+
+    near = words + _set_register(1, registers[1])
+    offset = pc - (reset_pc + 4 * len(near))
+    if -(1 << 20) <= offset < (1 << 20):
+        stub = [(reset_pc + 4 * i, word) for i, word in enumerate(near + [_jal(0, offset)])]
+    else:
+        trampoline = pc - 8
+        upper, low = _split(trampoline & 0xFFFFFFFF)
+        words += [_lui(1, upper), _jalr(0, 1, low)]
+        stub = [(reset_pc + 4 * i, word) for i, word in enumerate(words)]
+        stub += [(trampoline + 4 * i, word) for i, word in enumerate(_set_register(1, registers[1], fixed=True))]
+    return stub
+
+def write_memory_image(path, memory):
+    """
+    Write memory as a sparse $readmemh image, skipping runs of zeros.
+
+    Args:
+        path: Output path
+        memory: Memory contents from address 0
+    """
+    with open(path, 'w') as f:
+        position = 0
+        while True:
+            match = _NONZERO.search(memory, position)
+            if match is None:
+                break
+            start = match.start() & ~3
+            end = memory.find(_ZERO_GAP, match.start())
+            end = len(memory) if end < 0 else (end + 3) & ~3
+            words = array(_WORD_TYPE, bytes(memory[start:end]) + bytes(-(end - start) % 4))
+            words.byteswap()
+            f.write(f"@{start // 4:x}\n" + memoryview(words).hex('\n', 4) + "\n")
+            position = end
+
+def write_checkpoint(directory, iss, reset_pc=0, metadata=None):
+    """
+    Save the state of the ISS as a checkpoint.
+
+    Args:
+        directory: Checkpoint directory (created if needed)
+        iss: InstructionSetSimulator to save
+        reset_pc: Reset vector of the core the checkpoint is for
+        metadata: Optional dictionary stored in checkpoint.json
+
+    Returns:
+        The saved state (contents of checkpoint.json)
+    """
+    os.makedirs(directory, exist_ok=True)
+    stub = restore_stub(iss.x, iss.pc, reset_pc)
+    if len(stub) > MAX_STUB_WORDS:
+        raise ValueError(f"Restore stub of {len(stub)} words exceeds the testbench boot ROM")
+
+    write_memory_image(os.path.join(directory, CHECKPOINT_MEMORY), iss.memory)
+    with open(os.path.join(directory, CHECKPOINT_BOOT), 'w') as f:
+        f.write(f"{len(stub):08x}\n{iss.pc:08x}\n")
+        f.write("".join(f"{address:08x}\n{word:08x}\n" for address, word in stub))
+
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'pc': iss.pc,
+        'registers': list(iss.x),
+        'instructions': iss.retired,
+        'csrs': {f"0x{number:03x}": value for number, value in sorted(iss.csrs.items())},
+        'memory_size': len(iss.memory),
+        'reset_pc': reset_pc,
+        'uart': iss.uart.decode(errors="replace"),
+        'metadata': dict(metadata or {}),
+    }
+    with open(os.path.join(directory, CHECKPOINT_STATE), 'w') as f:
+        json.dump(state, f, indent=2)
+    logger.info(f"Wrote checkpoint at PC 0x{iss.pc:08x} after {iss.retired} instructions to {directory}")
+    return state
+
+def read_checkpoint(directory):
+    """
+    Read the state of a checkpoint.
+
+    Args:
+        directory: Checkpoint directory
+
+    Returns:
+        Contents of checkpoint.json
+    """
+    with open(os.path.join(directory, CHECKPOINT_STATE), 'r') as f:
+        state = json.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')} in {directory}")
+    return state
+
+def load_checkpoint(directory, iss):
+    """
+    Restore a checkpoint into the ISS, e.g. to continue a functional run.
+
+    Args:
+        directory: Checkpoint directory
+        iss: InstructionSetSimulator to restore into
+
+    Returns:
+        The checkpoint state
+    """
+    state = read_checkpoint(directory)
+    image = load_program_image(os.path.join(directory, CHECKPOINT_MEMORY))
+    image.extend(bytes(max(len(iss.memory), state['memory_size']) - len(image)))
+    iss.write_memory(0, image)
+    iss.x[:] = state['registers']
+    iss.pc = state['pc']
+    iss.retired = state['instructions']
+    iss.csrs = {int(number, 16): value for number, value in state.get('csrs', {}).items()}
+    iss.uart = bytearray(state.get('uart', "").encode())
+    return state
+
+def advance(iss, instructions=None, pc=None, max_instructions=DEFAULT_MAX_INSTRUCTIONS, reset_pc=0):
+    """
+    Run the ISS to a checkpoint position.
+
+    With ``instructions``, the run stops at the first block boundary once
+    that many instructions have retired; with ``pc``, it stops the next time
+    that PC is reached. A run stopped by instruction count continues past
+    any PC inside the restore stub region.
+
+    Args:
+        iss: InstructionSetSimulator with the program loaded
+        instructions: Retired instructions to run to
+        pc: PC to stop at
+        max_instructions: Instruction limit when stopping at a PC
+        reset_pc: Reset vector of the core the checkpoint is for
+
+    Returns:
+        Number of instructions retired at the checkpoint
+
+    Raises:
+        RuntimeError: If the program ends before the position is reached
+    """
+    if (instructions is None) == (pc is None):
+        raise ValueError("Give either an instruction count or a PC")
+    if pc is not None and reset_pc <= pc < reset_pc + STUB_BYTES:
+        raise ValueError(f"Checkpoint PC 0x{pc:08x} lies inside the restore stub at 0x{reset_pc:08x}")
+
+    if pc is not None:
+        reason = iss.run(max_instructions, stop_at=pc)
+        reached = reason == "stop_pc"
+    else:
+        reason = iss.run(instructions) if iss.retired < instructions else "max_instructions"
+        reached = reason == "max_instructions"
+    while reached and reset_pc <= iss.pc < reset_pc + STUB_BYTES:
+        reason = iss.run(iss.retired + 1)
+        reached = reason == "max_instructions"
+    if not reached:
+        raise RuntimeError(f"The program ended on {reason} after {iss.retired} instructions "
+                           "before reaching the checkpoint")
+    return iss.retired
+
+def take_checkpoint(iss, directory, instructions=None, pc=None, reset_pc=0, metadata=None):
+    """
+    Run the ISS to a position and save a checkpoint there (see advance).
+
+    Args:
+        iss: InstructionSetSimulator with the program loaded
+        directory: Checkpoint directory
+        instructions: Retired instructions to run to
+        pc: PC to stop at
+        reset_pc: Reset vector of the core the checkpoint is for
+        metadata: Optional dictionary stored in checkpoint.json
+
+    Returns:
+        The saved state
+    """
+    advance(iss, instructions, pc, reset_pc=reset_pc)
+    return write_checkpoint(directory, iss, reset_pc, metadata)
@@ -3,9 +3,65 @@ Configuration utilities for the PPA study flows.
 """
 
 import os
+import copy
+import hashlib
 import yaml
 import json
 
+# Configuration used when no configuration file is found
+DEFAULT_CONFIG = {
+    'cores': ['rocket', 'vexriscv', 'cva6'],
+    'pdks': ['sky130', 'generic'],
+    'benchmarks': ['fft', 'matrix_mult', 'crypto'],
+    'output_dir': 'analysis/targets'
+}
+
+# Parsed configuration files: path -> (mtime_ns, size, content hash, configuration)
+_config_cache = {}
+
+def default_config_path():
+    """Return the default configuration file, or None if there is none."""
+    for path in ['configs/default.yaml', 'configs/default.json']:
+        if os.path.exists(path):
+            return path
+    return None
+
+def read_config_file(config_path):
+    """
+    Read and parse a configuration file, reusing the parsed result while the file is unchanged.
+    
+    The file is only re-read when its mtime or size changes, and only
+    re-parsed when its content hash changes.
+    
+    Args:
+        config_path: Path to a YAML or JSON configuration file
+        
+    Returns:
+        Tuple of (configuration dictionary, content hash). The dictionary is
+        shared between callers and must not be modified.
+    """
+    if not config_path.endswith(('.yaml', '.yml', '.json')):
+        raise ValueError(f"Unsupported config file format: {config_path}")
+    
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    cached = _config_cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[3], cached[2]
+    
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if cached is not None and cached[2] == digest:
+        config = cached[3]
+    elif config_path.endswith('.json'):
+        config = json.loads(content)
+    else:
+        config = yaml.safe_load(content)
+    
+    _config_cache[path] = (stat.st_mtime_ns, stat.st_size, digest, config)
+    return config, digest
+
 def load_config(config_path=None):
     """
     Load configuration from YAML or JSON file.
@@ -18,28 +74,14 @@ def load_config(config_path=None):
     """
     if config_path is None:
         # Try to find a default config
-        if os.path.exists('configs/default.yaml'):
-            config_path = 'configs/default.yaml'
-        elif os.path.exists('configs/default.json'):
-            config_path = 'configs/default.json'
-        else:
+        config_path = default_config_path()
+        if config_path is None:
             # Return a minimal default configuration
-            return {
-                'cores': ['rocket', 'vexriscv', 'cva6'],
-                'pdks': ['sky130', 'generic'],
-                'benchmarks': ['fft', 'matrix_mult', 'crypto'],
-                'output_dir': 'analysis/targets'
-            }
+            return copy.deepcopy(DEFAULT_CONFIG)
     
-    # Load from file
-    if config_path.endswith('.yaml') or config_path.endswith('.yml'):
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-    elif config_path.endswith('.json'):
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    else:
-        raise ValueError(f"Unsupported config file format: {config_path}")
+    # Load from file (parsed once per file content)
+    config, _ = read_config_file(config_path)
+    return copy.deepcopy(config)
 
 def get_software_config(study_params):
     """Extract software-specific configuration."""
@@ -55,7 +97,9 @@ def get_simulation_config(study_params):
     return {
         'cores': study_params.get('cores_config', {}),
         'max_cycles': study_params.get('max_simulation_cycles', 10000000),
-        'trace_enabled': study_params.get('enable_trace', False)
+        'trace_enabled': study_params.get('enable_trace', False),
+        'output_dir': study_params.get('output_dir', 'analysis/targets'),
+        'workers': study_params.get('simulation_workers', 1)
     }
 
 def get_synthesis_config(study_params):
@@ -73,5 +117,6 @@ def get_analysis_config(study_params):
         'output_dir': study_params.get('output_dir', 'analysis/targets'),
         'plot_format': study_params.get('plot_format', 'png'),
         'report_format': study_params.get('report_format', 'html'),
+        'table_format': study_params.get('table_format', 'parquet'),
         'comparison_baseline': study_params.get('comparison_baseline', 'rocket')
     }
@@ -0,0 +1,233 @@
+"""
+Guest PC hotspot analysis from the testbench PC trace.
+
+With the ``pc_trace`` simulator option, the testbench writes ``pc_trace.bin``:
+little-endian 32-bit (pc, cycles) pairs, one per run of cycles with the same
+``debug_pc``. This module maps the PCs to the symbols of the benchmark ELF
+and produces a flat (per-function) profile and a basic-block profile.
+"""
+
+import os
+import struct
+import logging
+import numpy as np
+
+from .testbench import PC_TRACE
+
+logger = logging.getLogger(__name__)
+
+# ELF symbol types attributed to code (STT_NOTYPE covers assembly labels such as _start)
+_STT_NOTYPE = 0
+_STT_FUNC = 2
+_SHT_SYMTAB = 2
+
+def read_pc_trace(path):
+    """
+    Read a PC trace written by the testbench.
+
+    Args:
+        path: Path to pc_trace.bin
+
+    Returns:
+        Tuple of (pcs, cycles) uint32 arrays in trace order
+    """
+    records = np.fromfile(path, dtype="<u4")
+    records = records[:len(records) - len(records) % 2].reshape(-1, 2)
+    return records[:, 0], records[:, 1]
+
+def read_elf_symbols(path):
+    """
+    Read the code symbols of an ELF file.
+
+    Args:
+        path: Path to a 32- or 64-bit little-endian ELF file
+
+    Returns:
+        Tuple of (addresses, sizes, names) sorted by address
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != b"\x7fELF" or data[5] != 1:
+        raise ValueError(f"{path} is not a little-endian ELF file")
+
+    is64 = data[4] == 2
+    if is64:
+        shoff, = struct.unpack_from("<Q", data, 0x28)
+        shentsize, shnum = struct.unpack_from("<HH", data, 0x3A)
+        section = "<IIQQQQIIQQ"
+        symbol, symsize = "<IBBHQQ", 24
+    else:
+        shoff, = struct.unpack_from("<I", data, 0x20)
+        shentsize, shnum = struct.unpack_from("<HH", data, 0x2E)
+        section = "<IIIIIIIIII"
+        symbol, symsize = "<IIIBBH", 16
+
+    sections = [struct.unpack_from(section, data, shoff + i * shentsize) for i in range(shnum)]
+    symbols = {}
+    for sh_type, offset, size, link in ((s[1], s[4], s[5], s[6]) for s in sections):
+        if sh_type != _SHT_SYMTAB:
+            continue
+        strtab = sections[link][4]
+        for entry in range(offset, offset + size, symsize):
+            if is64:
+                name, info, _, shndx, value, sym_size = struct.unpack_from(symbol, data, entry)
+            else:
+                name, value, sym_size, info, _, shndx = struct.unpack_from(symbol, data, entry)
+            if shndx == 0 or (info & 0xF) not in (_STT_NOTYPE, _STT_FUNC):
+                continue
+            end = data.index(b"\0", strtab + name)
+            label = data[strtab + name:end].decode(errors="replace")
+            # Skip local labels and mapping symbols ($x, $d)
+            if label and not label.startswith(("$", ".L")):
+                symbols.setdefault(value, (sym_size, label))
+
+    addresses = np.array(sorted(symbols), dtype=np.uint64)
+    sizes = np.array([symbols[a][0] for a in sorted(symbols)], dtype=np.uint64)
+    names = np.array([symbols[a][1] for a in sorted(symbols)], dtype=object)
+    return addresses, sizes, names
+
+def symbolize(pcs, symbols):
+    """
+    Map PCs to symbol names.
+
+    A PC belongs to the closest symbol at or below it, if it lies within
+    the symbol's size (symbols without a size extend to the next symbol).
+
+    Args:
+        pcs: Array of PCs
+        symbols: Tuple from read_elf_symbols, or None
+
+    Returns:
+        Array of names (``0x<pc>`` for PCs outside any symbol)
+    """
+    pcs = np.asarray(pcs, dtype=np.uint64)
+    fallback = np.array([f"0x{pc:08x}" for pc in pcs], dtype=object)
+    if symbols is None or len(symbols[0]) == 0:
+        return fallback
+
+    addresses, sizes, names = symbols
+    index = np.searchsorted(addresses, pcs, side="right") - 1
+    valid = index >= 0
+    index = np.maximum(index, 0)
+    valid &= (sizes[index] == 0) | (pcs < addresses[index] + sizes[index])
+    return np.where(valid, names[index], fallback)
+
+def flat_profile(pcs, cycles, symbols=None, top=None):
+    """
+    Compute the cycles spent in each function.
+
+    Args:
+        pcs: PCs of the trace records
+        cycles: Cycles of the trace records
+        symbols: Tuple from read_elf_symbols, or None
+        top: Number of entries to return (all if None)
+
+    Returns:
+        List of {symbol, cycles, share, pcs} dictionaries, hottest first
+    """
+    unique_pcs, inverse = np.unique(pcs, return_inverse=True)
+    pc_cycles = np.bincount(inverse, weights=cycles)
+    labels, label_index = np.unique(symbolize(unique_pcs, symbols).astype(str), return_inverse=True)
+    label_cycles = np.bincount(label_index, weights=pc_cycles)
+    label_pcs = np.bincount(label_index)
+
+    total = pc_cycles.sum() or 1
+    order = np.argsort(-label_cycles, kind="stable")[:top]
+    return [
+        {
+            "symbol": str(labels[i]),
+            "cycles": int(label_cycles[i]),
+            "share": float(label_cycles[i] / total),
+            "pcs": int(label_pcs[i]),
+        }
+        for i in order
+    ]
+
+def basic_block_profile(pcs, cycles, symbols=None, top=None, instruction_bytes=4):
+    """
+    Compute the cycles spent in each basic block.
+
+    A block starts wherever the trace does not fall through to the next
+    instruction (a taken branch, jump or trap) and runs until the next such
+    discontinuity, so blocks are the dynamic straight-line runs of the trace.
+
+    Args:
+        pcs: PCs of the trace records
+        cycles: Cycles of the trace records
+        symbols: Tuple from read_elf_symbols, or None
+        top: Number of blocks to return (all if None)
+        instruction_bytes: Size of a fall-through step (4 without compressed instructions)
+
+    Returns:
+        List of {start, end, symbol, executions, cycles, share, instructions}
+        dictionaries, hottest first
+    """
+    pcs = np.asarray(pcs, dtype=np.int64)
+    cycles = np.asarray(cycles, dtype=np.int64)
+    if len(pcs) == 0:
+        return []
+
+    # Block boundaries: the first record and every record not following its predecessor
+    starts = np.flatnonzero(np.r_[True, pcs[1:] != pcs[:-1] + instruction_bytes])
+    ends = np.r_[starts[1:], len(pcs)] - 1
+    block_cycles = np.add.reduceat(cycles, starts)
+
+    # Aggregate dynamic blocks by their (start, end) PCs
+    keys = np.stack([pcs[starts], pcs[ends]], axis=1)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    total_cycles = np.bincount(inverse, weights=block_cycles)
+    executions = np.bincount(inverse)
+
+    total = cycles.sum() or 1
+    order = np.argsort(-total_cycles, kind="stable")[:top]
+    labels = symbolize(unique_keys[order, 0], symbols)
+    return [
+        {
+            "start": f"0x{unique_keys[i, 0]:08x}",
+            "end": f"0x{unique_keys[i, 1]:08x}",
+            "symbol": str(label),
+            "executions": int(executions[i]),
+            "cycles": int(total_cycles[i]),
+            "share": float(total_cycles[i] / total),
+            "instructions": int((unique_keys[i, 1] - unique_keys[i, 0]) // instruction_bytes + 1),
+        }
+        for i, label in zip(order, labels)
+    ]
+
+def find_program_elf(program):
+    """Return the ELF next to a program image (same name, .elf suffix), or None."""
+    if not program:
+        return None
+    elf = os.path.splitext(str(program))[0] + ".elf"
+    return elf if os.path.exists(elf) else None
+
+def analyze_pc_trace(output_dir, elf=None, top=20):
+    """
+    Produce the hotspot profiles of a simulation.
+
+    Args:
+        output_dir: Simulator working directory containing pc_trace.bin
+        elf: Benchmark ELF used to name the PCs, or None
+        top: Number of functions and blocks to report
+
+    Returns:
+        Dictionary with ``cycles``, ``flat`` and ``blocks``, or None if there is no trace
+    """
+    path = os.path.join(output_dir, PC_TRACE)
+    if not os.path.exists(path):
+        return None
+
+    pcs, cycles = read_pc_trace(path)
+    symbols = None
+    if elf is not None:
+        try:
+            symbols = read_elf_symbols(elf)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Cannot read symbols from {elf}: {e}")
+
+    return {
+        "cycles": int(cycles.sum()),
+        "flat": flat_profile(pcs, cycles, symbols, top),
+        "blocks": basic_block_profile(pcs, cycles, symbols, top),
+    }
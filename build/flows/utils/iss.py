@@ -0,0 +1,626 @@
+"""
+Fast RV32IM instruction-set simulator (ISS).
+
+The ISS runs the same program images as the universal testbench (hex, sparse
+hex, raw .bin or ELF) on a flat memory with the UART of the core's core.json,
+so benchmarks can be validated and their instruction counts measured before
+any RTL simulation runs.
+
+Instructions are decoded once: the first time a basic block is reached it is
+translated into a Python function and cached by its start address, so the
+dispatch loop costs one dictionary lookup per block instead of a decode per
+instruction. As the ISA allows, stores reach the instruction stream only
+after a FENCE.I, which flushes the block cache.
+
+The ISS has no trap model and no timing: ecall and ebreak always end the
+run, and the cycle CSRs read the number of retired instructions.
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import logging
+from array import array
+
+from .profiling import load_program_image
+from .testbench import DEFAULT_END_ON, DEFAULT_MEMORY_BYTES, core_memory_size, parse_size
+
+logger = logging.getLogger(__name__)
+
+# UART transmit register used when a core does not declare one
+DEFAULT_UART_BASE = 0x02000000
+
+# Instruction limit of a run when none is given
+DEFAULT_MAX_INSTRUCTIONS = 100_000_000
+
+# Longest basic block translated into one function
+MAX_BLOCK_INSTRUCTIONS = 64
+
+_MASK = 0xFFFFFFFF
+_SIGN = 0x80000000
+
+# Counter CSRs (user and machine, low and high halves) read as the retired instructions
+_COUNTER_CSRS = {0xC00: 0, 0xC01: 0, 0xC02: 0, 0xB00: 0, 0xB02: 0,
+                 0xC80: 32, 0xC81: 32, 0xC82: 32, 0xB80: 32, 0xB82: 32}
+
+_ELF_MAGIC = b"\x7fELF"
+_PT_LOAD = 1
+
+# Word accesses go through a 32-bit view of memory on little-endian hosts
+_WORD_TYPE = next(code for code in "IL" if array(code).itemsize == 4)
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+_BRANCH_CONDITIONS = {
+    0: "{a} == {b}",
+    1: "{a} != {b}",
+    4: "({a} ^ 0x80000000) < ({b} ^ 0x80000000)",
+    5: "({a} ^ 0x80000000) >= ({b} ^ 0x80000000)",
+    6: "{a} < {b}",
+    7: "{a} >= {b}",
+}
+
+_OP_EXPRESSIONS = {
+    (0, 0x00): "({a} + {b}) & 0xffffffff",
+    (0, 0x20): "({a} - {b}) & 0xffffffff",
+    (1, 0x00): "({a} << ({b} & 31)) & 0xffffffff",
+    (2, 0x00): "1 if ({a} ^ 0x80000000) < ({b} ^ 0x80000000) else 0",
+    (3, 0x00): "1 if {a} < {b} else 0",
+    (4, 0x00): "{a} ^ {b}",
+    (5, 0x00): "{a} >> ({b} & 31)",
+    (5, 0x20): "((({a} ^ 0x80000000) - 0x80000000) >> ({b} & 31)) & 0xffffffff",
+    (6, 0x00): "{a} | {b}",
+    (7, 0x00): "{a} & {b}",
+    # M extension
+    (0, 0x01): "({a} * {b}) & 0xffffffff",
+    (1, 0x01): "((({a} ^ 0x80000000) - 0x80000000) * (({b} ^ 0x80000000) - 0x80000000) >> 32) & 0xffffffff",
+    (2, 0x01): "((({a} ^ 0x80000000) - 0x80000000) * {b} >> 32) & 0xffffffff",
+    (3, 0x01): "({a} * {b}) >> 32",
+    (4, 0x01): "div({a}, {b})",
+    (5, 0x01): "divu({a}, {b})",
+    (6, 0x01): "rem({a}, {b})",
+    (7, 0x01): "remu({a}, {b})",
+}
+
+def _signed(value):
+    return (value ^ _SIGN) - _SIGN
+
+def _div(a, b):
+    if b == 0:
+        return _MASK
+    a, b = _signed(a), _signed(b)
+    quotient = abs(a) // abs(b)
+    return (-quotient if (a < 0) != (b < 0) else quotient) & _MASK
+
+def _divu(a, b):
+    return a // b if b else _MASK
+
+def _rem(a, b):
+    if b == 0:
+        return a
+    a, b = _signed(a), _signed(b)
+    remainder = abs(a) % abs(b)
+    return (-remainder if a < 0 else remainder) & _MASK
+
+def _remu(a, b):
+    return a % b if b else a
+
+class _Halt(Exception):
+    """Raised by translated code to end a run."""
+
+    def __init__(self, reason, pc, retired):
+        super().__init__(reason)
+        self.reason = reason
+        self.pc = pc
+        self.retired = retired
+
+def read_elf_segments(path):
+    """
+    Read the loadable segments of a 32-bit little-endian ELF file.
+
+    Args:
+        path: Path to the ELF file
+
+    Returns:
+        Tuple of (list of (load address, bytes), entry point); segments
+        include their zero-initialized tail (p_memsz beyond p_filesz)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != _ELF_MAGIC or data[4] != 1 or data[5] != 1:
+        raise ValueError(f"{path} is not a 32-bit little-endian ELF file")
+
+    entry, phoff = struct.unpack_from("<II", data, 0x18)
+    phentsize, phnum = struct.unpack_from("<HH", data, 0x2A)
+    segments = []
+    for index in range(phnum):
+        p_type, offset, _, paddr, filesz, memsz = struct.unpack_from("<IIIIII", data, phoff + index * phentsize)
+        if p_type == _PT_LOAD and memsz:
+            segments.append((paddr, data[offset:offset + filesz] + bytes(memsz - filesz)))
+    return segments, entry
+
+def core_uart_base(core_rtl):
+    """
+    Read the UART base address a core declares in its core.json.
+
+    Args:
+        core_rtl: Path to the core RTL directory
+
+    Returns:
+        UART transmit register address (DEFAULT_UART_BASE if none is declared)
+    """
+    try:
+        with open(os.path.join(core_rtl, "core.json"), 'r') as f:
+            address = (json.load(f).get('uart') or {}).get('base_address')
+    except (OSError, ValueError):
+        address = None
+    if address is None:
+        return DEFAULT_UART_BASE
+    return int(address, 0) if isinstance(address, str) else int(address)
+
+class InstructionSetSimulator:
+    """
+    RV32IM hart with a flat memory at address 0 and a transmit-only UART.
+
+    Args:
+        memory_size: Memory size in bytes (grown to fit loaded programs)
+        uart_base: Address of the UART transmit register
+        end_on: End-of-test conditions, as for the testbench; ecall and
+            ebreak always end the run since there is no trap model
+        tohost: Address whose store ends the run (enables "tohost")
+        trace: Record the retired PCs (see retired_pcs)
+    """
+
+    def __init__(self, memory_size=DEFAULT_MEMORY_BYTES, uart_base=DEFAULT_UART_BASE, end_on=None,
+                 tohost=None, trace=False):
+        self.memory = bytearray((memory_size + 3) & ~3)
+        self.uart_base = uart_base
+        if end_on is None:
+            end_on = list(DEFAULT_END_ON) + (["tohost"] if tohost is not None else [])
+        self.end_on = [end_on] if isinstance(end_on, str) else list(end_on)
+        self.tohost = None
+        if "tohost" in self.end_on:
+            if tohost is None:
+                raise ValueError("end_on includes 'tohost' but no tohost address is configured")
+            self.tohost = int(tohost, 0) if isinstance(tohost, str) else int(tohost)
+
+        self.x = [0] * 32
+        self.pc = 0
+        self.retired = 0
+        self.csrs = {}
+        self.uart = bytearray()
+        self.tohost_value = None
+        self.halt_reason = None
+
+        self._blocks = {}
+        self._boundary = None
+        self._words = None
+        self._trace = (array(_WORD_TYPE), array(_WORD_TYPE)) if trace else None
+
+    def load(self, path):
+        """
+        Load a program and point the PC at its entry.
+
+        ELF files are loaded by their segments and start at the ELF entry
+        point; hex and .bin images are placed at address 0 and start there.
+
+        Args:
+            path: ELF file, raw .bin image or $readmemh hex file
+
+        Returns:
+            Entry point
+        """
+        with open(path, 'rb') as f:
+            is_elf = f.read(4) == _ELF_MAGIC
+        if is_elf:
+            segments, entry = read_elf_segments(path)
+        else:
+            segments, entry = [(0, load_program_image(path))], 0
+
+        for address, data in segments:
+            self.write_memory(address, data)
+        self.pc = entry
+        return entry
+
+    def write_memory(self, address, data):
+        """Copy bytes into memory, growing it to fit."""
+        end = address + len(data)
+        if end > len(self.memory):
+            self._release_views()
+            self.memory.extend(bytes(((end + 3) & ~3) - len(self.memory)))
+        self.memory[address:end] = data
+        self._blocks.clear()
+
+    def _release_views(self):
+        self._blocks.clear()
+        if self._words is not None:
+            self._words.release()
+            self._words = None
+
+    def flush(self):
+        """Discard the translated blocks (FENCE.I)."""
+        self._blocks.clear()
+
+    def run(self, max_instructions=DEFAULT_MAX_INSTRUCTIONS, stop_at=None):
+        """
+        Run until an end-of-test condition, the instruction limit or a PC.
+
+        A run that stops at the limit or the PC can be resumed with another call.
+
+        Args:
+            max_instructions: Total retired instructions after which to stop
+            stop_at: PC at which to stop before executing its instruction, or None
+
+        Returns:
+            Halt reason ("ecall", "ebreak", "self_loop", "tohost", a fault,
+            "max_instructions" or "stop_pc")
+        """
+        if self._words is None and _LITTLE_ENDIAN:
+            self._words = memoryview(self.memory).cast(_WORD_TYPE)
+        if stop_at is not None and stop_at != self._boundary:
+            # Blocks must not run through the stop PC
+            self._boundary = stop_at
+            self._blocks.clear()
+        blocks = self._blocks
+        translate = self._translate
+        x = self.x
+        pc = self.pc
+        count = self.retired
+        trace = self._trace
+
+        try:
+            if trace is None:
+                while count < max_instructions and pc != stop_at:
+                    entry = blocks.get(pc) or translate(pc)
+                    if entry[2]:
+                        self.retired = count
+                    pc = entry[0](x)
+                    count += entry[1]
+            else:
+                starts, lengths = trace
+                while count < max_instructions and pc != stop_at:
+                    entry = blocks.get(pc) or translate(pc)
+                    if entry[2]:
+                        self.retired = count
+                    starts.append(pc)
+                    lengths.append(entry[1])
+                    pc = entry[0](x)
+                    count += entry[1]
+            reason = "stop_pc" if pc == stop_at else "max_instructions"
+        except _Halt as halt:
+            pc = halt.pc
+            count += halt.retired
+            reason = halt.reason
+            if trace is not None:
+                trace[1][-1] = halt.retired
+
+        self.pc = pc
+        self.retired = count
+        self.halt_reason = reason
+        return reason
+
+    def retired_pcs(self):
+        """
+        Return the PC of every retired instruction, in order.
+
+        Requires ``trace=True``.
+
+        Returns:
+            array of 32-bit PCs
+        """
+        if self._trace is None:
+            raise RuntimeError("The ISS was created without trace=True")
+        pcs = array(_WORD_TYPE)
+        for start, length in zip(*self._trace):
+            pcs.extend(range(start, start + 4 * length, 4))
+        return pcs
+
+    def take_block_trace(self):
+        """
+        Return the executed blocks recorded so far and start a new recording.
+
+        Requires ``trace=True``. Long runs can be consumed piecewise this way
+        without keeping the whole trace in memory.
+
+        Returns:
+            Tuple of (block start PCs, instructions retired in each block) arrays
+        """
+        if self._trace is None:
+            raise RuntimeError("The ISS was created without trace=True")
+        trace = self._trace
+        self._trace = (array(_WORD_TYPE), array(_WORD_TYPE))
+        return trace
+
+    # Slow paths called from translated code
+
+    def _load(self, address, size, pc, index):
+        address &= _MASK
+        if address + size <= len(self.memory):
+            return int.from_bytes(self.memory[address:address + size], "little")
+        if self.uart_base <= address < self.uart_base + 4:
+            return 0
+        raise _Halt("load_fault", pc, index)
+
+    def _store(self, address, value, size, pc, index):
+        address &= _MASK
+        value &= (1 << 8 * size) - 1
+        if address == self.tohost:
+            self.tohost_value = value
+            raise _Halt("tohost", pc, index + 1)
+        if address == self.uart_base:
+            self.uart.append(value & 0xFF)
+        elif address + size <= len(self.memory):
+            self.memory[address:address + size] = value.to_bytes(size, "little")
+        else:
+            raise _Halt("store_fault", pc, index)
+
+    def _halt(self, reason, pc, retired):
+        raise _Halt(reason, pc, retired)
+
+    def _csr(self, number, op, source, write, index):
+        if number in _COUNTER_CSRS:
+            return ((self.retired + index) >> _COUNTER_CSRS[number]) & _MASK
+        old = self.csrs.get(number, 0)
+        if write:
+            self.csrs[number] = (source, old | source, old & ~source & _MASK)[op - 1]
+        return old
+
+    # Translation
+
+    def _translate(self, start):
+        """Translate the basic block at start into a function and cache it."""
+        memory = self.memory
+        size = len(memory)
+        lines = []
+        sync = False
+        pc = start
+        index = 0
+        terminated = False
+
+        # Stores to these addresses inside memory take the slow path
+        special = [a for a in (self.tohost, self.uart_base) if a is not None and a < size]
+        guard = "".join(f" and a != {a}" for a in special)
+
+        def reg(r):
+            return f"x[{r}]" if r else "0"
+
+        def emit(rd, expression):
+            if rd:
+                lines.append(f"x[{rd}] = {expression}")
+
+        while index < MAX_BLOCK_INSTRUCTIONS:
+            if index and pc == self._boundary:
+                break
+            if pc & 3 or pc + 4 > size:
+                lines.append(f"halt('fetch_fault', {pc}, {index})")
+                terminated = True
+                break
+
+            word = int.from_bytes(memory[pc:pc + 4], "little")
+            opcode = word & 0x7F
+            rd = (word >> 7) & 31
+            funct3 = (word >> 12) & 7
+            a = reg((word >> 15) & 31)
+            b = reg((word >> 20) & 31)
+            imm = ((word >> 20) ^ 0x800) - 0x800
+            following = (pc + 4) & _MASK
+            retired = index + 1
+
+            if opcode == 0x13:  # OP-IMM
+                shamt = (word >> 20) & 31
+                uimm = imm & _MASK
+                if funct3 == 0:
+                    emit(rd, f"({a} + {uimm}) & 0xffffffff" if a != "0" else str(uimm))
+                elif funct3 == 2:
+                    emit(rd, f"1 if ({a} ^ 0x80000000) < {uimm ^ _SIGN} else 0")
+                elif funct3 == 3:
+                    emit(rd, f"1 if {a} < {uimm} else 0")
+                elif funct3 == 4:
+                    emit(rd, f"{a} ^ {uimm}")
+                elif funct3 == 6:
+                    emit(rd, f"{a} | {uimm}")
+                elif funct3 == 7:
+                    emit(rd, f"{a} & {uimm}")
+                elif funct3 == 1 and word >> 25 == 0:
+                    emit(rd, f"({a} << {shamt}) & 0xffffffff")
+                elif funct3 == 5 and word >> 25 == 0:
+                    emit(rd, f"{a} >> {shamt}")
+                elif funct3 == 5 and word >> 25 == 0x20:
+                    emit(rd, f"((({a} ^ 0x80000000) - 0x80000000) >> {shamt}) & 0xffffffff")
+                else:
+                    opcode = None
+            elif opcode == 0x33:  # OP
+                expression = _OP_EXPRESSIONS.get((funct3, word >> 25))
+                if expression is None:
+                    opcode = None
+                else:
+                    emit(rd, expression.format(a=a, b=b))
+            elif opcode == 0x37:  # LUI
+                emit(rd, str(word & 0xFFFFF000))
+            elif opcode == 0x17:  # AUIPC
+                emit(rd, str((pc + (word & 0xFFFFF000)) & _MASK))
+            elif opcode == 0x03:  # LOAD
+                lines.append(f"a = {a} + {imm & _MASK}")
+                if funct3 == 2:
+                    fast = "w[a >> 2]" if _LITTLE_ENDIAN else "int.from_bytes(m[a:a + 4], 'little')"
+                    emit(rd, f"{fast} if a < {size - 3} and not a & 3 else ld(a, 4, {pc}, {index})")
+                elif funct3 in (0, 4):
+                    value = f"(m[a] if a < {size} else ld(a, 1, {pc}, {index}))"
+                    emit(rd, f"(({value} ^ 0x80) - 0x80) & 0xffffffff" if funct3 == 0 else value)
+                elif funct3 in (1, 5):
+                    value = f"(m[a] | m[a + 1] << 8 if a < {size - 1} else ld(a, 2, {pc}, {index}))"
+                    emit(rd, f"(({value} ^ 0x8000) - 0x8000) & 0xffffffff" if funct3 == 1 else value)
+                else:
+                    lines.pop()
+                    opcode = None
+            elif opcode == 0x23:  # STORE
+                offset = ((((word >> 25) << 5) | ((word >> 7) & 31)) ^ 0x800) - 0x800
+                lines.append(f"a = {a} + {offset & _MASK}")
+                if funct3 == 2:
+                    fast = "w[a >> 2] = {b}" if _LITTLE_ENDIAN else "m[a:a + 4] = {b}.to_bytes(4, 'little')"
+                    lines.append(f"if a < {size - 3} and not a & 3{guard}: " + fast.format(b=b))
+                    lines.append(f"else: st(a, {b}, 4, {pc}, {index})")
+                elif funct3 == 0:
+                    lines.append(f"if a < {size}{guard}: m[a] = {b} & 0xff")
+                    lines.append(f"else: st(a, {b}, 1, {pc}, {index})")
+                elif funct3 == 1:
+                    lines.append(f"if a < {size - 1}{guard}: m[a] = {b} & 0xff; m[a + 1] = ({b} >> 8) & 0xff")
+                    lines.append(f"else: st(a, {b}, 2, {pc}, {index})")
+                else:
+                    lines.pop()
+                    opcode = None
+            elif opcode == 0x63 and funct3 in _BRANCH_CONDITIONS:  # BRANCH
+                offset = (((word >> 31) << 12) | (((word >> 7) & 1) << 11) |
+                          (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1))
+                target = (pc + (offset ^ 0x1000) - 0x1000) & _MASK
+                condition = _BRANCH_CONDITIONS[funct3].format(a=a, b=b)
+                if target == pc and "self_loop" in self.end_on:
+                    lines.append(f"if {condition}: halt('self_loop', {pc}, {retired})")
+                    lines.append(f"return {following}")
+                else:
+                    lines.append(f"return {target} if {condition} else {following}")
+                terminated = True
+            elif opcode == 0x6F:  # JAL
+                offset = (((word >> 31) << 20) | (((word >> 12) & 0xFF) << 12) |
+                          (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3FF) << 1))
+                target = (pc + (offset ^ 0x100000) - 0x100000) & _MASK
+                emit(rd, str(following))
+                if target == pc and "self_loop" in self.end_on:
+                    lines.append(f"halt('self_loop', {pc}, {retired})")
+                else:
+                    lines.append(f"return {target}")
+                terminated = True
+            elif opcode == 0x67 and funct3 == 0:  # JALR
+                lines.append(f"t = ({a} + {imm & _MASK}) & 0xfffffffe")
+                emit(rd, str(following))
+                lines.append("return t")
+                terminated = True
+            elif opcode == 0x0F:  # MISC-MEM
+                if funct3 == 1:
+                    lines.append("flush()")
+                    lines.append(f"return {following}")
+                    terminated = True
+            elif opcode == 0x73:  # SYSTEM
+                if word in (0x00000073, 0x00100073):
+                    reason = "ecall" if word == 0x00000073 else "ebreak"
+                    lines.append(f"halt('{reason}', {pc}, {retired})")
+                    terminated = True
+                elif word == 0x10500073:  # WFI
+                    pass
+                elif funct3 & 3:
+                    source = a if funct3 < 4 else str((word >> 15) & 31)
+                    # CSRRS/CSRRC with x0 (or a zero immediate) only read
+                    write = funct3 & 3 == 1 or ((word >> 15) & 31) != 0
+                    access = f"csr({word >> 20}, {funct3 & 3}, {source}, {write}, {index})"
+                    lines.append(f"x[{rd}] = {access}" if rd else access)
+                    lines.append(f"return {following}")
+                    sync = terminated = True
+                else:
+                    opcode = None
+            else:
+                opcode = None
+
+            if opcode is None:
+                lines.append(f"halt('illegal_instruction', {pc}, {index})")
+                terminated = True
+                break
+            pc = following
+            index += 1
+            if terminated:
+                break
+
+        if not terminated:
+            lines.append(f"return {pc}")
+
+        source = ("def block(x, m=m, w=w, ld=ld, st=st, halt=halt, csr=csr, flush=flush,"
+                  " div=div, divu=divu, rem=rem, remu=remu):\n    " + "\n    ".join(lines))
+        namespace = {
+            "m": memory, "w": self._words, "ld": self._load, "st": self._store,
+            "halt": self._halt, "csr": self._csr, "flush": self.flush,
+            "div": _div, "divu": _divu, "rem": _rem, "remu": _remu,
+        }
+        exec(compile(source, f"<block 0x{start:08x}>", "exec"), namespace)
+        entry = (namespace["block"], index, sync)
+        self._blocks[start] = entry
+        return entry
+
+def compare_retire_trace(reference, actual):
+    """
+    Find the first difference between a reference PC sequence and an RTL trace.
+
+    Consecutive repeats of a PC are collapsed in both sequences, so an RTL
+    trace with one record per cycle, or the run-length records of
+    ``pc_trace.bin`` (see hotspots.read_pc_trace), compare directly with the
+    retired PCs of the ISS. Only the common length is compared.
+
+    Args:
+        reference: Retired PCs from the ISS (see InstructionSetSimulator.retired_pcs)
+        actual: PCs from the RTL simulation
+
+    Returns:
+        None if the sequences agree, otherwise a dictionary with the
+        ``index`` of the first difference and the ``expected`` and ``actual`` PCs
+    """
+    import numpy as np
+
+    def collapse(pcs):
+        pcs = np.asarray(pcs, dtype=np.uint32)
+        return pcs[np.r_[True, pcs[1:] != pcs[:-1]]] if len(pcs) else pcs
+
+    reference, actual = collapse(reference), collapse(actual)
+    length = min(len(reference), len(actual))
+    mismatches = np.flatnonzero(reference[:length] != actual[:length])
+    if len(mismatches) == 0:
+        return None
+    index = int(mismatches[0])
+    return {"index": index, "expected": int(reference[index]), "actual": int(actual[index])}
+
+def run_iss(program, core_rtl=None, options=None):
+    """
+    Run a program on the ISS.
+
+    Recognized options (as for the testbench where they overlap):
+        max_instructions: Instruction limit (default: DEFAULT_MAX_INSTRUCTIONS)
+        end_on: End-of-test conditions (default: ecall and self_loop, plus
+            tohost if an address is given)
+        tohost: Address of the tohost mailbox (int or hex string)
+        memory_size: Minimum memory size (default: memory.size from core.json)
+
+    Args:
+        program: ELF file, raw .bin image or $readmemh hex file
+        core_rtl: Core RTL directory whose core.json gives the memory size and
+            UART address, or None for the defaults
+        options: Dictionary of options (may be None)
+
+    Returns:
+        Dictionary with ``instructions``, ``halt_reason``, ``pc``,
+        ``tohost_value``, ``uart`` output, ``seconds`` and ``mips``
+    """
+    options = options or {}
+    memory_size = core_memory_size(core_rtl) if core_rtl else DEFAULT_MEMORY_BYTES
+    if options.get('memory_size') is not None:
+        memory_size = max(memory_size, parse_size(options['memory_size']))
+
+    iss = InstructionSetSimulator(
+        memory_size=memory_size,
+        uart_base=core_uart_base(core_rtl) if core_rtl else DEFAULT_UART_BASE,
+        end_on=options.get('end_on'),
+        tohost=options.get('tohost')
+    )
+    iss.load(program)
+
+    started = time.perf_counter()
+    reason = iss.run(int(options.get('max_instructions', DEFAULT_MAX_INSTRUCTIONS)))
+    seconds = time.perf_counter() - started
+    logger.info(f"ISS ended on {reason} after {iss.retired} instructions in {seconds:.2f}s")
+
+    return {
+        "instructions": iss.retired,
+        "halt_reason": reason,
+        "pc": iss.pc,
+        "tohost_value": iss.tohost_value,
+        "uart": iss.uart.decode(errors="replace"),
+        "seconds": seconds,
+        "mips": iss.retired / seconds / 1e6 if seconds > 0 else 0.0,
+    }
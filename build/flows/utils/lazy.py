@@ -0,0 +1,61 @@
+"""
+Deferred Prefect decorators for fast startup of the flow entry points.
+
+Importing Prefect takes seconds, so flow modules decorate their stages with
+these wrappers instead of importing Prefect at module load. Prefect is
+imported the first time a decorated function is called or one of its
+attributes (e.g. ``submit``) is used. Without Prefect installed, the
+functions run as plain Python functions.
+"""
+
+import functools
+import importlib.util
+
+def prefect_available():
+    """Return True if Prefect can be imported (without importing it)."""
+    return importlib.util.find_spec("prefect") is not None
+
+class _Deferred:
+    """A function that is wrapped in a Prefect task or flow on first use."""
+
+    def __init__(self, kind, fn, options):
+        self._kind = kind
+        self._fn = fn
+        self._options = options
+        self._resolved = None
+        functools.update_wrapper(self, fn)
+
+    def _resolve(self):
+        if self._resolved is None:
+            if prefect_available():
+                import prefect
+                self._resolved = getattr(prefect, self._kind)(**self._options)(self._fn)
+            else:
+                self._resolved = self._fn
+        return self._resolved
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+def _decorator(kind, fn, options):
+    if fn is None:
+        return lambda f: _Deferred(kind, f, options)
+    return _Deferred(kind, fn, options)
+
+def task(fn=None, **options):
+    """Deferred equivalent of ``prefect.task``; accepts the same options."""
+    return _decorator("task", fn, options)
+
+def flow(fn=None, **options):
+    """Deferred equivalent of ``prefect.flow``; accepts the same options."""
+    return _decorator("flow", fn, options)
+
+def task_input_hash(*args, **kwargs):
+    """Deferred ``prefect.tasks.task_input_hash`` for use as a cache_key_fn."""
+    from prefect.tasks import task_input_hash as prefect_task_input_hash
+    return prefect_task_input_hash(*args, **kwargs)
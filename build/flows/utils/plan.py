@@ -0,0 +1,245 @@
+"""
+Validated, precomputed study plan.
+
+A StudyPlan is built once per configuration file content. It validates the
+configuration, derives the per-stage configuration slices and expands the
+core x benchmark x PDK matrix with a stable hash per cell, so that every
+stage consumes the same plan instead of re-reading and re-deriving the
+configuration.
+"""
+
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import (
+    DEFAULT_CONFIG, default_config_path, read_config_file,
+    get_software_config, get_simulation_config, get_synthesis_config, get_analysis_config
+)
+from .store import stage_key
+
+logger = logging.getLogger(__name__)
+
+# Simulators supported by the simulation flow
+SUPPORTED_SIMULATORS = ('verilator', 'vcs')
+
+# Plans already built in this process, by configuration content hash
+_plans = {}
+
+@dataclass(frozen=True)
+class PlanCell:
+    """One point of the study matrix."""
+    core: str
+    benchmark: str
+    pdk: Optional[str]
+    key: str
+
+def _string_list(config, name):
+    """
+    Return a configuration list of names, raising ValueError if it is malformed.
+
+    Entries may be names or mappings with a ``name`` key (as in the Kubernetes ConfigMap).
+    """
+    values = config.get(name) or []
+    if isinstance(values, list):
+        values = [value.get('name') if isinstance(value, dict) else value for value in values]
+    if isinstance(values, str) or not isinstance(values, list) or \
+            not all(isinstance(value, str) and value for value in values):
+        raise ValueError(f"'{name}' must be a list of names")
+    if len(set(values)) != len(values):
+        raise ValueError(f"'{name}' contains duplicates")
+    return list(values)
+
+class StudyPlan:
+    """
+    A validated study configuration with its expanded matrix.
+    """
+
+    def __init__(self, config, source=None, digest=None):
+        """
+        Validate a configuration and expand its matrix.
+
+        Args:
+            config: Configuration dictionary (see load_config); must not be modified afterwards
+            source: Path of the configuration file, if any
+            digest: Content hash of the configuration file, if any
+
+        Raises:
+            ValueError: If the configuration is invalid
+        """
+        if not isinstance(config, dict):
+            raise ValueError("Configuration must be a mapping")
+        self.config = config
+        self.source = source
+        self.digest = digest or stage_key("config", config=config)
+        self.shard_index = 0
+        self.shard_count = 1
+
+        self.cores = _string_list(config, 'cores')
+        self.benchmarks = _string_list(config, 'benchmarks')
+        self.pdks = _string_list(config, 'pdks')
+        self.cores_config = self._validate_cores_config(config.get('cores_config') or {})
+
+        self.software = get_software_config(config)
+        self.simulation = get_simulation_config(config)
+        self.synthesis = get_synthesis_config(config)
+        self.analysis = get_analysis_config(config)
+
+        self.cells = [
+            PlanCell(core, benchmark, pdk, self.cell_key(core, benchmark, pdk))
+            for core in self.cores
+            for benchmark in self.benchmarks
+            for pdk in (self.pdks or [None])
+        ]
+
+    def _validate_cores_config(self, cores_config):
+        if not isinstance(cores_config, dict):
+            raise ValueError("'cores_config' must be a mapping of core names")
+        for core, core_config in cores_config.items():
+            if core_config is None:
+                continue
+            if not isinstance(core_config, dict):
+                raise ValueError(f"cores_config.{core} must be a mapping")
+            simulator = core_config.get('simulator', 'verilator')
+            if simulator not in SUPPORTED_SIMULATORS:
+                raise ValueError(f"cores_config.{core}: unsupported simulator '{simulator}'")
+            if not isinstance(core_config.get('options') or {}, dict):
+                raise ValueError(f"cores_config.{core}.options must be a mapping")
+        names = dict.fromkeys(self.cores + list(cores_config))
+        return {core: dict(cores_config.get(core) or {}) for core in names}
+
+    def core_config(self, core):
+        """Return the configuration of a core (empty if it has none)."""
+        return self.cores_config.get(core, {})
+
+    def cell_key(self, core, benchmark, pdk=None):
+        """
+        Compute the stable hash of a matrix cell.
+
+        The hash covers the cell coordinates and the configuration that
+        applies to it, so it changes exactly when the cell's configuration does.
+
+        Args:
+            core: Name of the core
+            benchmark: Name of the benchmark
+            pdk: Name of the PDK, or None
+
+        Returns:
+            Hex digest string
+        """
+        return stage_key(
+            "cell",
+            core=core,
+            benchmark=benchmark,
+            pdk=pdk,
+            core_config=self.core_config(core),
+            software={k: v for k, v in self.software.items() if k not in ('benchmarks', 'target_cores')},
+            simulation={k: v for k, v in self.simulation.items() if k not in ('cores', 'output_dir', 'workers')},
+            synthesis={k: v for k, v in self.synthesis.items() if k not in ('cores', 'pdks')}
+        )
+
+    def select(self, core=None, benchmark=None, pdk=None):
+        """
+        Return the cells matching the given coordinates.
+
+        Args:
+            core: Core name to match, or None for any
+            benchmark: Benchmark name to match, or None for any
+            pdk: PDK name to match, or None for any
+
+        Returns:
+            List of PlanCell in matrix order
+        """
+        return [
+            cell for cell in self.cells
+            if (core is None or cell.core == core)
+            and (benchmark is None or cell.benchmark == benchmark)
+            and (pdk is None or cell.pdk == pdk)
+        ]
+
+    def pairs(self, *fields):
+        """
+        Return the distinct combinations of some cell fields, in matrix order.
+
+        Args:
+            *fields: PlanCell field names (e.g. "core", "benchmark")
+
+        Returns:
+            List of tuples; cells without a PDK are left out when "pdk" is requested
+        """
+        combinations = (tuple(getattr(cell, field) for field in fields) for cell in self.cells)
+        return [c for c in dict.fromkeys(combinations) if None not in c]
+
+    def shard(self, index, count):
+        """
+        Restrict the plan to one shard of the matrix.
+
+        Cells are grouped by (core, benchmark), so each simulation and the
+        power analyses that use its activity run in exactly one shard, and
+        the groups are dealt round-robin over the shards. Shards of the same
+        plan are disjoint and cover the matrix. The (core, PDK)
+        implementations several shards need are computed once through the
+        shared result store (see ResultStore.cached).
+
+        Args:
+            index: Shard index (0-based)
+            count: Number of shards
+
+        Returns:
+            A StudyPlan containing only this shard's cells
+        """
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index} of {count}")
+        groups = self.pairs("core", "benchmark")
+        mine = set(groups[index::count])
+        plan = copy.copy(self)
+        plan.cells = [cell for cell in self.cells if (cell.core, cell.benchmark) in mine]
+        plan.shard_index = index
+        plan.shard_count = count
+        return plan
+
+    def get(self, key, default=None):
+        """Look up a raw configuration value (for code that expects a dictionary)."""
+        return self.config.get(key, default)
+
+def load_study_plan(config_path=None):
+    """
+    Load the study plan of a configuration file.
+
+    Plans are cached per configuration content, so repeated calls (e.g. one
+    per flow) only stat the file.
+
+    Args:
+        config_path: Path to configuration file (default: configs/default.yaml)
+
+    Returns:
+        StudyPlan
+    """
+    config_path = config_path or default_config_path()
+    if config_path is None:
+        config, digest = DEFAULT_CONFIG, None
+    else:
+        config, digest = read_config_file(config_path)
+
+    digest = digest or stage_key("config", config=config)
+    plan = _plans.get(digest)
+    if plan is None:
+        plan = _plans[digest] = StudyPlan(config, source=config_path, digest=digest)
+        logger.info(f"Study plan {digest[:12]}: {len(plan.cores)} cores, {len(plan.benchmarks)} benchmarks, "
+                    f"{len(plan.pdks)} PDKs, {len(plan.cells)} cells")
+    return plan
+
+def as_study_plan(study_params):
+    """
+    Return the study plan for stage parameters.
+
+    Args:
+        study_params: A StudyPlan, or a configuration dictionary
+
+    Returns:
+        StudyPlan
+    """
+    if isinstance(study_params, StudyPlan):
+        return study_params
+    return StudyPlan(study_params or {})
@@ -0,0 +1,189 @@
+"""
+Decoder for the testbench profiling port.
+
+Benchmarks built with ``-DPROFILE_IDS`` (see design/software/common/profiling.h)
+mark regions with single stores of a region ID to the profiling port. With the
+``profile`` simulator option, the testbench logs each store with its cycle to
+``profile.log``; this module turns that log into a per-region cycle breakdown.
+"""
+
+import os
+import logging
+from array import array
+
+from .testbench import BINARY_IMAGE_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+# Name of the event log written by the testbench (in the simulator working directory)
+PROFILE_LOG = "profile.log"
+
+# Event kinds logged by the testbench
+REGION_START = 0
+REGION_END = 1
+
+# Longest region name recovered from the program image
+MAX_REGION_NAME = 64
+
+# Array typecode of a 32-bit word
+_WORD_TYPE = next(code for code in "IL" if array(code).itemsize == 4)
+
+def read_profile_events(path):
+    """
+    Read the profiling events logged by the testbench.
+
+    Args:
+        path: Path to profile.log
+
+    Returns:
+        List of (cycle, kind, region id) tuples in log order
+    """
+    with open(path, 'r') as f:
+        tokens = f.read().split()
+    return [
+        (int(cycle), int(kind), int(region, 16))
+        for cycle, kind, region in zip(tokens[0::3], tokens[1::3], tokens[2::3])
+        if 'x' not in region.lower()
+    ]
+
+def load_program_image(path):
+    """
+    Load a program image as the bytes it places in memory, starting at address 0.
+
+    Args:
+        path: Raw .bin image or $readmemh hex file (possibly with @address records)
+
+    Returns:
+        bytearray of memory contents
+    """
+    path = str(path)
+    if path.endswith(BINARY_IMAGE_SUFFIXES):
+        with open(path, 'rb') as f:
+            return bytearray(f.read())
+
+    with open(path, 'r') as f:
+        tokens = f.read().split()
+
+    # Convert each run of words between @address records in one step
+    image = bytearray()
+    address = 0
+    run = []
+    for token in tokens + ["@"]:
+        if not token.startswith("@"):
+            run.append(token.zfill(8))
+            continue
+        if run:
+            data = _swap_words(bytes.fromhex("".join(run)))
+            end = address * 4 + len(data)
+            if len(image) < end:
+                image.extend(bytes(end - len(image)))
+            image[address * 4:end] = data
+            address += len(run)
+            run = []
+        if len(token) > 1:
+            address = int(token[1:], 16)
+    return image
+
+def _swap_words(data):
+    """Reverse the bytes of every 32-bit word (hex file order to memory order)."""
+    words = array(_WORD_TYPE, data)
+    words.byteswap()
+    return words.tobytes()
+
+def region_name(image, region):
+    """
+    Recover the name of a region from the program image.
+
+    The region ID is the address of the name string passed to PROFILE_START;
+    IDs that do not point to a string are reported as ``region_<id>``.
+
+    Args:
+        image: Program image (see load_program_image), or None
+        region: Region ID
+
+    Returns:
+        Region name
+    """
+    if image is not None and 0 <= region < len(image):
+        end = image.find(b"\0", region, region + MAX_REGION_NAME + 1)
+        name = bytes(image[region:end]) if end > region else b""
+        if name and all(32 <= c < 127 for c in name):
+            return name.decode("ascii")
+    return f"region_{region}"
+
+def region_breakdown(events, names=None):
+    """
+    Compute the cycles spent in each region.
+
+    Regions may nest. Inclusive cycles count everything between a start and
+    its matching end; self cycles exclude nested regions. A region left open
+    when an enclosing region ends is discarded.
+
+    Args:
+        events: Iterable of (cycle, kind, region id) (see read_profile_events)
+        names: Optional mapping of region ID to name
+
+    Returns:
+        Tuple of (dictionary of region name -> {calls, cycles, self_cycles},
+        number of unmatched end events)
+    """
+    names = names or {}
+    regions = {}
+    stack = []  # [region, start cycle, cycles of nested regions]
+    unmatched = 0
+
+    for cycle, kind, region in events:
+        if kind == REGION_START:
+            stack.append([region, cycle, 0])
+            continue
+
+        depth = len(stack) - 1
+        while depth >= 0 and stack[depth][0] != region:
+            depth -= 1
+        if depth < 0:
+            unmatched += 1
+            continue
+
+        _, start, nested = stack[depth]
+        del stack[depth:]
+        elapsed = cycle - start
+        if stack:
+            stack[-1][2] += elapsed
+
+        stats = regions.setdefault(names.get(region, f"region_{region}"),
+                                   {"calls": 0, "cycles": 0, "self_cycles": 0})
+        stats["calls"] += 1
+        stats["cycles"] += elapsed
+        stats["self_cycles"] += elapsed - nested
+
+    return regions, unmatched
+
+def decode_profile(output_dir, program=None, total_cycles=None):
+    """
+    Decode the profiling log of a simulation into a per-region breakdown.
+
+    Args:
+        output_dir: Simulator working directory containing profile.log
+        program: Program image used to name the regions, or None
+        total_cycles: Total simulated cycles, to report each region's share
+
+    Returns:
+        Dictionary with ``regions`` (name -> calls, cycles, self_cycles and
+        share) and ``unmatched`` end events, or None if there is no log
+    """
+    path = os.path.join(output_dir, PROFILE_LOG)
+    if not os.path.exists(path):
+        return None
+
+    events = read_profile_events(path)
+    image = load_program_image(program) if program and os.path.exists(str(program)) else None
+    names = {region: region_name(image, region) for region in {event[2] for event in events}}
+    regions, unmatched = region_breakdown(events, names)
+
+    if total_cycles:
+        for stats in regions.values():
+            stats["share"] = stats["cycles"] / total_cycles
+    if unmatched:
+        logger.warning(f"{unmatched} profiling region end(s) without a start in {path}")
+
+    return {"regions": regions, "unmatched": unmatched}
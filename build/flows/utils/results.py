@@ -0,0 +1,164 @@
+"""
+Columnar PPA results table.
+
+Simulation and synthesis results are flattened into a tidy pandas frame
+with one row per (core, pdk, benchmark, run), so metrics are derived and
+aggregated with vectorized column operations and persisted as Parquet or
+Feather.
+"""
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns identifying a row
+KEY_COLUMNS = ["core", "pdk", "benchmark", "run"]
+
+# Metric columns and the result fields they are read from
+SIM_METRICS = {
+    "cycles": "cycles",
+    "instructions": "instructions",
+}
+PR_METRICS = {
+    "dynamic_power": "dynamic_power",
+    "leakage_power": "leakage_power",
+    "total_power": "total_power",
+    "logic_area": "logic_area",
+    "memory_area": "memory_area",
+    "total_area": "total_area",
+    "utilization": "utilization",
+}
+
+# Supported on-disk table formats and their file extensions
+TABLE_FORMATS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+def build_results_table(sim_results, synth_results, run="default"):
+    """
+    Flatten nested simulation and synthesis results into a tidy table.
+
+    Benchmarks that were simulated but not implemented get one row with an
+    empty ``pdk`` and missing power/area columns.
+
+    Args:
+        sim_results: Dictionary of simulation results (core -> benchmark -> result)
+        synth_results: Dictionary of synthesis results (core -> pdk -> benchmark -> result)
+        run: Identifier of the study run
+
+    Returns:
+        pandas DataFrame with KEY_COLUMNS, the metric columns and derived metrics
+    """
+    rows = []
+    for core, benchmarks in (sim_results or {}).items():
+        pdks = (synth_results or {}).get(core) or {None: {}}
+        for benchmark, sim in benchmarks.items():
+            sim_values = [sim.get(field) for field in SIM_METRICS.values()]
+            for pdk, pdk_results in pdks.items():
+                pr = (pdk_results.get(benchmark) or {}).get('place_and_route', {})
+                rows.append([core, pdk, benchmark, run] + sim_values +
+                            [pr.get(field) for field in PR_METRICS.values()])
+
+    columns = KEY_COLUMNS + list(SIM_METRICS) + list(PR_METRICS)
+    table = pd.DataFrame(rows, columns=columns)
+    for column in columns[len(KEY_COLUMNS):]:
+        table[column] = pd.to_numeric(table[column], errors="coerce")
+    for column in KEY_COLUMNS:
+        table[column] = table[column].astype("string")
+    return add_derived_metrics(table)
+
+def add_derived_metrics(table):
+    """
+    Add derived metric columns to a results table.
+
+    Args:
+        table: Results table
+
+    Returns:
+        The table with cpi, ipc and power_density columns
+    """
+    instructions = table["instructions"].clip(lower=1)
+    table["cpi"] = table["cycles"] / instructions
+    table["ipc"] = table["instructions"] / table["cycles"].replace(0, np.nan)
+    table["power_density"] = table["total_power"] / table["total_area"].replace(0, np.nan)
+    return table
+
+def summarize_results(table, by=("core", "pdk")):
+    """
+    Aggregate a results table per group.
+
+    Args:
+        table: Results table
+        by: Columns to group by
+
+    Returns:
+        DataFrame with the mean CPI, power and area and the benchmark count per group
+    """
+    return table.groupby(list(by), dropna=False, observed=True).agg(
+        benchmarks=("benchmark", "nunique"),
+        cpi=("cpi", "mean"),
+        dynamic_power=("dynamic_power", "mean"),
+        total_power=("total_power", "mean"),
+        total_area=("total_area", "mean"),
+    ).reset_index()
+
+def save_results_table(table, path, fmt="parquet"):
+    """
+    Write a results table to disk.
+
+    Args:
+        table: Results table
+        path: Output path without extension
+        fmt: "parquet" or "feather"
+
+    Returns:
+        Path of the written file
+    """
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unsupported table format: {fmt}")
+    path = path + TABLE_FORMATS[fmt]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        table.to_parquet(tmp_path, index=False)
+    else:
+        table.reset_index(drop=True).to_feather(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def load_results_table(path):
+    """
+    Read a results table written by save_results_table.
+
+    Args:
+        path: Path to a .parquet or .feather file
+
+    Returns:
+        pandas DataFrame
+    """
+    if path.endswith(TABLE_FORMATS["feather"]):
+        return pd.read_feather(path)
+    return pd.read_parquet(path)
+
+def append_results_table(table, path, fmt="parquet"):
+    """
+    Add the rows of a run to a results table on disk, replacing earlier rows of the same run.
+
+    Args:
+        table: Results table of one or more runs
+        path: Output path without extension
+        fmt: "parquet" or "feather"
+
+    Returns:
+        Path of the written file
+    """
+    existing_path = path + TABLE_FORMATS.get(fmt, "")
+    if os.path.exists(existing_path):
+        existing = load_results_table(existing_path)
+        existing = existing[~existing["run"].isin(table["run"].unique())]
+        table = pd.concat([existing, table], ignore_index=True)
+    return save_results_table(table, path, fmt)
@@ -0,0 +1,386 @@
+"""
+Sampled RTL simulation with basic-block vectors (SimPoint-style).
+
+A run is split into fixed instruction intervals. A fast functional run on
+the ISS, or a retire trace, gives the basic-block vector (BBV) of every
+interval: the instructions it executed in each basic block. Intervals with
+similar vectors run the same code, so k-means clustering of the vectors
+picks a few representative intervals and the share of the run each one
+stands for. Only those intervals are simulated in RTL (with the testbench
+sampling window), and the CPI of the whole run is extrapolated from them
+with a confidence bound.
+"""
+
+import logging
+from statistics import NormalDist
+import numpy as np
+
+from .iss import DEFAULT_MAX_INSTRUCTIONS
+
+logger = logging.getLogger(__name__)
+
+# Instructions per interval
+DEFAULT_INTERVAL = 100_000
+
+# Largest number of clusters tried
+DEFAULT_MAX_CLUSTERS = 10
+
+# Dimensions of the random projection applied to the BBVs before clustering
+PROJECTED_DIMENSIONS = 15
+
+# Fraction of the BIC range the chosen clustering must reach (smallest such k wins)
+BIC_THRESHOLD = 0.9
+
+# Opcodes whose instructions write rd (plus CSR accesses in SYSTEM)
+_RD_OPCODES = (0x03, 0x13, 0x17, 0x33, 0x37, 0x67, 0x6F)
+
+def _register_writes(words):
+    """
+    Flag the instructions the testbench counts as retired (writes to x1-x31).
+
+    Args:
+        words: Array of instruction words
+
+    Returns:
+        Boolean array
+    """
+    words = np.asarray(words, dtype=np.uint32)
+    opcode = words & 0x7F
+    writes = np.isin(opcode, _RD_OPCODES) | ((opcode == 0x73) & ((words >> 12) & 7 != 0))
+    return writes & ((words >> 7) & 31 != 0)
+
+def count_register_writes(memory, starts, lengths, cache=None):
+    """
+    Count the instructions the testbench counts as retired in an ISS block trace.
+
+    Args:
+        memory: ISS memory the blocks were executed from
+        starts: Start PCs of the executed blocks (see InstructionSetSimulator.take_block_trace)
+        lengths: Instructions retired in each block
+        cache: Optional dictionary reused across calls to decode each block once
+
+    Returns:
+        Number of instructions that wrote a register other than x0
+    """
+    cache = {} if cache is None else cache
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    keys, executions = np.unique(starts << 8 | lengths, return_counts=True)
+    for key in keys.tolist():
+        if key not in cache:
+            start, length = key >> 8, key & 0xFF
+            cache[key] = int(_register_writes(
+                np.frombuffer(memory, dtype="<u4", count=length, offset=start)).sum())
+    return int(np.dot([cache[key] for key in keys.tolist()], executions))
+
+def _assemble(interval, block_interval, block_pcs, block_instructions, instructions, writes):
+    """Build the BBV dictionary from per-execution (interval, pc, instructions) records."""
+    blocks, columns = np.unique(block_pcs, return_inverse=True)
+    vectors = np.zeros((len(instructions), len(blocks)))
+    np.add.at(vectors, (block_interval, columns.reshape(-1)), block_instructions)
+    return {
+        "interval": interval,
+        "blocks": blocks,
+        "vectors": vectors,
+        "instructions": np.asarray(instructions, dtype=np.int64),
+        "writes": None if writes is None else np.asarray(writes, dtype=np.int64),
+    }
+
+def collect_bbvs(iss, interval=DEFAULT_INTERVAL, max_instructions=None):
+    """
+    Run a program on the ISS and collect the BBV of every interval.
+
+    Intervals end at the first block boundary after each multiple of
+    ``interval`` instructions, so their lengths vary by up to one block;
+    the actual lengths are returned.
+
+    Args:
+        iss: InstructionSetSimulator created with ``trace=True``, with the program loaded
+        interval: Instructions per interval
+        max_instructions: Instruction limit of the run (default: the ISS default)
+
+    Returns:
+        Dictionary with the ``interval`` size, the ``blocks`` (start PCs),
+        ``vectors`` (intervals x blocks instruction counts), and the
+        ``instructions`` and testbench-counted ``writes`` of every interval
+    """
+    max_instructions = max_instructions or DEFAULT_MAX_INSTRUCTIONS
+    iss.take_block_trace()
+    block_writes = {}
+    records = ([], [], [])
+    instructions = []
+    writes = []
+
+    first = iss.retired
+    reason = "max_instructions"
+    while reason == "max_instructions" and iss.retired < max_instructions:
+        before = iss.retired
+        reason = iss.run(min(first + (len(instructions) + 1) * interval, max_instructions))
+        starts, lengths = (np.frombuffer(a, dtype=np.uint32).astype(np.int64) for a in iss.take_block_trace())
+        if len(starts) == 0:
+            break
+
+        writes.append(count_register_writes(iss.memory, starts, lengths, block_writes))
+
+        records[0].append(np.full(len(starts), len(instructions)))
+        records[1].append(starts)
+        records[2].append(lengths)
+        instructions.append(iss.retired - before)
+
+    if not instructions:
+        raise ValueError("The ISS retired no instructions")
+    logger.info(f"Collected {len(instructions)} BBVs of {interval} instructions (run ended on {reason})")
+    return _assemble(interval, *(np.concatenate(r) for r in records), instructions, writes)
+
+def bbvs_from_pcs(pcs, interval=DEFAULT_INTERVAL, image=None):
+    """
+    Collect the BBV of every interval from a retire trace.
+
+    Blocks are the maximal runs of consecutive PCs, split at interval
+    boundaries.
+
+    Args:
+        pcs: PC of every retired instruction, in order (e.g. from
+            InstructionSetSimulator.retired_pcs or a collapsed RTL trace)
+        interval: Instructions per interval
+        image: Program memory image (bytes from address 0) to count the
+            testbench-counted ``writes`` of each interval, or None
+
+    Returns:
+        Dictionary as for collect_bbvs (``writes`` is None without an image)
+    """
+    pcs = np.asarray(pcs, dtype=np.int64)
+    if len(pcs) == 0:
+        raise ValueError("The retire trace is empty")
+    position = np.arange(len(pcs))
+    intervals = position // interval
+    starts = np.flatnonzero(np.r_[True, (pcs[1:] != pcs[:-1] + 4) | (intervals[1:] != intervals[:-1])])
+    lengths = np.diff(np.r_[starts, len(pcs)])
+    instructions = np.bincount(intervals)
+
+    writes = None
+    if image is not None:
+        image = bytes(image) + bytes(-len(image) % 4)
+        words = np.frombuffer(image, dtype="<u4")
+        inside = pcs // 4 < len(words)
+        flags = np.zeros(len(pcs), dtype=bool)
+        flags[inside] = _register_writes(words[pcs[inside] // 4])
+        writes = np.bincount(intervals, weights=flags, minlength=len(instructions)).astype(np.int64)
+
+    return _assemble(interval, intervals[starts], pcs[starts], lengths, instructions, writes)
+
+def project(vectors, dimensions=PROJECTED_DIMENSIONS, seed=0):
+    """
+    Normalize BBVs to instruction shares and reduce them by random projection.
+
+    Args:
+        vectors: Intervals x blocks matrix
+        dimensions: Number of projected dimensions
+        seed: Seed of the projection matrix
+
+    Returns:
+        Intervals x dimensions matrix (normalized vectors if they are already small)
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    normalized = vectors / np.maximum(vectors.sum(axis=1, keepdims=True), 1)
+    if normalized.shape[1] <= dimensions:
+        return normalized
+    matrix = np.random.default_rng(seed).uniform(-1, 1, (normalized.shape[1], dimensions))
+    return normalized @ matrix
+
+def kmeans(data, k, seed=0, iterations=100):
+    """
+    Cluster points with k-means (k-means++ initialization, Lloyd iterations).
+
+    Args:
+        data: Points x dimensions matrix
+        k: Number of clusters (fewer if there are fewer distinct points)
+        seed: Seed of the initialization
+        iterations: Largest number of iterations
+
+    Returns:
+        Tuple of (cluster label of each point, centroids)
+    """
+    data = np.asarray(data, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    centroids = data[[rng.integers(len(data))]]
+    while len(centroids) < k:
+        distances = ((data[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        if distances.sum() == 0:
+            break
+        centroids = np.vstack([centroids, data[rng.choice(len(data), p=distances / distances.sum())]])
+
+    for _ in range(iterations):
+        labels = ((data[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        updated = np.array([data[labels == c].mean(axis=0) if np.any(labels == c) else centroids[c]
+                            for c in range(len(centroids))])
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    labels = ((data[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+    return labels, centroids
+
+def bic(data, labels, centroids):
+    """
+    Score a clustering with the Bayesian information criterion (higher is better).
+
+    Uses the spherical Gaussian model of Pelleg and Moore's X-means, as SimPoint does.
+
+    Args:
+        data: Points x dimensions matrix
+        labels: Cluster label of each point
+        centroids: Cluster centroids
+
+    Returns:
+        BIC score
+    """
+    points, dimensions = data.shape
+    k = len(centroids)
+    if points <= k:
+        return -np.inf
+    variance = max(((data - centroids[labels]) ** 2).sum() / (dimensions * (points - k)), 1e-12)
+    sizes = np.bincount(labels, minlength=k)
+    sizes = sizes[sizes > 0].astype(np.float64)
+    likelihood = (sizes * np.log(sizes) - sizes * np.log(points)
+                  - sizes * dimensions / 2 * np.log(2 * np.pi * variance)
+                  - (sizes - k) / 2).sum()
+    parameters = (k - 1) + dimensions * k + 1
+    return likelihood - parameters / 2 * np.log(points)
+
+def choose_simpoints(bbvs, max_clusters=DEFAULT_MAX_CLUSTERS, samples_per_cluster=1, seed=0,
+                     dimensions=PROJECTED_DIMENSIONS, threshold=BIC_THRESHOLD):
+    """
+    Choose the representative intervals of a run.
+
+    Every k up to max_clusters is tried; the smallest k whose BIC reaches
+    ``threshold`` of the range of scores is kept. Each cluster is sampled by
+    the interval closest to its centroid, plus random members when more than
+    one sample per cluster is requested (which gives the error bound of
+    extrapolate_cpi).
+
+    Args:
+        bbvs: BBVs from collect_bbvs or bbvs_from_pcs
+        max_clusters: Largest number of clusters tried
+        samples_per_cluster: Intervals simulated per cluster
+        seed: Seed of the projection, the clustering and the random samples
+        dimensions: Number of projected dimensions
+        threshold: Fraction of the BIC range the chosen clustering must reach
+
+    Returns:
+        Dictionary with the ``interval`` size, total ``instructions``, the
+        ``labels`` of every interval, the ``clusters`` (intervals, instructions,
+        weight, sampled intervals) and the ``points`` to simulate, each with
+        its interval, cluster, instructions and start/stop positions in
+        instructions (``start``/``stop``) and testbench-counted writes
+        (``writes_start``/``writes_stop``, when known)
+    """
+    data = project(bbvs["vectors"], dimensions, seed)
+    if len(data) == 0:
+        raise ValueError("No intervals to cluster")
+
+    candidates = []
+    for k in range(1, min(max_clusters, len(data)) + 1):
+        labels, centroids = kmeans(data, k, seed)
+        candidates.append((bic(data, labels, centroids), labels, centroids))
+    scores = [score for score, _, _ in candidates]
+    finite = [score for score in scores if np.isfinite(score)]
+    cutoff = min(finite) + threshold * (max(finite) - min(finite)) if finite else -np.inf
+    _, labels, centroids = next(c for c in candidates if c[0] >= cutoff)
+
+    instructions = bbvs["instructions"]
+    starts = np.r_[0, np.cumsum(instructions)]
+    writes = bbvs.get("writes")
+    write_starts = None if writes is None else np.r_[0, np.cumsum(writes)]
+    rng = np.random.default_rng(seed)
+
+    clusters = []
+    points = []
+    for cluster in np.unique(labels):
+        members = np.flatnonzero(labels == cluster)
+        distances = ((data[members] - centroids[cluster]) ** 2).sum(axis=1)
+        ordered = members[np.argsort(distances, kind="stable")]
+        extra = min(samples_per_cluster, len(members)) - 1
+        samples = [int(ordered[0])] + sorted(int(i) for i in rng.choice(ordered[1:], extra, replace=False))
+        clusters.append({
+            "cluster": int(cluster),
+            "intervals": len(members),
+            "instructions": int(instructions[members].sum()),
+            "weight": float(instructions[members].sum() / instructions.sum()),
+            "samples": samples,
+        })
+        for index in samples:
+            point = {
+                "interval": index,
+                "cluster": int(cluster),
+                "instructions": int(instructions[index]),
+                "start": int(starts[index]),
+                "stop": int(starts[index + 1]),
+            }
+            if write_starts is not None:
+                point["writes_start"] = int(write_starts[index])
+                point["writes_stop"] = int(write_starts[index + 1])
+            points.append(point)
+
+    logger.info(f"Chose {len(points)} of {len(data)} intervals in {len(clusters)} cluster(s)")
+    return {
+        "interval": bbvs["interval"],
+        "instructions": int(instructions.sum()),
+        "labels": [int(label) for label in labels],
+        "clusters": clusters,
+        "points": sorted(points, key=lambda point: point["interval"]),
+    }
+
+def extrapolate_cpi(selection, cycles, confidence=0.95):
+    """
+    Estimate the CPI of the whole run from the simulated intervals.
+
+    The estimate is a stratified mean: each cluster contributes the mean
+    CPI of its samples, weighted by its share of the instructions. The
+    standard error combines the within-cluster variances of the samples;
+    clusters with a single sample use the variance pooled over the others.
+    Without any cluster of two or more samples, no bound can be given.
+
+    Args:
+        selection: Result of choose_simpoints
+        cycles: Mapping of interval index to the cycles measured for it in RTL
+        confidence: Confidence level of the reported bound
+
+    Returns:
+        Dictionary with the ``cpi`` and total ``cycles`` estimates,
+        ``instructions``, ``stderr``, ``error_bound`` (half-width of the
+        confidence interval on the CPI, None if unknown), ``relative_error``,
+        ``confidence`` and the per-cluster ``clusters`` CPIs
+    """
+    sizes = {point["interval"]: point["instructions"] for point in selection["points"]}
+    estimates = []
+    for cluster in selection["clusters"]:
+        measured = [cycles[i] / sizes[i] for i in cluster["samples"] if i in cycles and sizes[i]]
+        if not measured:
+            raise ValueError(f"No measurement for cluster {cluster['cluster']}")
+        estimates.append((cluster, np.mean(measured),
+                          np.var(measured, ddof=1) if len(measured) > 1 else None, len(measured)))
+
+    cpi = float(sum(cluster["weight"] * mean for cluster, mean, _, _ in estimates))
+
+    known = [(variance, n) for _, _, variance, n in estimates if variance is not None]
+    stderr = None
+    if known:
+        pooled = sum(variance * (n - 1) for variance, n in known) / sum(n - 1 for _, n in known)
+        stderr = 0.0
+        for cluster, _, variance, n in estimates:
+            variance = pooled if variance is None else variance
+            correction = 1 - n / cluster["intervals"]
+            stderr += cluster["weight"] ** 2 * variance / n * correction
+        stderr = float(np.sqrt(stderr))
+
+    bound = None if stderr is None else NormalDist().inv_cdf((1 + confidence) / 2) * stderr
+    return {
+        "cpi": cpi,
+        "cycles": cpi * selection["instructions"],
+        "instructions": selection["instructions"],
+        "stderr": stderr,
+        "error_bound": bound,
+        "relative_error": None if bound is None or cpi == 0 else bound / cpi,
+        "confidence": confidence,
+        "clusters": {cluster["cluster"]: float(mean) for cluster, mean, _, _ in estimates},
+    }
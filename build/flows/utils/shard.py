@@ -0,0 +1,124 @@
+"""
+Sharded execution of a PPA study.
+
+A study plan is split into disjoint shards (see StudyPlan.shard) that run as
+independent processes or pods sharing a directory. Each shard writes its
+partial simulation and synthesis results to that directory, and a final
+merge step combines them into the results of the whole study.
+"""
+
+import os
+import json
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+def shard_result_path(shard_dir, index, count):
+    """
+    Return the path of the partial results of a shard.
+
+    Args:
+        shard_dir: Directory shared by the shards
+        index: Shard index (0-based)
+        count: Number of shards
+
+    Returns:
+        Path of the shard's JSON file
+    """
+    return os.path.join(shard_dir, f"shard-{index}-of-{count}.json")
+
+def write_shard_results(shard_dir, plan, sim_results, synth_results):
+    """
+    Write the partial results of a sharded plan atomically.
+
+    Args:
+        shard_dir: Directory shared by the shards
+        plan: StudyPlan restricted to one shard
+        sim_results: Simulation results of the shard
+        synth_results: Synthesis results of the shard
+
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    path = shard_result_path(shard_dir, plan.shard_index, plan.shard_count)
+    payload = {
+        'plan': plan.digest,
+        'index': plan.shard_index,
+        'count': plan.shard_count,
+        'cells': len(plan.cells),
+        'sim_results': sim_results,
+        'synth_results': synth_results
+    }
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=shard_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    logger.info(f"Wrote results of shard {plan.shard_index + 1}/{plan.shard_count} to {path}")
+    return path
+
+def _merge(target, source):
+    """Recursively merge nested result dictionaries, in place."""
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+def _ordered(results, *orders):
+    """Reorder nested result dictionaries by the plan's core/PDK/benchmark order."""
+    if not orders or not isinstance(results, dict):
+        return results
+    order = orders[0]
+    keys = [key for key in order if key in results] + [key for key in results if key not in order]
+    return {key: _ordered(results[key], *orders[1:]) for key in keys}
+
+def merge_shard_results(shard_dir, plan, count):
+    """
+    Combine the partial results of every shard of a plan.
+
+    Args:
+        shard_dir: Directory shared by the shards
+        plan: StudyPlan of the whole study
+        count: Number of shards
+
+    Returns:
+        Tuple of (simulation results, synthesis results)
+
+    Raises:
+        RuntimeError: If a shard is missing or belongs to another plan
+    """
+    sim_results = {}
+    synth_results = {}
+    missing = []
+
+    for index in range(count):
+        path = shard_result_path(shard_dir, index, count)
+        try:
+            with open(path, 'r') as f:
+                shard = json.load(f)
+        except (OSError, ValueError):
+            missing.append(index)
+            continue
+
+        if shard.get('plan') != plan.digest:
+            raise RuntimeError(f"{path} was produced by a different study configuration")
+        _merge(sim_results, shard.get('sim_results') or {})
+        _merge(synth_results, shard.get('synth_results') or {})
+
+    if missing:
+        raise RuntimeError(f"Missing results of shard(s) {missing} of {count} in {shard_dir}")
+
+    logger.info(f"Merged results of {count} shards from {shard_dir}")
+    return (
+        _ordered(sim_results, plan.cores, plan.benchmarks),
+        _ordered(synth_results, plan.cores, plan.pdks, plan.benchmarks)
+    )
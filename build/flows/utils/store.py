@@ -0,0 +1,218 @@
+"""
+Persistent on-disk result store for incremental PPA study execution.
+
+Each stage result is stored under a key derived from the hashes of the
+stage inputs (configuration slice, RTL, software binary, tool versions),
+so a stage is only recomputed when one of its inputs changes.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import logging
+
+from .cache import hash_files
+
+logger = logging.getLogger(__name__)
+
+# Default location of the result store (relative to the workspace root)
+DEFAULT_STORE_DIR = os.path.join("output", ".results")
+
+# Seconds between checks while another process computes a shared result
+LOCK_POLL_SECONDS = 5
+
+# Age after which the claim of a crashed process is taken over
+STALE_LOCK_SECONDS = 12 * 3600
+
+def hash_path(path):
+    """
+    Hash the contents of a file or of every file below a directory.
+
+    Args:
+        path: File or directory path
+
+    Returns:
+        Hex digest string, or a marker string if the path does not exist
+    """
+    if path is None or not os.path.exists(path):
+        return f"missing:{path}"
+
+    hasher = hashlib.sha256()
+    if os.path.isfile(path):
+        return hash_files([path], hasher).hexdigest()
+
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            file_path = os.path.join(root, name)
+            hasher.update(os.path.relpath(file_path, path).encode())
+            hash_files([file_path], hasher)
+    return hasher.hexdigest()
+
+def stage_key(stage, **inputs):
+    """
+    Compute the store key of a stage from its inputs.
+
+    Args:
+        stage: Name of the stage (e.g. "compile", "simulate")
+        **inputs: JSON-serializable inputs (hashes, configuration slices, versions)
+
+    Returns:
+        Hex digest string
+    """
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultStore:
+    """
+    A content-addressed store of stage results on disk.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, enabled=True):
+        """
+        Initialize the result store.
+
+        Args:
+            root: Root directory of the store
+            enabled: If False, every lookup misses and nothing is written
+        """
+        self.root = root
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.poll_seconds = LOCK_POLL_SECONDS
+
+    def _path(self, stage, key):
+        return os.path.join(self.root, stage, key[:2], f"{key}.json")
+
+    def get(self, stage, key):
+        """
+        Look up a stored result.
+
+        Args:
+            stage: Name of the stage
+            key: Key from stage_key
+
+        Returns:
+            The stored result, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        path = self._path(stage, key)
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, stage, key, result):
+        """
+        Store a result atomically.
+
+        Args:
+            stage: Name of the stage
+            key: Key from stage_key
+            result: JSON-serializable result
+        """
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result, f, indent=2, default=str)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _lookup(self, stage, key, valid):
+        result = self.get(stage, key)
+        if result is not None and (valid is None or valid(result)):
+            self.hits += 1
+            logger.info(f"Result store hit for {stage} ({key[:12]})")
+            return result
+        return None
+
+    def _compute(self, stage, key, compute):
+        self.misses += 1
+        result = compute()
+        if not isinstance(result, dict) or result.get('success', True):
+            self.put(stage, key, result)
+        return result
+
+    def _claim(self, lock_path):
+        """Create a claim file, taking over stale ones; return True if this process holds it."""
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+                    logger.warning(f"Taking over stale claim {lock_path}")
+                    os.unlink(lock_path)
+            except OSError:
+                pass
+            return False
+
+    def cached(self, stage, key, compute, valid=None, shared=False):
+        """
+        Return the stored result for a key, computing and storing it on a miss.
+
+        Failed results (``success`` False) are never stored. With ``shared``,
+        processes sharing the store (e.g. the shards of a study) compute a
+        key once: the first one claims it and the others wait for its result.
+        If that computation fails, the next waiter claims the key and retries.
+
+        Args:
+            stage: Name of the stage
+            key: Key from stage_key
+            compute: Callable producing the result
+            valid: Optional predicate rejecting stale stored results
+            shared: If True, compute the key in one process at a time
+
+        Returns:
+            The stage result
+        """
+        result = self._lookup(stage, key, valid)
+        if result is not None:
+            return result
+        if not (shared and self.enabled):
+            return self._compute(stage, key, compute)
+
+        lock_path = self._path(stage, key) + ".lock"
+        waiting = False
+        while not self._claim(lock_path):
+            if not waiting:
+                logger.info(f"Waiting for another process to compute {stage} ({key[:12]})")
+                waiting = True
+            time.sleep(self.poll_seconds)
+            result = self._lookup(stage, key, valid)
+            if result is not None:
+                return result
+
+        try:
+            # The key may have been stored while this process waited for the claim
+            result = self._lookup(stage, key, valid)
+            return result if result is not None else self._compute(stage, key, compute)
+        finally:
+            os.unlink(lock_path)
+
+def get_result_store(study_params):
+    """
+    Create the result store configured for a study.
+
+    Args:
+        study_params: Dictionary containing study parameters
+
+    Returns:
+        ResultStore instance
+    """
+    return ResultStore(
+        root=study_params.get('result_store', DEFAULT_STORE_DIR),
+        enabled=study_params.get('incremental', True)
+    )
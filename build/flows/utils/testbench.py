@@ -0,0 +1,301 @@
+"""
+Utilities for driving the universal testbench (universal_tb.sv).
+"""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Testbench source relative to the workspace root
+TESTBENCH_PATH = "design/hardware/rtl/testbench/universal_tb.sv"
+
+# End-of-test conditions enabled when the configuration does not say otherwise
+DEFAULT_END_ON = ("ecall", "self_loop")
+
+# Prefix of the machine-readable statistics record printed by the testbench
+STATS_PREFIX = "@@STATS "
+
+# Address of the profiling port (PROFILE_PORT in design/software/common/profiling.h)
+DEFAULT_PROFILE_PORT = 0x02000010
+
+# PC trace written by the testbench with +pc_trace (see hotspots.py)
+PC_TRACE = "pc_trace.bin"
+
+# Files of a checkpoint directory loaded by the testbench (see checkpoint.py)
+CHECKPOINT_MEMORY = "memory.hex"
+CHECKPOINT_BOOT = "boot.hex"
+
+# Program files loaded through the testbench's binary loader instead of $readmemh
+BINARY_IMAGE_SUFFIXES = (".bin",)
+
+# Memory size used when a core does not declare one (the testbench default)
+DEFAULT_MEMORY_BYTES = 64 * 1024
+
+# Memories larger than this (in words) use the sparse backing store where supported
+SPARSE_MEMORY_WORDS = 1 << 20
+
+# Simulators that support the associative-array memory (SPARSE_MEM)
+SPARSE_MEMORY_SIMULATORS = ("verilator", "vcs")
+
+_SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+# How each simulator overrides the MEM_WORDS parameter of the testbench
+_MEMORY_PARAMETER_FLAGS = {
+    "iverilog": "-Puniversal_testbench.MEM_WORDS={words}",
+    "verilator": "-GMEM_WORDS={words}",
+    "vcs": "-pvalue+universal_testbench.MEM_WORDS={words}",
+}
+
+def program_plusarg(path):
+    """
+    Return the plusarg loading a program into the testbench.
+
+    Raw little-endian images (see make_hex.py --format bin) are loaded with
+    +bin=, which reads the file in one $fread; anything else is a $readmemh
+    hex file loaded with +hex=.
+
+    Args:
+        path: Path to the program image
+
+    Returns:
+        Plusarg string
+    """
+    path = str(path)
+    if path.endswith(BINARY_IMAGE_SUFFIXES):
+        return f"+bin={path}"
+    return f"+hex={path}"
+
+def parse_size(size):
+    """
+    Parse a memory size such as 65536, "0x10000", "64K" or "4M" into bytes.
+
+    Args:
+        size: Integer or size string
+
+    Returns:
+        Size in bytes
+    """
+    if isinstance(size, int):
+        return size
+    size = str(size).strip().upper().rstrip("B")
+    if size[-1:] in _SIZE_SUFFIXES:
+        return int(size[:-1], 0) * _SIZE_SUFFIXES[size[-1]]
+    return int(size, 0)
+
+def core_memory_size(core_rtl):
+    """
+    Read the memory size a core declares in its core.json.
+
+    Args:
+        core_rtl: Path to the core RTL directory
+
+    Returns:
+        Memory size in bytes (DEFAULT_MEMORY_BYTES if none is declared)
+    """
+    try:
+        with open(os.path.join(core_rtl, "core.json"), 'r') as f:
+            size = (json.load(f).get('memory') or {}).get('size')
+    except (OSError, ValueError):
+        size = None
+    return parse_size(size) if size is not None else DEFAULT_MEMORY_BYTES
+
+def program_size(path):
+    """
+    Compute the memory footprint of a program image.
+
+    Args:
+        path: Raw .bin image or $readmemh hex file (possibly with @address records)
+
+    Returns:
+        Number of bytes from address 0 to the end of the image
+    """
+    path = str(path)
+    if path.endswith(BINARY_IMAGE_SUFFIXES):
+        return os.path.getsize(path)
+
+    with open(path, 'r') as f:
+        content = f.read()
+    if "@" not in content:
+        return 4 * len(content.split())
+
+    end = address = 0
+    for token in content.split():
+        if token.startswith("@"):
+            address = int(token[1:], 16)
+        elif not token.startswith("//"):
+            address += 1
+            end = max(end, address)
+    return 4 * end
+
+def memory_words(core_rtl, program=None, memory_size=None):
+    """
+    Choose the testbench memory size for a run.
+
+    The memory holds at least what the core declares, what the configuration
+    requests and the whole program image, rounded up to a power of two.
+
+    Args:
+        core_rtl: Path to the core RTL directory
+        program: Path to the program image, or None
+        memory_size: Requested size (see parse_size), e.g. from the ``memory_size`` option
+
+    Returns:
+        Number of 32-bit words per memory
+    """
+    size = core_memory_size(core_rtl)
+    if memory_size is not None:
+        size = max(size, parse_size(memory_size))
+    if program is not None and os.path.exists(str(program)):
+        size = max(size, program_size(program))
+    words = max(1, (size + 3) // 4)
+    return 1 << (words - 1).bit_length()
+
+def memory_flags(words, simulator):
+    """
+    Return the compile flags that size the testbench memories.
+
+    Args:
+        words: Number of words per memory (see memory_words)
+        simulator: "iverilog", "verilator" or "vcs"
+
+    Returns:
+        List of command-line flags
+    """
+    flags = [_MEMORY_PARAMETER_FLAGS[simulator].format(words=words)]
+    if words > SPARSE_MEMORY_WORDS and simulator in SPARSE_MEMORY_SIMULATORS:
+        flags.append("+define+SPARSE_MEM")
+    return flags
+
+def testbench_plusargs(options):
+    """
+    Translate simulator options from the study configuration into testbench plusargs.
+
+    Recognized options (from ``cores_config.<core>.options``):
+        trace: Enable VCD dumping (default: False)
+        trace_scope: "dut" or "all" (default: "dut")
+        trace_depth: $dumpvars depth, 0 for all levels (default: 0)
+        dump_start: First cycle to dump (default: 0)
+        dump_stop: Last cycle to dump (default: end of simulation)
+        max_cycles: Cycle limit for the simulation
+        end_on: End-of-test conditions, any of "ecall", "self_loop", "tohost"
+            (default: ecall and self_loop, plus tohost if an address is given)
+        tohost: Address of the tohost mailbox (int or hex string)
+        profile: Log stores to the profiling port to profile.log (default: False)
+        profile_port: Address of the profiling port (default: DEFAULT_PROFILE_PORT)
+        pc_trace: Write the run-length encoded PC trace to pc_trace.bin (default: False)
+        sample_start: Retired instructions after which the sampling window opens (default: 0)
+        sample_stop: Retired instructions after which the sampling window closes
+            and the simulation ends; the cycles in the window are reported as
+            sample_cycles
+        checkpoint: Checkpoint directory to start from instead of the program
+            (see checkpoint.py); the counters start at the checkpoint PC
+
+    Args:
+        options: Dictionary of simulator options (may be None)
+
+    Returns:
+        List of plusarg strings
+    """
+    options = options or {}
+    plusargs = []
+
+    if options.get('trace', False):
+        plusargs.append("+trace")
+        if options.get('trace_scope') is not None:
+            plusargs.append(f"+dump_scope={options['trace_scope']}")
+        if options.get('trace_depth') is not None:
+            plusargs.append(f"+dump_depth={int(options['trace_depth'])}")
+        if options.get('dump_start') is not None:
+            plusargs.append(f"+dump_start={int(options['dump_start'])}")
+        if options.get('dump_stop') is not None:
+            plusargs.append(f"+dump_stop={int(options['dump_stop'])}")
+
+    if options.get('max_cycles') is not None:
+        plusargs.append(f"+max_cycles={int(options['max_cycles'])}")
+
+    if options.get('profile', False):
+        port = options.get('profile_port', DEFAULT_PROFILE_PORT)
+        port = int(port, 0) if isinstance(port, str) else int(port)
+        plusargs.append(f"+profile={port:08x}")
+
+    # Not "+trace_pc": $test$plusargs("trace") would match it and enable VCD dumping
+    if options.get('pc_trace', False):
+        plusargs.append("+pc_trace")
+
+    if options.get('checkpoint'):
+        checkpoint = os.path.abspath(str(options['checkpoint']))
+        plusargs.append(f"+checkpoint_memory={os.path.join(checkpoint, CHECKPOINT_MEMORY)}")
+        plusargs.append(f"+checkpoint_boot={os.path.join(checkpoint, CHECKPOINT_BOOT)}")
+
+    if options.get('sample_stop') is not None:
+        plusargs.append(f"+sample_start={int(options.get('sample_start') or 0)}")
+        plusargs.append(f"+sample_stop={int(options['sample_stop'])}")
+
+    tohost = options.get('tohost')
+    end_on = options.get('end_on')
+    if end_on is None:
+        end_on = list(DEFAULT_END_ON) + (["tohost"] if tohost is not None else [])
+    elif isinstance(end_on, str):
+        end_on = [end_on]
+
+    for condition in end_on:
+        if condition == "ecall":
+            plusargs.append("+end_ecall")
+        elif condition == "self_loop":
+            plusargs.append("+end_selfloop")
+        elif condition == "tohost":
+            if tohost is None:
+                raise ValueError("end_on includes 'tohost' but no tohost address is configured")
+            address = int(tohost, 0) if isinstance(tohost, str) else int(tohost)
+            plusargs.append(f"+tohost={address:08x}")
+        else:
+            raise ValueError(f"Unsupported end-of-test condition: {condition}")
+
+    return plusargs
+
+def parse_stats_record(line):
+    """
+    Parse a testbench statistics record.
+
+    Args:
+        line: A line of simulator output
+
+    Returns:
+        Dictionary with the record fields, or None if the line is not a record
+    """
+    if not line.startswith(STATS_PREFIX):
+        return None
+    try:
+        record = json.loads(line[len(STATS_PREFIX):])
+    except ValueError:
+        logger.warning(f"Malformed statistics record: {line.strip()}")
+        return None
+    # Verilog pads string registers with leading NULs/spaces
+    record['halt_reason'] = str(record.get('halt_reason', 'max_cycles')).strip(" \0")
+    return record
+
+def parse_simulation_output(lines, on_line=None):
+    """
+    Extract the statistics record from the testbench output.
+
+    Lines are consumed one at a time, so this works directly on a
+    subprocess pipe without buffering the whole log.
+
+    Args:
+        lines: Iterable of output lines
+        on_line: Optional callback invoked with every line (e.g. for echoing)
+
+    Returns:
+        Dictionary with cycles, instructions, cpi, halt_reason and
+        tohost_value; empty if the simulation did not produce a record
+    """
+    stats = {}
+    for line in lines:
+        if on_line is not None:
+            on_line(line)
+        record = parse_stats_record(line)
+        if record is not None:
+            stats = record
+    return stats
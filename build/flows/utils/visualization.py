@@ -1,32 +1,212 @@
 """
 Visualization utilities for PPA analysis.
+
+Plots are rendered with the non-interactive Agg backend, in a process pool
+when several plots are out of date. Each plot is skipped when the hash of
+the data it shows is unchanged since it was last rendered.
 """
 
 import os
 import logging
 import json
-import matplotlib.pyplot as plt
+import hashlib
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from .results import append_results_table
+
 logger = logging.getLogger(__name__)
 
-def generate_plots(results, output_dir="analysis/targets/plots"):
+# Hashes of the data behind each rendered plot, kept in the plot directory
+PLOT_HASHES_FILE = ".plot_hashes.json"
+
+def _pyplot():
+    """Import pyplot with the Agg backend (no GUI toolkit is loaded)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+def _no_data(ax):
+    ax.text(0.5, 0.5, "No data", ha="center", va="center", transform=ax.transAxes)
+    ax.set_axis_off()
+
+def _save(fig, plot_path):
+    plt = _pyplot()
+    fig.tight_layout()
+    fig.savefig(plot_path)
+    plt.close(fig)
+    return plot_path
+
+def _cpi_data(table):
+    return table[["core", "benchmark", "cpi"]].drop_duplicates(["core", "benchmark"])
+
+def _draw_cpi(data, plot_path):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    pivot = data.pivot_table(index="benchmark", columns="core", values="cpi", aggfunc="mean")
+    if pivot.empty:
+        _no_data(ax)
+    else:
+        pivot.plot.bar(ax=ax, rot=0)
+        ax.set_ylabel("CPI")
+        ax.set_title("Cycles per instruction")
+    return _save(fig, plot_path)
+
+def _power_data(table):
+    return table[["core", "pdk", "benchmark", "dynamic_power", "leakage_power", "total_power"]].dropna(
+        subset=["total_power"])
+
+def _draw_power(data, plot_path):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    data = data.assign(design=data["core"] + " / " + data["pdk"].fillna("-"))
+    pivot = data.pivot_table(index="benchmark", columns="design", values="total_power", aggfunc="mean")
+    if pivot.empty:
+        _no_data(ax)
+    else:
+        pivot.plot.bar(ax=ax, rot=0)
+        ax.set_ylabel("Total power (mW)")
+        ax.set_title("Power per benchmark")
+    return _save(fig, plot_path)
+
+def _area_data(table):
+    return table[["core", "pdk", "logic_area", "memory_area", "total_area"]].dropna(
+        subset=["total_area"]).drop_duplicates(["core", "pdk"])
+
+def _draw_area(data, plot_path):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    if data.empty:
+        _no_data(ax)
+    else:
+        labels = data["core"] + " / " + data["pdk"].fillna("-")
+        area = data[["logic_area", "memory_area"]].fillna(0).set_axis(labels)
+        area.plot.bar(ax=ax, stacked=True, rot=0)
+        ax.set_ylabel("Area (mm$^2$)")
+        ax.set_title("Area breakdown")
+    return _save(fig, plot_path)
+
+def _radar_data(table):
+    # Only cores with every metric can be compared
+    metrics = table.groupby("core", observed=True)[["cpi", "total_power", "total_area"]].mean()
+    return metrics.dropna().reset_index()
+
+def _draw_radar(data, plot_path):
+    plt = _pyplot()
+    metrics = ["cpi", "total_power", "total_area"]
+    fig = plt.figure(figsize=(6, 6))
+    ax = fig.add_subplot(polar=True)
+    if data.empty:
+        _no_data(ax)
+        return _save(fig, plot_path)
+
+    # Normalize each metric to the worst core (lower is better for all of them)
+    values = data[metrics].to_numpy(dtype=float)
+    worst = np.nanmax(values, axis=0)
+    normalized = np.nan_to_num(values / np.where(worst > 0, worst, 1))
+    angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False)
+    closed = np.append(angles, angles[0])
+    for core, row in zip(data["core"], normalized):
+        ax.plot(closed, np.append(row, row[0]), label=core)
+        ax.fill(closed, np.append(row, row[0]), alpha=0.2)
+    ax.set_xticks(angles)
+    ax.set_xticklabels(["CPI", "Power", "Area"])
+    ax.set_title("PPA (normalized, lower is better)")
+    ax.legend(loc="upper right", bbox_to_anchor=(1.3, 1.1))
+    return _save(fig, plot_path)
+
+# Plot name -> (category, file name stem, data slice, renderer)
+PLOTS = {
+    "cpi": ("performance", "cpi_comparison", _cpi_data, _draw_cpi),
+    "power": ("power", "power_comparison", _power_data, _draw_power),
+    "area": ("area", "area_comparison", _area_data, _draw_area),
+    "radar": ("ppa", "ppa_radar", _radar_data, _draw_radar),
+}
+
+def hash_plot_data(data, plot_format):
+    """
+    Hash the data slice shown by a plot.
+
+    Args:
+        data: DataFrame slice passed to the renderer
+        plot_format: Output format (part of the hash)
+
+    Returns:
+        Hex digest string
+    """
+    hasher = hashlib.sha256()
+    hasher.update(plot_format.encode())
+    hasher.update(json.dumps(list(map(str, data.columns))).encode())
+    hasher.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+def _load_plot_hashes(output_dir):
+    try:
+        with open(os.path.join(output_dir, PLOT_HASHES_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_plot_hashes(output_dir, hashes):
+    with open(os.path.join(output_dir, PLOT_HASHES_FILE), 'w') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+
+def _plan_plots(names, results, output_dir, plot_format):
+    """Slice and hash the data of each plot; return (paths, out-of-date jobs, hashes)."""
+    table = results["table"]
+    hashes = _load_plot_hashes(output_dir)
+    paths = {}
+    jobs = []
+    for name in names:
+        _, stem, select, draw = PLOTS[name]
+        plot_path = os.path.join(output_dir, f"{stem}.{plot_format}")
+        data = select(table)
+        digest = hash_plot_data(data, plot_format)
+        paths[name] = plot_path
+        if hashes.get(os.path.basename(plot_path)) == digest and os.path.exists(plot_path):
+            logger.info(f"Plot {plot_path} is up to date")
+            continue
+        hashes[os.path.basename(plot_path)] = digest
+        jobs.append((draw, data, plot_path))
+    return paths, jobs, hashes
+
+def _render_plots(names, results, output_dir, plot_format="png", workers=None):
+    """Render the named plots that are out of date, in parallel when there are several."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths, jobs, hashes = _plan_plots(names, results, output_dir, plot_format)
+
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(draw, data, path) for draw, data, path in jobs]:
+                future.result()
+    else:
+        for draw, data, path in jobs:
+            draw(data, path)
+
+    if jobs:
+        _save_plot_hashes(output_dir, hashes)
+    return paths
+
+def generate_plots(results, output_dir="analysis/targets/plots", plot_format="png", workers=None):
     """
     Generate visualization plots for PPA results.
     
     Args:
-        results: Dictionary with analysis results
+        results: Dictionary with analysis results (see analyze_results)
         output_dir: Directory to save plots
+        plot_format: Image format understood by matplotlib (e.g. "png", "svg")
+        workers: Maximum number of rendering processes (default: number of CPUs)
         
     Returns:
         Dictionary with paths to generated plots
     """
     logger.info(f"Generating PPA visualization plots in {output_dir}")
     
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
+    paths = _render_plots(list(PLOTS), results, output_dir, plot_format, workers)
     
     plot_paths = {
         "performance": {},
@@ -34,73 +214,42 @@ def generate_plots(results, output_dir="analysis/targets/plots"):
         "area": {},
         "ppa": {}
     }
-    
-    # Generate performance plots
-    plot_paths["performance"]["cpi"] = generate_cpi_plot(results, output_dir)
-    
-    # Generate power plots
-    plot_paths["power"]["total"] = generate_power_plot(results, output_dir)
-    
-    # Generate area plots
-    plot_paths["area"]["total"] = generate_area_plot(results, output_dir)
-    
-    # Generate PPA comparison plots
-    plot_paths["ppa"]["radar"] = generate_ppa_radar_plot(results, output_dir)
+    plot_paths["performance"]["cpi"] = paths["cpi"]
+    plot_paths["power"]["total"] = paths["power"]
+    plot_paths["area"]["total"] = paths["area"]
+    plot_paths["ppa"]["radar"] = paths["radar"]
     
     return plot_paths
 
-def generate_cpi_plot(results, output_dir):
+def generate_cpi_plot(results, output_dir, plot_format="png"):
     """Generate CPI comparison plot."""
-    # This is a placeholder - in a real implementation, this would create an actual plot
-    plot_path = os.path.join(output_dir, "cpi_comparison.png")
-    
-    # Create a simple placeholder file
-    with open(plot_path, 'w') as f:
-        f.write("CPI Plot placeholder")
-    
-    return plot_path
+    return _render_plots(["cpi"], results, output_dir, plot_format)["cpi"]
 
-def generate_power_plot(results, output_dir):
+def generate_power_plot(results, output_dir, plot_format="png"):
     """Generate power comparison plot."""
-    # This is a placeholder - in a real implementation, this would create an actual plot
-    plot_path = os.path.join(output_dir, "power_comparison.png")
-    
-    # Create a simple placeholder file
-    with open(plot_path, 'w') as f:
-        f.write("Power Plot placeholder")
-    
-    return plot_path
+    return _render_plots(["power"], results, output_dir, plot_format)["power"]
 
-def generate_area_plot(results, output_dir):
+def generate_area_plot(results, output_dir, plot_format="png"):
     """Generate area comparison plot."""
-    # This is a placeholder - in a real implementation, this would create an actual plot
-    plot_path = os.path.join(output_dir, "area_comparison.png")
-    
-    # Create a simple placeholder file
-    with open(plot_path, 'w') as f:
-        f.write("Area Plot placeholder")
-    
-    return plot_path
+    return _render_plots(["area"], results, output_dir, plot_format)["area"]
 
-def generate_ppa_radar_plot(results, output_dir):
+def generate_ppa_radar_plot(results, output_dir, plot_format="png"):
     """Generate PPA radar plot."""
-    # This is a placeholder - in a real implementation, this would create an actual plot
-    plot_path = os.path.join(output_dir, "ppa_radar.png")
-    
-    # Create a simple placeholder file
-    with open(plot_path, 'w') as f:
-        f.write("PPA Radar Plot placeholder")
-    
-    return plot_path
+    return _render_plots(["radar"], results, output_dir, plot_format)["radar"]
 
-def generate_report(results, study_params, output_dir="analysis/targets/reports"):
+def generate_report(results, study_params, output_dir="analysis/targets/reports", table_format="parquet"):
     """
     Generate comprehensive PPA report.
     
+    The full results table is appended to ``ppa_results.<format>`` in the
+    output directory (rows of earlier runs are kept); the JSON export only
+    holds the per-(core, pdk) summary.
+    
     Args:
-        results: Dictionary with analysis results
+        results: Dictionary with analysis results (see analyze_results)
         study_params: Dictionary with study parameters
         output_dir: Directory to save reports
+        table_format: "parquet" or "feather"
         
     Returns:
         Dictionary with paths to generated reports
@@ -123,21 +272,23 @@ def generate_report(results, study_params, output_dir="analysis/targets/reports"
         f.write("<p>This is a placeholder for the actual report.</p>\n")
         f.write("</body></html>\n")
     
-    # Generate JSON data export
-    json_path = os.path.join(output_dir, f"ppa_data_{timestamp}.json")
+    # Persist the columnar results table
+    table_path = append_results_table(
+        results["table"], os.path.join(output_dir, "ppa_results"), fmt=table_format
+    )
     
-    # Save results as JSON
+    # Generate JSON summary export
+    json_path = os.path.join(output_dir, f"ppa_data_{timestamp}.json")
     with open(json_path, 'w') as f:
-        # Create a simplified version for JSON serialization
         json_results = {
-            "performance": results["performance"],
-            "power": results["power"],
-            "area": results["area"],
+            "summary": json.loads(results["summary"].to_json(orient="records")),
+            "table": table_path,
             "study_params": study_params
         }
         json.dump(json_results, f, indent=2)
     
     return {
         "html": html_path,
-        "json": json_path
+        "json": json_path,
+        "table": table_path
     }
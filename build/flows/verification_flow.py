@@ -9,11 +9,11 @@ are properly set up before running the main PPA study flows.
 import os
 import sys
 import subprocess
-from prefect import task, flow
 from pathlib import Path
 import logging
 
 # Import utilities
+from flows.utils.lazy import task, flow
 from flows.utils.config import load_config
 
 # Setup logging
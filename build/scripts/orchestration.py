@@ -4,34 +4,20 @@ This script defines flows for building, simulating, and analyzing RISC-V cores.
 """
 
 import os
+import sys
 import subprocess
 import tempfile
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-
-try:
-    from prefect import flow, task
-    from prefect.tasks import task_input_hash
-    from prefect.context import get_run_context
-    PREFECT_AVAILABLE = True
-except ImportError:
-    # Define dummy decorators if Prefect is not available
-    def flow(func=None, **kwargs):
-        def wrapper(f):
-            return f
-        return wrapper if func is None else wrapper(func)
-    
-    def task(func=None, **kwargs):
-        def wrapper(f):
-            return f
-        return wrapper if func is None else wrapper(func)
-    
-    # Define a dummy task_input_hash function
-    def task_input_hash(*args, **kwargs):
-        return None
-    
-    PREFECT_AVAILABLE = False
+from typing import List, Dict, Any, Optional, Union
+
+# Prefect is imported on first use, so --help and argument errors stay fast
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../..'))
+from build.flows.utils.lazy import flow, task, task_input_hash, prefect_available
+
+PREFECT_AVAILABLE = prefect_available()
+if not PREFECT_AVAILABLE:
     print("Prefect not available. Flows will run without orchestration.")
 
 
@@ -99,43 +85,96 @@ def software_flow(config_file: str = "build/configs/simple_core_test.yaml", work
     }
 
 
-@flow(name="Simulation Flow")
-def simulation_flow(core: str = "simple_core", config_file: str = "build/configs/simple_core_test.yaml", 
-                    output_dir: str = "output", clean: bool = False, working_dir: Optional[str] = None) -> Dict[str, Any]:
+@task
+def run_core_simulation(core: str, config_file: str, output_dir: str,
+                        working_dir: Optional[str] = None, use_bazel: bool = True) -> str:
     """
-    Run the simulation flow for a specific core.
+    Run the simulation script for one core with explicit per-run parameters.
+    
+    Nothing is passed through the process environment or the current
+    directory, so several cores can be simulated concurrently.
     
     Args:
         core: Core to simulate
+        config_file: Configuration file path (relative to the working directory)
+        output_dir: Output directory (relative to the working directory)
+        working_dir: Working directory (workspace root)
+        use_bazel: Run through `bazel run` (True) or invoke the script directly (False)
+        
+    Returns:
+        Simulation output
+    """
+    cwd = os.path.abspath(working_dir or os.getcwd())
+    script_args = [
+        f"--output-dir={os.path.join(cwd, output_dir)}",
+        f"--config={os.path.join(cwd, config_file)}",
+    ]
+    
+    if use_bazel:
+        target = f"//validate/simulations:{core}_simulation"
+        cmd = ["bazel", "run", target, "--"] + script_args
+    else:
+        script = os.path.join(cwd, "validate", "simulations", "scripts", "run_simulations.py")
+        cmd = [sys.executable, script, f"--core={core}"] + script_args
+    
+    print(f"Running simulation command: {' '.join(cmd)}")
+    print(f"Working directory: {cwd}")
+    
+    result = subprocess.run(cmd, cwd=cwd, check=True, capture_output=True, text=True)
+    return result.stdout
+
+
+@flow(name="Simulation Flow")
+def simulation_flow(core: Union[str, List[str]] = "simple_core", config_file: str = "build/configs/simple_core_test.yaml", 
+                    output_dir: str = "output", clean: bool = False, working_dir: Optional[str] = None,
+                    use_bazel: bool = True) -> Dict[str, Any]:
+    """
+    Run the simulation flow for one or more cores.
+    
+    Args:
+        core: Core to simulate, or a list of cores to simulate in parallel
         config_file: Configuration file path
         output_dir: Output directory
         clean: Whether to clean the output directory
         working_dir: Working directory for Bazel commands
+        use_bazel: Run simulations through `bazel run` instead of invoking the script directly
     
     Returns:
         Flow results
     """
-    print(f"Running simulation flow for core: {core}")
+    cores = [core] if isinstance(core, str) else list(core)
+    print(f"Running simulation flow for cores: {', '.join(cores)}")
     
     # Clean if requested
     if clean:
         run_bazel_command(["clean"], working_dir=working_dir)
-        clean_output_directory(core, output_dir)
-    
-    # Ensure output directory exists
-    os.makedirs(os.path.join(output_dir, f"{core}_sim"), exist_ok=True)
-    
-    # Set environment variables for the Bazel target
-    os.environ["OUTPUT_DIR"] = os.path.join(output_dir, f"{core}_sim")
-    os.environ["CONFIG_FILE"] = config_file
-    
-    # Run the simulation using Bazel
-    target = f"//validate/simulations:{core}_simulation"  # Updated path after moving simulations directory
-    output = run_bazel_command(["run", target], working_dir=working_dir)
+        for name in cores:
+            clean_output_directory(name, output_dir)
+    
+    # Ensure output directories exist
+    for name in cores:
+        os.makedirs(os.path.join(working_dir or os.getcwd(), output_dir, f"{name}_sim"), exist_ok=True)
+    
+    # Run the simulations, one concurrent run per core
+    if len(cores) == 1:
+        outputs = {cores[0]: run_core_simulation(cores[0], config_file, output_dir, working_dir, use_bazel)}
+    elif PREFECT_AVAILABLE:
+        futures = {
+            name: run_core_simulation.submit(name, config_file, output_dir, working_dir, use_bazel)
+            for name in cores
+        }
+        outputs = {name: future.result() for name, future in futures.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=len(cores)) as executor:
+            futures = {
+                name: executor.submit(run_core_simulation, name, config_file, output_dir, working_dir, use_bazel)
+                for name in cores
+            }
+            outputs = {name: future.result() for name, future in futures.items()}
     
     return {
         "status": "success",
-        "output": output,
+        "output": outputs[cores[0]] if len(cores) == 1 else outputs,
         "core": core,
         "config_file": config_file,
         "output_dir": output_dir
@@ -168,32 +207,25 @@ def analysis_flow(core: str = "simple_core", config_file: str = "build/configs/s
         "config_file": config_file,
         "output_dir": output_dir
     }
-    
-    return {
-        "status": "success",
-        "output": output,
-        "core": core,
-        "config_file": config_file,
-        "output_dir": output_dir
-    }
 
 
 @flow(name="Main Flow")
-def main_flow(core: str = "simple_core", config_file: str = "build/configs/simple_core_test.yaml", 
+def main_flow(core: Union[str, List[str]] = "simple_core", config_file: str = "build/configs/simple_core_test.yaml", 
              output_dir: str = "output", clean: bool = False, build_docs: bool = False, 
              flows: List[str] = ["software", "simulation", "analysis"],
-             working_dir: Optional[str] = None) -> Dict[str, Any]:
+             working_dir: Optional[str] = None, use_bazel: bool = True) -> Dict[str, Any]:
     """
     Run the main flow orchestrating all sub-flows.
     
     Args:
-        core: Core to simulate
+        core: Core to simulate, or a list of cores to simulate in parallel
         config_file: Configuration file path
         output_dir: Output directory
         clean: Whether to clean the output directory
         build_docs: Whether to build documentation
         flows: List of flows to run
         working_dir: Working directory for Bazel commands
+        use_bazel: Run simulations through `bazel run` instead of invoking the script directly
     
     Returns:
         Flow results
@@ -204,7 +236,8 @@ def main_flow(core: str = "simple_core", config_file: str = "build/configs/simpl
         results["software"] = software_flow(config_file, working_dir=working_dir)
     
     if "simulation" in flows:
-        results["simulation"] = simulation_flow(core, config_file, output_dir, clean, working_dir=working_dir)
+        results["simulation"] = simulation_flow(core, config_file, output_dir, clean,
+                                                working_dir=working_dir, use_bazel=use_bazel)
     
     if "analysis" in flows:
         results["analysis"] = analysis_flow(core, config_file, output_dir, working_dir=working_dir)
@@ -222,9 +255,9 @@ def main_flow(core: str = "simple_core", config_file: str = "build/configs/simpl
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run RISC-V Silicon Design Environment flows')
-    parser.add_argument('--core', choices=['simple_core', 'picorv32'], 
-                        default='simple_core',
-                        help='The core to simulate (default: simple_core)')
+    parser.add_argument('--core', choices=['simple_core', 'picorv32'], action='append',
+                        help='The core to simulate; repeat to simulate several cores in parallel '
+                             '(default: simple_core)')
     parser.add_argument('--clean', action='store_true',
                         help='Clean build artifacts before running')
     parser.add_argument('--output-dir', default='output',
@@ -237,19 +270,25 @@ if __name__ == "__main__":
                         help='Comma-separated list of flows to run (default: software,simulation,analysis)')
     parser.add_argument('--working-dir', default=None,
                         help='Working directory for Bazel commands')
+    parser.add_argument('--no-bazel-run', action='store_true',
+                        help='Invoke the simulation script directly instead of through bazel run')
     
     args = parser.parse_args()
     
     # Convert flows string to list
     flows_list = args.flows.split(',')
     
+    # A single core keeps the original single-run behaviour
+    cores = args.core or ['simple_core']
+    
     # Run the main flow
     main_flow(
-        core=args.core,
+        core=cores[0] if len(cores) == 1 else cores,
         config_file=args.config,
         output_dir=args.output_dir,
         clean=args.clean,
         build_docs=args.build_docs,
         flows=flows_list,
-        working_dir=args.working_dir
+        working_dir=args.working_dir,
+        use_bazel=not args.no_bazel_run
     )
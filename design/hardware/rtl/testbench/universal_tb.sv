@@ -1,7 +1,12 @@
-module universal_testbench (
+module universal_testbench #(
+    // Words per memory (a power of two); set per run by the Python runners
+    parameter MEM_WORDS = 16384
+) (
     // No external ports - this is a self-contained testbench
 );
 
+localparam MEM_ADDR_BITS = $clog2(MEM_WORDS);
+
 // Clock and reset generation
 reg clk = 0;
 reg rst_n = 0;
@@ -9,14 +14,22 @@ reg rst_n = 0;
 // Always toggle clock
 always #5 clk = ~clk;
 
-// Memory model for instruction memory
-reg [31:0] imem [0:4095]; // 16KB instruction memory
+// Memory models for instruction and data memory. With SPARSE_MEM defined,
+// associative arrays only allocate the words that are written, so large
+// memories cost nothing until they are used; unwritten words read as zero.
+`ifdef SPARSE_MEM
+bit [31:0] imem [int unsigned];
+bit [31:0] dmem [int unsigned];
+reg [31:0] image_word;
+integer image_words;
+`else
+reg [31:0] imem [0:MEM_WORDS-1];
+reg [31:0] dmem [0:MEM_WORDS-1];
+`endif
 wire [31:0] imem_addr;
 reg [31:0] imem_data;
 wire imem_en;
 
-// Memory model for data memory
-reg [31:0] dmem [0:4095]; // 16KB data memory
 wire [31:0] dmem_addr;
 wire [31:0] dmem_wdata;
 reg [31:0] dmem_rdata;
@@ -35,10 +48,71 @@ integer num_cycles = 0;
 integer max_cycles = 10000;
 integer i;
 reg [1023:0] hex_file; // Using a reg for the filename instead of string
+integer image_fd;
+integer image_bytes;
 
 // Performance counters
 integer num_instr = 0;
 
+// Waveform dump control (all disabled unless +trace is given)
+//   +trace               enable VCD dumping to sim.vcd
+//   +dump_scope=<scope>  "dut" (core only, default) or "all" (includes memories)
+//   +dump_depth=<n>      $dumpvars depth, 0 dumps all levels (default)
+//   +dump_start=<cycle>  first cycle to dump (default 0)
+//   +dump_stop=<cycle>   last cycle to dump (default: end of simulation)
+reg trace_en = 0;
+reg [8*8-1:0] dump_scope = "dut";
+integer dump_depth = 0;
+integer dump_start = 0;
+integer dump_stop = -1;
+
+// End-of-test detection (all disabled unless requested)
+//   +end_ecall           stop when an ecall/ebreak is executed
+//   +end_selfloop        stop on a jump or branch to itself (e.g. "j .")
+//   +tohost=<hex addr>   stop on a store to the tohost address
+reg end_ecall = 0;
+reg end_selfloop = 0;
+reg tohost_en = 0;
+reg [31:0] tohost_addr = 32'h0;
+reg [31:0] tohost_value = 32'h0;
+reg halted = 0;
+reg [8*16-1:0] halt_reason = "max_cycles";
+
+// Profiling port (disabled unless requested)
+//   +profile=<hex addr>  log stores to <addr> (region start) and <addr>+4
+//                        (region end) with their cycle to profile.log
+//                        as "<cycle> <0=start|1=end> <region id>"
+integer profile_fd = 0;
+reg [31:0] profile_port = 32'h0;
+
+// PC trace (disabled unless requested)
+//   +pc_trace  write pc_trace.bin: little-endian 32-bit (pc, cycles) pairs,
+//              one per run of consecutive cycles with the same debug_pc
+integer pc_trace_fd = 0;
+reg [31:0] pc_trace_pc = 32'h0;
+reg [31:0] pc_trace_cycles = 0;
+
+// Sampling window (disabled unless requested)
+//   +sample_start=<n>  start counting cycles when <n> instructions have retired
+//   +sample_stop=<n>   stop the simulation when <n> instructions have retired
+//                      and report the cycles since sample_start as sample_cycles
+integer sample_start = 0;
+integer sample_stop = 0;
+integer sample_begin = -1;
+
+// Checkpoint restore (see build/flows/utils/checkpoint.py)
+//   +checkpoint_memory=<hex>  memory image loaded into both memories instead of the program
+//   +checkpoint_boot=<hex>    restore stub: count, PC, then (address, instruction) pairs
+//                             written over the memory until the core fetches the PC;
+//                             the cycle and instruction counters restart there
+localparam BOOT_WORDS = 256;
+reg [31:0] boot_rom [0:BOOT_WORDS-1];
+reg [31:0] boot_saved [0:BOOT_WORDS/2-1];
+reg [31:0] boot_addr;
+integer boot_count = 0;
+reg boot_active = 0;
+reg [31:0] checkpoint_pc = 32'h0;
+
 // Instantiate the core
 core dut (
     .clk(clk),
@@ -64,34 +138,79 @@ core dut (
 // Instruction memory read
 always @(*) begin
     if (imem_en) begin
-        imem_data = imem[imem_addr[13:2]]; // Word-aligned access
+        imem_data = imem[imem_addr[MEM_ADDR_BITS+1:2]]; // Word-aligned access
     end else begin
         imem_data = 32'h0;
     end
 end
 
+// Stores to the profiling port and tohost are observed by the testbench only
+wire dmem_mmio = (profile_fd != 0 && (dmem_addr & ~32'h4) == profile_port) ||
+                 (tohost_en && dmem_addr == tohost_addr);
+
 // Data memory read/write
 always @(posedge clk) begin
     if (dmem_en) begin
-        if (dmem_we) begin
-            dmem[dmem_addr[13:2]] <= dmem_wdata; // Word-aligned access
+        if (dmem_we && !dmem_mmio) begin
+            dmem[dmem_addr[MEM_ADDR_BITS+1:2]] <= dmem_wdata; // Word-aligned access
         end
-        dmem_rdata <= dmem[dmem_addr[13:2]]; // Word-aligned access
+        dmem_rdata <= dmem[dmem_addr[MEM_ADDR_BITS+1:2]]; // Word-aligned access
     end
 end
 
+// Write one (pc, cycles) record of the PC trace, least significant byte first
+task write_pc_trace_record;
+    begin
+        $fwrite(pc_trace_fd, "%c%c%c%c%c%c%c%c",
+                pc_trace_pc[7:0], pc_trace_pc[15:8], pc_trace_pc[23:16], pc_trace_pc[31:24],
+                pc_trace_cycles[7:0], pc_trace_cycles[15:8], pc_trace_cycles[23:16], pc_trace_cycles[31:24]);
+    end
+endtask
+
 // Main simulation block
 initial begin
-    // Clear memories
-    for (i = 0; i < 4096; i = i + 1) begin
+`ifndef SPARSE_MEM
+    // Clear memories (the sparse memories need no clearing)
+    for (i = 0; i < MEM_WORDS; i = i + 1) begin
         imem[i] = 32'h0;
         dmem[i] = 32'h0;
     end
+`endif
     
-    // Load program from hex file
-    if ($value$plusargs("hex=%s", hex_file)) begin
+    // Load a checkpoint (+checkpoint_memory=), or the program from a hex
+    // file (+hex=) or a raw little-endian image (+bin=)
+    if ($value$plusargs("checkpoint_memory=%s", hex_file)) begin
+        $display("Loading checkpoint memory from %0s", hex_file);
+        $readmemh(hex_file, imem);
+        $readmemh(hex_file, dmem);
+    end else if ($value$plusargs("hex=%s", hex_file)) begin
         $display("Loading program from %s", hex_file);
         $readmemh(hex_file, imem);
+    end else if ($value$plusargs("bin=%s", hex_file)) begin
+        $display("Loading binary image from %0s", hex_file);
+        image_fd = $fopen(hex_file, "rb");
+        if (image_fd == 0) begin
+            $display("Error: cannot open %0s", hex_file);
+            $finish;
+        end
+`ifdef SPARSE_MEM
+        // $fread cannot fill an associative array; store the non-zero words one at a time
+        image_words = 0;
+        while ($fread(image_word, image_fd) == 4 && image_words < MEM_WORDS) begin
+            if (image_word != 0) begin
+                imem[image_words] = {image_word[7:0], image_word[15:8], image_word[23:16], image_word[31:24]};
+            end
+            image_words = image_words + 1;
+        end
+        $fclose(image_fd);
+`else
+        image_bytes = $fread(imem, image_fd);
+        $fclose(image_fd);
+        // $fread fills each word most significant byte first; swap to little-endian
+        for (i = 0; i < (image_bytes + 3) / 4; i = i + 1) begin
+            imem[i] = {imem[i][7:0], imem[i][15:8], imem[i][23:16], imem[i][31:24]};
+        end
+`endif
     end else begin
         // Default simple test program if no hex file provided
         $display("No program specified, using default test program");
@@ -102,10 +221,40 @@ initial begin
         imem[4] = 32'h00310233; // add x4, x2, x3
     end
     
+    // Write the checkpoint restore stub over the memory, saving what it covers
+    if ($value$plusargs("checkpoint_boot=%s", hex_file)) begin
+        for (i = 0; i < BOOT_WORDS; i = i + 1) begin
+            boot_rom[i] = 32'h0;
+        end
+        $readmemh(hex_file, boot_rom);
+        boot_count = boot_rom[0];
+        checkpoint_pc = boot_rom[1];
+        for (i = 0; i < boot_count; i = i + 1) begin
+            boot_addr = boot_rom[2 + 2 * i];
+            boot_saved[i] = imem[boot_addr[MEM_ADDR_BITS+1:2]];
+            imem[boot_addr[MEM_ADDR_BITS+1:2]] = boot_rom[3 + 2 * i];
+        end
+        boot_active = 1;
+        $display("Restoring checkpoint at PC %h", checkpoint_pc);
+    end
+    
     // Test parameters (can be overridden from command line)
     if (!$value$plusargs("max_cycles=%d", max_cycles)) begin
         max_cycles = 10000; // Default if not specified
     end
+    end_ecall = $test$plusargs("end_ecall");
+    end_selfloop = $test$plusargs("end_selfloop");
+    tohost_en = $value$plusargs("tohost=%h", tohost_addr);
+    if ($value$plusargs("profile=%h", profile_port)) begin
+        profile_fd = $fopen("profile.log", "w");
+    end
+    if ($test$plusargs("pc_trace")) begin
+        pc_trace_fd = $fopen("pc_trace.bin", "wb");
+    end
+    if ($value$plusargs("sample_stop=%d", sample_stop)) begin
+        if (!$value$plusargs("sample_start=%d", sample_start)) sample_start = 0;
+        if (sample_start == 0) sample_begin = 0;
+    end
     
     // Start simulation
     rst_n = 0;
@@ -115,32 +264,120 @@ initial begin
     #10;
     
     // Run simulation
-    while (num_cycles < max_cycles) begin
+    while (num_cycles < max_cycles && !halted) begin
         @(posedge clk);
         num_cycles = num_cycles + 1;
         
+        // Leave the restore stub when the core fetches the checkpoint PC
+        if (boot_active && imem_en && imem_addr == checkpoint_pc) begin
+            for (i = 0; i < boot_count; i = i + 1) begin
+                boot_addr = boot_rom[2 + 2 * i];
+                imem[boot_addr[MEM_ADDR_BITS+1:2]] = boot_saved[i];
+            end
+            boot_active = 0;
+            num_cycles = 0;
+            num_instr = 0;
+        end
+        
+        // Apply the waveform dump window
+        if (trace_en) begin
+            if (num_cycles == dump_start && dump_start > 0) $dumpon;
+            if (num_cycles == dump_stop) $dumpoff;
+        end
+        
         // Count instructions (when they retire)
         if (debug_rd_we && debug_rd != 0) begin
             num_instr = num_instr + 1;
         end
         
+        // Open and close the sampling window (after any checkpoint restore)
+        if (sample_stop > 0 && !boot_active) begin
+            if (sample_begin < 0 && num_instr >= sample_start) sample_begin = num_cycles;
+            if (num_instr >= sample_stop) begin
+                halted = 1;
+                halt_reason = "sample_end";
+            end
+        end
+        
         // Check for simulation end conditions
-        // For example, specific instruction or PC value
-        // if (debug_pc == END_PC) break;
+        if (end_ecall && (debug_instr == 32'h00000073 || debug_instr == 32'h00100073)) begin
+            halted = 1;
+            halt_reason = (debug_instr == 32'h00000073) ? "ecall" : "ebreak";
+        end
+        if (end_selfloop && ((debug_instr & 32'hfffff07f) == 32'h0000006f ||   // jal rd, .
+                             ((debug_instr & 32'hfe007fff) == 32'h00000063 &&   // beq rs, rs, .
+                              debug_instr[19:15] == debug_instr[24:20]))) begin
+            halted = 1;
+            halt_reason = "self_loop";
+        end
+        if (tohost_en && dmem_en && dmem_we && dmem_addr == tohost_addr) begin
+            halted = 1;
+            halt_reason = "tohost";
+            tohost_value = dmem_wdata;
+        end
+        
+        // Timestamp stores to the profiling port
+        if (profile_fd != 0 && dmem_en && dmem_we && (dmem_addr & ~32'h4) == profile_port) begin
+            $fwrite(profile_fd, "%0d %0d %h\n", num_cycles, dmem_addr[2], dmem_wdata);
+        end
+        
+        // Run-length encode the PC of every cycle
+        if (pc_trace_fd != 0) begin
+            if (pc_trace_cycles != 0 && debug_pc == pc_trace_pc) begin
+                pc_trace_cycles = pc_trace_cycles + 1;
+            end else begin
+                if (pc_trace_cycles != 0) write_pc_trace_record();
+                pc_trace_pc = debug_pc;
+                pc_trace_cycles = 1;
+            end
+        end
+    end
+    if (profile_fd != 0) $fclose(profile_fd);
+    if (pc_trace_fd != 0) begin
+        if (pc_trace_cycles != 0) write_pc_trace_record();
+        $fclose(pc_trace_fd);
     end
     
     // Report statistics
+    if (halted) begin
+        $display("Simulation halted on %0s at PC %h", halt_reason, debug_pc);
+        if (halt_reason == "tohost") begin
+            $display("tohost value: %h", tohost_value);
+        end
+    end
     $display("Simulation finished after %d cycles", num_cycles);
     $display("Executed %d instructions", num_instr);
     $display("CPI: %f", num_cycles * 1.0 / (num_instr > 0 ? num_instr : 1));
     
+    // Machine-readable statistics record (one JSON object per line)
+    $display("@@STATS {\"cycles\": %0d, \"instructions\": %0d, \"cpi\": %f, \"halt_reason\": \"%0s\", \"tohost_value\": %0d, \"sample_cycles\": %0d}",
+             num_cycles, num_instr, num_cycles * 1.0 / (num_instr > 0 ? num_instr : 1),
+             halt_reason, tohost_value, sample_begin >= 0 ? num_cycles - sample_begin : 0);
+    
     $finish;
 end
 
 // VCD dumping for power analysis
 initial begin
-    $dumpfile("sim.vcd");
-    $dumpvars(0, universal_testbench);
+    trace_en = $test$plusargs("trace");
+    if (trace_en) begin
+        if (!$value$plusargs("dump_scope=%s", dump_scope)) dump_scope = "dut";
+        if (!$value$plusargs("dump_depth=%d", dump_depth)) dump_depth = 0;
+        if (!$value$plusargs("dump_start=%d", dump_start)) dump_start = 0;
+        if (!$value$plusargs("dump_stop=%d", dump_stop)) dump_stop = -1;
+        
+        $display("Dumping waveforms (scope %0s, depth %0d, cycles %0d to %0d)",
+                 dump_scope, dump_depth, dump_start, dump_stop);
+        $dumpfile("sim.vcd");
+        if (dump_scope == "all") begin
+            $dumpvars(dump_depth, universal_testbench);
+        end else begin
+            $dumpvars(dump_depth, dut);
+        end
+        
+        // Hold off dumping until the start of the window
+        if (dump_start > 0) $dumpoff;
+    end
 end
 
 endmodule
@@ -1,11 +1,42 @@
 /**
  * Common profiling utilities for benchmarks
+ *
+ * Two modes are available:
+ *
+ *  - Default: named timers read the cycle counter on target and
+ *    PROFILE_REPORT() prints the totals through printf.
+ *
+ *  - PROFILE_IDS (compile with -DPROFILE_IDS): every PROFILE_START/PROFILE_END
+ *    is a single store of a region ID to a memory-mapped profiling port, and
+ *    the testbench timestamps the stores (enable with the `profile` simulator
+ *    option). The region ID is the address of the name string, so the
+ *    simulation flow recovers the names from the program image; integer IDs
+ *    also work and are reported as region_<id>. Nothing is measured or
+ *    printed on target, so the profile does not perturb the cycle counts.
  */
 
 #ifndef PROFILING_H
 #define PROFILING_H
 
 #include <stdint.h>
+
+#ifdef PROFILE_IDS
+
+// Profiling port: a store to PROFILE_PORT starts a region, PROFILE_PORT + 4 ends it
+#ifndef PROFILE_PORT
+#define PROFILE_PORT 0x02000010
+#endif
+
+#define PROFILE_PORT_START (*(volatile uint32_t *)(PROFILE_PORT))
+#define PROFILE_PORT_END (*(volatile uint32_t *)(PROFILE_PORT + 4))
+
+#define PROFILE_INIT() do { } while (0)
+#define PROFILE_START(name) (PROFILE_PORT_START = (uint32_t)(uintptr_t)(name))
+#define PROFILE_END(name) (PROFILE_PORT_END = (uint32_t)(uintptr_t)(name))
+#define PROFILE_REPORT() do { } while (0)
+
+#else /* !PROFILE_IDS */
+
 #include <stdio.h>
 #include <string.h>
 
@@ -58,18 +89,18 @@ static inline uint64_t get_cycles() {
 /**
  * Start a named timer
  */
-#define PROFILE_START(name) do { \
+#define PROFILE_START(timer_name) do { \
     if (!profiling_initialized) PROFILE_INIT(); \
     int idx = -1; \
     for (int i = 0; i < num_timers; i++) { \
-        if (strcmp(timers[i].name, name) == 0) { \
+        if (strcmp(timers[i].name, timer_name) == 0) { \
             idx = i; \
             break; \
         } \
     } \
     if (idx == -1) { \
         idx = num_timers++; \
-        strncpy(timers[idx].name, name, MAX_TIMER_NAME-1); \
+        strncpy(timers[idx].name, timer_name, MAX_TIMER_NAME-1); \
         timers[idx].name[MAX_TIMER_NAME-1] = '\0'; \
         timers[idx].elapsed = 0; \
     } \
@@ -80,11 +111,11 @@ static inline uint64_t get_cycles() {
 /**
  * End a named timer
  */
-#define PROFILE_END(name) do { \
+#define PROFILE_END(timer_name) do { \
     if (!profiling_initialized) return; \
     int idx = -1; \
     for (int i = 0; i < num_timers; i++) { \
-        if (strcmp(timers[i].name, name) == 0) { \
+        if (strcmp(timers[i].name, timer_name) == 0) { \
             idx = i; \
             break; \
         } \
@@ -107,4 +138,6 @@ static inline uint64_t get_cycles() {
     printf("===========================\n"); \
 } while (0)
 
+#endif /* PROFILE_IDS */
+
 #endif /* PROFILING_H */
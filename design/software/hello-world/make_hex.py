@@ -1,31 +1,112 @@
 #!/usr/bin/env python3
-# Convert binary to hex format suitable for Verilog readmemh
+# Convert a binary to a memory image for the universal testbench
+#
+# Formats:
+#   hex     one 32-bit word per line, for $readmemh (+hex=<file>)
+#   sparse  like hex, but zero regions are skipped with @<word address> records
+#   bin     raw little-endian words, for the testbench binary loader (+bin=<file>)
+#
+# The input is streamed in chunks and converted with bulk byte operations,
+# so multi-MB images convert without a per-word Python loop.
 
-import sys
-import os
+import re
+import argparse
+from array import array
+
+# Bytes converted per chunk (a multiple of the word size)
+CHUNK_BYTES = 1 << 20
+
+# Shortest run of zero bytes the sparse format skips
+SPARSE_GAP_BYTES = 64
+
+# Array typecode of a 32-bit word
+WORD_TYPE = next(code for code in "IL" if array(code).itemsize == 4)
+
+NONZERO = re.compile(rb"[^\x00]")
+ZERO_GAP = bytes(SPARSE_GAP_BYTES)
+
+def read_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """Yield the file in chunks, zero-padding the last one to a whole word."""
+    with open(path, 'rb') as infile:
+        while True:
+            chunk = infile.read(chunk_bytes)
+            if not chunk:
+                return
+            if len(chunk) % 4:
+                chunk += bytes(4 - len(chunk) % 4)
+            yield chunk
+
+def hex_lines(data):
+    """Format little-endian words as readmemh lines (most significant byte first)."""
+    words = array(WORD_TYPE, data)
+    words.byteswap()
+    return memoryview(words).hex('\n', 4) + '\n'
+
+def write_hex(chunks, outfile):
+    for chunk in chunks:
+        outfile.write(hex_lines(chunk))
+
+def write_sparse(chunks, outfile, base=0):
+    """Write readmemh lines for the non-zero regions, each preceded by its word address."""
+    offset = base
+    next_address = None
+    for chunk in chunks:
+        position = 0
+        while True:
+            match = NONZERO.search(chunk, position)
+            if match is None:
+                break
+            start = match.start() & ~3
+            end = chunk.find(ZERO_GAP, match.start())
+            end = len(chunk) if end < 0 else (end + 3) & ~3
+
+            address = (offset + start) // 4
+            if address != next_address:
+                outfile.write(f"@{address:x}\n")
+            outfile.write(hex_lines(chunk[start:end]))
+            next_address = (offset + end) // 4
+            position = end
+        offset += len(chunk)
+
+def write_binary(chunks, outfile):
+    for chunk in chunks:
+        outfile.write(chunk)
+
+def convert(input_bin, output, fmt="hex", base=0):
+    """
+    Convert a binary file to a memory image.
+
+    Args:
+        input_bin: Path to the input binary
+        output: Path to the output image
+        fmt: "hex", "sparse" or "bin"
+        base: Byte address of the image in memory (sparse format only)
+    """
+    chunks = read_chunks(input_bin)
+    if fmt == "bin":
+        with open(output, 'wb') as outfile:
+            write_binary(chunks, outfile)
+    else:
+        with open(output, 'w') as outfile:
+            if fmt == "sparse":
+                write_sparse(chunks, outfile, base)
+            else:
+                write_hex(chunks, outfile)
 
 def main():
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} <input_bin> <output_hex>")
-        sys.exit(1)
-    
-    input_bin = sys.argv[1]
-    output_hex = sys.argv[2]
-    
-    with open(input_bin, 'rb') as infile:
-        bin_data = infile.read()
-    
-    # Pad to 4-byte alignment if necessary
-    if len(bin_data) % 4 != 0:
-        bin_data += b'\x00' * (4 - (len(bin_data) % 4))
-    
-    with open(output_hex, 'w') as outfile:
-        for i in range(0, len(bin_data), 4):
-            # Read 4 bytes (little-endian word)
-            word = bin_data[i:i+4]
-            # Convert to hex in memory order (little-endian to big-endian for readmemh)
-            hex_str = '{:02x}{:02x}{:02x}{:02x}'.format(word[3], word[2], word[1], word[0])
-            outfile.write(hex_str + '\n')
+    parser = argparse.ArgumentParser(description="Convert a binary to a memory image")
+    parser.add_argument("input_bin", help="Input binary")
+    parser.add_argument("output", help="Output image")
+    parser.add_argument("--format", choices=["hex", "sparse", "bin"],
+                        help="Output format (default: bin for a .bin output, hex otherwise)")
+    parser.add_argument("--base", type=lambda value: int(value, 0), default=0,
+                        help="Byte address of the image in memory, for the sparse format")
+    args = parser.parse_args()
+
+    fmt = args.format or ("bin" if args.output.endswith(".bin") else "hex")
+    if args.base % 4:
+        parser.error("--base must be word aligned")
+    convert(args.input_bin, args.output, fmt, args.base)
 
 if __name__ == "__main__":
     main()
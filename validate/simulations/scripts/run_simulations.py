@@ -7,9 +7,22 @@ This script can run simulations for both simple_core and picorv32.
 import os
 import sys
 import argparse
+import json
 import subprocess
 import shutil
 
+# Import utilities
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+from build.flows.utils.cache import compute_build_key, cached_build, get_tool_version
+from build.flows.utils.config import load_config
+from build.flows.utils.iss import InstructionSetSimulator, core_uart_base, run_iss
+from build.flows.utils.checkpoint import take_checkpoint
+from build.flows.utils.profiling import PROFILE_LOG, decode_profile
+from build.flows.utils.testbench import (
+    CHECKPOINT_MEMORY, PC_TRACE, testbench_plusargs, parse_simulation_output, program_plusarg,
+    memory_words, memory_flags
+)
+
 def find_workspace_root():
     """Find the workspace root by looking for WORKSPACE.bazel file."""
     current_dir = os.getcwd()
@@ -33,12 +46,14 @@ def find_workspace_root():
                 if potential_path and os.path.exists(os.path.join(potential_path, 'WORKSPACE.bazel')):
                     return potential_path
     
-    # If not in runfiles or couldn't determine, walk up directories looking for WORKSPACE.bazel
-    path = current_dir
-    while path != '/':
-        if os.path.exists(os.path.join(path, 'WORKSPACE.bazel')):
-            return path
-        path = os.path.dirname(path)
+    # If not in runfiles or couldn't determine, walk up directories looking for WORKSPACE.bazel,
+    # first from the current directory and then from this script's location
+    for start in [current_dir, os.path.dirname(os.path.abspath(__file__))]:
+        path = start
+        while path != '/':
+            if os.path.exists(os.path.join(path, 'WORKSPACE.bazel')):
+                return path
+            path = os.path.dirname(path)
     
     # If we can't find it, use the current directory and print a warning
     print(f"Warning: Could not find workspace root, using current directory: {current_dir}")
@@ -56,89 +71,342 @@ def create_hex_file(output_dir):
         f.write("00310233\n")  # add x4, x2, x3
     return hex_file
 
+def compile_simulator(testbench, core_files, include_dirs, cache_dir=None, build_dir=None, words=None):
+    """
+    Compile the testbench and core with iverilog, reusing a cached binary if possible.
+    
+    The cache key covers the testbench, the core Verilog files, the include
+    directories and the iverilog version, so runs that only change the program
+    hex reuse the same compiled simulator.
+    
+    Args:
+        testbench: Path to the testbench
+        core_files: List of core Verilog files
+        include_dirs: List of include directories
+        cache_dir: Cache directory, or None to always compile into build_dir
+        build_dir: Directory to compile into when the cache is disabled
+        words: Testbench memory size in words (see memory_words), or None for the default
+        
+    Returns:
+        Tuple of (path to compiled simulator, True if it was a cache hit)
+    """
+    include_args = []
+    for include_dir in include_dirs:
+        include_args.extend(["-I", include_dir])
+    flags = memory_flags(words, "iverilog") if words is not None else []
+    
+    def build(build_dir):
+        sim_binary = os.path.join(build_dir, "sim_core")
+        iverilog_cmd = ["iverilog", "-o", sim_binary] + flags + include_args + [testbench] + core_files
+        print(f"Running: {' '.join(iverilog_cmd)}")
+        subprocess.run(iverilog_cmd, check=True)
+    
+    if cache_dir is None:
+        build(build_dir)
+        return os.path.join(build_dir, "sim_core"), False
+    
+    key = compute_build_key(
+        [testbench] + core_files,
+        include_dirs=include_dirs,
+        tool_version=get_tool_version(["iverilog", "-V"]),
+        flags=flags
+    )
+    return cached_build(key, build, "sim_core", cache_dir=cache_dir)
+
+def run_and_parse(cmd, cwd=None):
+    """
+    Run the simulator, echoing its output while parsing the testbench statistics record.
+    
+    Args:
+        cmd: Simulator command line
+        cwd: Working directory for the simulator (where sim.vcd is written)
+        
+    Returns:
+        Dictionary of statistics (see parse_simulation_output)
+    """
+    process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, text=True)
+    stats = parse_simulation_output(process.stdout, on_line=sys.stdout.write)
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+    return stats
+
+def load_core_options(config_file, core):
+    """
+    Load the simulator options for a core from a study configuration file.
+    
+    Args:
+        config_file: Path to the YAML/JSON configuration (may be None)
+        core: Name of the core
+        
+    Returns:
+        Dictionary of options from cores_config.<core>.options
+    """
+    if not config_file:
+        return {}
+    config = load_config(config_file) or {}
+    core_config = config.get('cores_config', {}).get(core) or {}
+    return dict(core_config.get('options') or {})
+
+def get_core_files(cores_dir, core):
+    """Return the Verilog files of a core."""
+    if core == 'simple_core':
+        return [
+            os.path.join(cores_dir, "simple_core/simple_core.v")
+        ]
+    elif core == 'picorv32':
+        return [
+            os.path.join(cores_dir, "picorv32/picorv32.v"),
+            os.path.join(cores_dir, "picorv32/core.v")
+        ]
+    raise ValueError(f"Unsupported core: {core}")
+
+def run_simulation(core, project_root, output_dir, hex_file=None, options=None, cache_dir=None):
+    """
+    Compile and run a simulation of one core.
+    
+    All paths are explicit and the simulator runs with its own working
+    directory, so several simulations can run concurrently in one process.
+    
+    Args:
+        core: Name of the core
+        project_root: Workspace root
+        output_dir: Output directory; results go to <output_dir>/<core>_sim
+        hex_file: Program hex file or raw .bin image, or None for the default test program
+        options: Simulator options (see testbench_plusargs)
+        cache_dir: Compiled simulator cache directory, or None to disable caching
+        
+    Returns:
+        Dictionary of statistics from the testbench
+    """
+    options = dict(options or {})
+    options.setdefault('max_cycles', 10000)
+    
+    cores_dir = os.path.join(project_root, "design/hardware/rtl/cores")
+    testbench = os.path.join(project_root, "design/hardware/rtl/testbench/universal_tb.sv")
+    core_files = get_core_files(cores_dir, core)
+    
+    # Create a simulation directory in output for results
+    sim_dir = os.path.join(output_dir, f"{core}_sim")
+    os.makedirs(sim_dir, exist_ok=True)
+    
+    # Place the program in the simulation directory, keeping raw images binary
+    is_image = bool(hex_file) and hex_file.endswith(".bin")
+    sim_hex_file = os.path.join(sim_dir, "program.bin" if is_image else "program.hex")
+    if not hex_file:
+        create_hex_file(sim_dir)
+        print(f"Created default hex file at {sim_hex_file}")
+    else:
+        shutil.copy(hex_file, sim_hex_file)
+        print(f"Copied hex file to: {sim_hex_file}")
+    
+    # Compile with iverilog, reusing the cached simulator when the RTL is unchanged;
+    # the memories are sized for the program or checkpoint (one simulator per power-of-two size)
+    checkpoint = options.get('checkpoint')
+    image = os.path.join(checkpoint, CHECKPOINT_MEMORY) if checkpoint else sim_hex_file
+    words = memory_words(os.path.join(cores_dir, core), image, options.get('memory_size'))
+    sim_binary, cache_hit = compile_simulator(
+        testbench, core_files, [cores_dir], cache_dir=cache_dir, build_dir=sim_dir, words=words
+    )
+    if cache_dir is not None:
+        print(f"Simulator cache {'hit' if cache_hit else 'miss'}: {sim_binary}")
+    
+    # Remove any waveform, profile or PC trace left over from a previous run
+    vcd_file = os.path.join(sim_dir, "sim.vcd")
+    for stale_file in [vcd_file, os.path.join(sim_dir, PROFILE_LOG), os.path.join(sim_dir, PC_TRACE)]:
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+    
+    # Run simulation with explicit hex file path
+    program_args = [] if checkpoint else [program_plusarg(sim_hex_file)]
+    vvp_cmd = ["vvp", sim_binary] + program_args + testbench_plusargs(options)
+    print(f"Running: {' '.join(vvp_cmd)}")
+    stats = run_and_parse(vvp_cmd, cwd=sim_dir)
+    if not stats:
+        print("Warning: simulation produced no statistics record")
+    else:
+        print(f"Simulation ended on {stats['halt_reason']} after {stats['cycles']} cycles")
+    
+    # Per-region cycle breakdown from the profiling port
+    if options.get('profile', False):
+        stats['profile'] = decode_profile(sim_dir, sim_hex_file, stats.get('cycles'))
+        for name, region in ((stats['profile'] or {}).get('regions') or {}).items():
+            print(f"  {name:20s} {region['cycles']:10d} cycles in {region['calls']} call(s)")
+    
+    # PC hotspots from the PC trace, named from the benchmark ELF
+    if options.get('pc_trace', False):
+        from build.flows.utils.hotspots import analyze_pc_trace, find_program_elf
+        stats['hotspots'] = analyze_pc_trace(sim_dir, options.get('elf') or find_program_elf(hex_file))
+        for entry in ((stats['hotspots'] or {}).get('flat') or [])[:10]:
+            print(f"  {entry['symbol']:30s} {entry['cycles']:10d} cycles ({entry['share']:.1%})")
+    
+    # Save the statistics next to the other simulation outputs
+    with open(os.path.join(sim_dir, "stats.json"), 'w') as f:
+        json.dump(stats, f, indent=2)
+    
+    if os.path.exists(vcd_file):
+        print(f"Simulation waveform generated at {vcd_file}")
+    
+    return stats
+
+def run_functional(core, project_root, output_dir, hex_file=None, options=None):
+    """
+    Run a program on the Python ISS instead of the RTL.
+    
+    The ISS uses the memory size and UART address of the core's core.json,
+    so a benchmark build can be checked and its instruction count measured
+    without compiling a simulator.
+    
+    Args:
+        core: Name of the core
+        project_root: Workspace root
+        output_dir: Output directory; results go to <output_dir>/<core>_sim
+        hex_file: Program hex file, raw .bin image or ELF, or None for the default test program
+        options: Simulator options (see run_iss)
+        
+    Returns:
+        Dictionary of statistics from the ISS
+    """
+    sim_dir = os.path.join(output_dir, f"{core}_sim")
+    os.makedirs(sim_dir, exist_ok=True)
+    program = hex_file or create_hex_file(sim_dir)
+    
+    stats = run_iss(program, os.path.join(project_root, "design/hardware/rtl/cores", core), options)
+    if stats['uart']:
+        sys.stdout.write(stats['uart'])
+    print(f"ISS ended on {stats['halt_reason']} after {stats['instructions']} instructions "
+          f"({stats['mips']:.1f} MIPS)")
+    
+    with open(os.path.join(sim_dir, "iss_stats.json"), 'w') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+def save_checkpoint(core, project_root, hex_file, directory, instructions=None, pc=None, options=None):
+    """
+    Run a program on the ISS up to a position and save a checkpoint there.
+    
+    Args:
+        core: Name of the core
+        project_root: Workspace root
+        hex_file: Program hex file, raw .bin image or ELF
+        directory: Checkpoint directory
+        instructions: Retired instructions to run to
+        pc: PC to stop at
+        options: Simulator options (end_on, tohost, memory_size)
+        
+    Returns:
+        The checkpoint state
+    """
+    options = options or {}
+    core_rtl = os.path.join(project_root, "design/hardware/rtl/cores", core)
+    # Size the memory like the RTL run (program images larger than that grow it on load)
+    memory_size = 4 * memory_words(core_rtl, memory_size=options.get('memory_size'))
+    iss = InstructionSetSimulator(memory_size, core_uart_base(core_rtl),
+                                  options.get('end_on'), options.get('tohost'))
+    iss.load(hex_file)
+    state = take_checkpoint(iss, directory, instructions, pc)
+    print(f"Saved checkpoint at PC 0x{state['pc']:08x} after {state['instructions']} instructions to {directory}")
+    return state
+
 def main():
     parser = argparse.ArgumentParser(description='Run RISC-V core simulations')
     parser.add_argument('--core', choices=['simple_core', 'picorv32'], required=True,
                         help='Which core to simulate')
-    parser.add_argument('--hex', type=str, help='Path to hex file to load')
-    parser.add_argument('--cycles', type=int, default=10000, 
-                        help='Maximum number of simulation cycles')
+    parser.add_argument('--hex', type=str, help='Path to hex file or raw .bin image to load (or an ELF with --iss)')
+    parser.add_argument('--cycles', type=int, default=None,
+                        help='Maximum number of simulation cycles (default: options.max_cycles or 10000)')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Output directory (default: <workspace>/output)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Compiled simulator cache directory (default: <output>/.sim_cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always recompile the simulator')
+    parser.add_argument('--config', type=str, default=None,
+                        help='Study configuration providing cores_config.<core>.options')
+    parser.add_argument('--trace', action=argparse.BooleanOptionalAction, default=None,
+                        help='Enable/disable VCD dumping (overrides options.trace)')
+    parser.add_argument('--trace-scope', choices=['dut', 'all'], default=None,
+                        help='Dump only the core (dut) or the whole testbench (all)')
+    parser.add_argument('--trace-depth', type=int, default=None,
+                        help='$dumpvars depth (0 dumps all levels)')
+    parser.add_argument('--dump-start', type=int, default=None,
+                        help='First cycle to dump')
+    parser.add_argument('--dump-stop', type=int, default=None,
+                        help='Last cycle to dump')
+    parser.add_argument('--profile', action=argparse.BooleanOptionalAction, default=None,
+                        help='Log the profiling port and report per-region cycles (overrides options.profile)')
+    parser.add_argument('--pc-trace', action=argparse.BooleanOptionalAction, default=None,
+                        help='Record the PC trace and report hotspots (overrides options.pc_trace)')
+    parser.add_argument('--elf', type=str, default=None,
+                        help='Benchmark ELF used to name the hotspots (default: <hex>.elf if present)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='Start the RTL simulation from a checkpoint directory instead of the program')
+    parser.add_argument('--save-checkpoint', type=str, default=None,
+                        help='Run the ISS to --at-instruction/--at-pc and save a checkpoint to this directory')
+    parser.add_argument('--at-instruction', type=int, default=None,
+                        help='Retired instructions at which to save the checkpoint')
+    parser.add_argument('--at-pc', type=lambda value: int(value, 0), default=None,
+                        help='PC at which to save the checkpoint')
+    parser.add_argument('--iss', action='store_true',
+                        help='Run the program on the Python ISS instead of the RTL simulator')
+    parser.add_argument('--max-instructions', type=int, default=None,
+                        help='Instruction limit of an ISS run (default: options.max_instructions)')
     args = parser.parse_args()
 
     # Get project root directory
     project_root = find_workspace_root()
     print(f"Using workspace root: {project_root}")
     
+    def resolve(path):
+        """Resolve a path relative to the workspace root."""
+        return path if os.path.isabs(path) else os.path.join(project_root, path)
+    
     # Define paths
-    output_dir = os.path.join(project_root, "output")
+    output_dir = resolve(args.output_dir or "output")
     os.makedirs(output_dir, exist_ok=True)
     
-    cores_dir = os.path.join(project_root, "design/hardware/rtl/cores")
-    testbench = os.path.join(project_root, "design/hardware/rtl/testbench/universal_tb.sv")
-    
-    # Create hex file for simulation
-    if not args.hex:
-        hex_file = create_hex_file(output_dir)
-        print(f"Created default hex file at {hex_file}")
-    else:
-        hex_file = args.hex
-        if not os.path.isabs(hex_file):
-            hex_file = os.path.join(project_root, hex_file)
+    hex_file = None
+    if args.hex:
+        hex_file = resolve(args.hex)
         print(f"Using provided hex file: {hex_file}")
     
-    # Determine core files
-    if args.core == 'simple_core':
-        core_files = [
-            os.path.join(cores_dir, "simple_core/simple_core.v")
-        ]
-    elif args.core == 'picorv32':
-        core_files = [
-            os.path.join(cores_dir, "picorv32/picorv32.v"),
-            os.path.join(cores_dir, "picorv32/core.v")
-        ]
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = resolve(args.cache_dir) if args.cache_dir else os.path.join(output_dir, ".sim_cache")
     
-    # Run simulation
-    print(f"Running simulation for {args.core}...")
+    # Simulator options from the configuration, overridden by the command line
+    options = load_core_options(resolve(args.config) if args.config else None, args.core)
+    for key in ['trace', 'trace_scope', 'trace_depth', 'dump_start', 'dump_stop', 'profile', 'pc_trace']:
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+    if args.elf:
+        options['elf'] = resolve(args.elf)
+    if args.cycles is not None:
+        options['max_cycles'] = args.cycles
     
-    # Change to the project root directory to ensure correct path resolution
-    original_dir = os.getcwd()
-    os.chdir(project_root)
+    if args.max_instructions is not None:
+        options['max_instructions'] = args.max_instructions
     
-    try:
-        # Create a simulation directory in output for results
-        sim_dir = os.path.join(output_dir, f"{args.core}_sim")
-        os.makedirs(sim_dir, exist_ok=True)
-        
-        # Copy hex file to simulation directory only
-        sim_hex_file = os.path.join(sim_dir, "program.hex")
-        shutil.copy(hex_file, sim_hex_file)
-        print(f"Copied hex file to: {sim_hex_file}")
-        
-        # Work directly in the simulation directory
-        os.chdir(sim_dir)
-        
-        # Create explicit +hex argument for simulation
-        hex_arg = f"+hex={sim_hex_file}"
-        
-        # Compile with iverilog - put output in the simulation directory
-        sim_binary = os.path.join(sim_dir, "sim_core")
-        iverilog_cmd = ["iverilog", "-o", sim_binary, "-I", cores_dir, testbench] + core_files
-        print(f"Running: {' '.join(iverilog_cmd)}")
-        subprocess.run(iverilog_cmd, check=True)
-        
-        # Run simulation with explicit hex file path
-        vvp_cmd = ["vvp", sim_binary, hex_arg]
-        print(f"Running: {' '.join(vvp_cmd)}")
-        subprocess.run(vvp_cmd, check=True)
-        
-        # The VCD file is already in the simulation directory since we're working there
-        if os.path.exists("sim.vcd"):
-            print(f"Simulation waveform generated at {sim_dir}/sim.vcd")
-        
-        print("Simulation completed successfully!")
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
+    if args.checkpoint:
+        options['checkpoint'] = resolve(args.checkpoint)
+    
+    if args.save_checkpoint:
+        if (args.at_instruction is None) == (args.at_pc is None):
+            parser.error("--save-checkpoint needs one of --at-instruction and --at-pc")
+        if not hex_file:
+            parser.error("--save-checkpoint needs --hex")
+        save_checkpoint(args.core, project_root, hex_file, resolve(args.save_checkpoint),
+                        args.at_instruction, args.at_pc, options)
+        return
+    
+    if args.iss:
+        print(f"Running the ISS for {args.core}...")
+        run_functional(args.core, project_root, output_dir, hex_file, options)
+        return
+    
+    # Run simulation
+    print(f"Running simulation for {args.core}...")
+    run_simulation(args.core, project_root, output_dir, hex_file, options, cache_dir)
+    print("Simulation completed successfully!")
 
 if __name__ == "__main__":
     main()
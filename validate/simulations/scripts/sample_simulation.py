@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Script to estimate the CPI of a long benchmark from sampled RTL simulations.
+
+The program first runs on the Python ISS, which collects the basic-block
+vector of every interval. The vectors are clustered to choose representative
+intervals, each of which is simulated in RTL through the testbench sampling
+window, and the CPI of the whole run is extrapolated from them. With
+--warmup, each interval starts from an ISS checkpoint taken that many
+instructions before it instead of from reset.
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Import utilities
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from build.flows.utils.iss import InstructionSetSimulator, core_uart_base
+from build.flows.utils.testbench import memory_words
+from build.flows.utils.checkpoint import advance, write_checkpoint
+from build.flows.utils.sampling import (
+    DEFAULT_INTERVAL, DEFAULT_MAX_CLUSTERS, collect_bbvs, choose_simpoints, count_register_writes,
+    extrapolate_cpi
+)
+from run_simulations import find_workspace_root, load_core_options, run_simulation
+
+# Cycle budget of an interval simulation, per instruction simulated up to its end
+MAX_CPI = 50
+
+def take_point_checkpoints(iss, points, warmup, output_dir):
+    """
+    Take a checkpoint `warmup` instructions before each chosen interval.
+
+    The testbench counters restart at the checkpoint, so each point gets a
+    `checkpoint` directory and a sampling window relative to it. Points
+    starting within the warmup of reset are left to run from reset.
+
+    Args:
+        iss: InstructionSetSimulator created with trace=True, program loaded
+        points: Points from choose_simpoints (updated in place)
+        warmup: Instructions simulated in RTL before each interval
+        output_dir: Directory receiving the checkpoints
+    """
+    writes, block_writes = 0, {}
+    for point in sorted(points, key=lambda p: p['start']):
+        target = point['start'] - warmup
+        if target <= 0:
+            continue
+        advance(iss, instructions=target)
+        writes += count_register_writes(iss.memory, *iss.take_block_trace(), block_writes)
+        point['checkpoint'] = os.path.join(output_dir, f"checkpoint_{point['interval']}")
+        point['checkpoint_instructions'] = iss.retired
+        point['checkpoint_writes'] = writes
+        write_checkpoint(point['checkpoint'], iss, metadata={'interval': point['interval']})
+
+def simulate_point(core, project_root, output_dir, hex_file, options, point, cache_dir=None):
+    """
+    Simulate one chosen interval in RTL and return its cycles.
+
+    The simulation runs from reset, or from the point's checkpoint, up to the
+    end of the interval; only the cycles inside the interval are measured.
+
+    Args:
+        core: Name of the core
+        project_root: Workspace root
+        output_dir: Output directory of this interval
+        hex_file: Program hex file or raw .bin image
+        options: Simulator options
+        point: Point from choose_simpoints
+        cache_dir: Compiled simulator cache directory, or None
+
+    Returns:
+        Cycles measured in the interval
+    """
+    options = dict(options)
+    offset = point.get('checkpoint_writes', 0)
+    if point.get('checkpoint'):
+        options['checkpoint'] = point['checkpoint']
+    options['sample_start'] = max(0, point['writes_start'] - offset)
+    options['sample_stop'] = point['writes_stop'] - offset
+    options['max_cycles'] = max(int(options.get('max_cycles') or 0),
+                                MAX_CPI * (point['stop'] - point.get('checkpoint_instructions', 0)))
+    stats = run_simulation(core, project_root, output_dir, hex_file, options, cache_dir)
+    if stats.get('halt_reason') != 'sample_end':
+        raise RuntimeError(f"Interval {point['interval']} ended on {stats.get('halt_reason')} "
+                           f"before the end of its sampling window")
+    return stats['sample_cycles']
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate the CPI of a benchmark from sampled RTL simulations')
+    parser.add_argument('--core', choices=['simple_core', 'picorv32'], required=True,
+                        help='Which core to simulate')
+    parser.add_argument('--hex', type=str, required=True,
+                        help='Path to the program hex file or raw .bin image')
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL,
+                        help='Instructions per interval')
+    parser.add_argument('--max-clusters', type=int, default=DEFAULT_MAX_CLUSTERS,
+                        help='Largest number of clusters tried')
+    parser.add_argument('--samples-per-cluster', type=int, default=2,
+                        help='Intervals simulated per cluster (two or more give an error bound)')
+    parser.add_argument('--max-instructions', type=int, default=None,
+                        help='Instruction limit of the functional run')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the clustering and the sample choice')
+    parser.add_argument('--warmup', type=int, default=None,
+                        help='Start each interval from a checkpoint this many instructions before it')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Intervals simulated concurrently')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Output directory (default: <workspace>/output)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always recompile the simulator')
+    parser.add_argument('--config', type=str, default=None,
+                        help='Study configuration providing cores_config.<core>.options')
+    args = parser.parse_args()
+
+    project_root = find_workspace_root()
+
+    def resolve(path):
+        """Resolve a path relative to the workspace root."""
+        return path if os.path.isabs(path) else os.path.join(project_root, path)
+
+    output_dir = os.path.join(resolve(args.output_dir or "output"), f"{args.core}_sampled")
+    os.makedirs(output_dir, exist_ok=True)
+    cache_dir = None if args.no_cache else os.path.join(resolve(args.output_dir or "output"), ".sim_cache")
+    hex_file = resolve(args.hex)
+    options = load_core_options(resolve(args.config) if args.config else None, args.core)
+
+    # Step 1: basic-block vectors from a functional run
+    core_rtl = os.path.join(project_root, "design/hardware/rtl/cores", args.core)
+    memory_size = 4 * memory_words(core_rtl, memory_size=options.get('memory_size'))
+    iss = InstructionSetSimulator(memory_size, core_uart_base(core_rtl),
+                                  options.get('end_on'), options.get('tohost'), trace=True)
+    iss.load(hex_file)
+    bbvs = collect_bbvs(iss, args.interval, args.max_instructions)
+    print(f"ISS ended on {iss.halt_reason} after {iss.retired} instructions "
+          f"({len(bbvs['instructions'])} intervals of {args.interval})")
+
+    # Step 2: representative intervals
+    selection = choose_simpoints(bbvs, args.max_clusters, args.samples_per_cluster, args.seed)
+    for cluster in selection['clusters']:
+        print(f"  cluster {cluster['cluster']}: {cluster['intervals']} intervals, "
+              f"weight {cluster['weight']:.3f}, samples {cluster['samples']}")
+
+    if args.warmup is not None:
+        iss = InstructionSetSimulator(memory_size, core_uart_base(core_rtl),
+                                      options.get('end_on'), options.get('tohost'), trace=True)
+        iss.load(hex_file)
+        take_point_checkpoints(iss, selection['points'], args.warmup, output_dir)
+
+    # Step 3: simulate the chosen intervals and extrapolate
+    def simulate(point):
+        point_dir = os.path.join(output_dir, f"interval_{point['interval']}")
+        return point['interval'], simulate_point(args.core, project_root, point_dir, hex_file,
+                                                 options, point, cache_dir)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        cycles = dict(executor.map(simulate, selection['points']))
+    estimate = extrapolate_cpi(selection, cycles)
+
+    bound = estimate['error_bound']
+    print(f"Estimated CPI: {estimate['cpi']:.4f}"
+          + (f" +/- {bound:.4f} ({estimate['confidence']:.0%} confidence)" if bound is not None else
+             " (no error bound: sample two or more intervals per cluster)"))
+    print(f"Estimated cycles: {estimate['cycles']:.0f} for {estimate['instructions']} instructions")
+
+    with open(os.path.join(output_dir, "sampling.json"), 'w') as f:
+        json.dump({'selection': selection, 'cycles': cycles, 'estimate': estimate}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming VCD to SAIF switching activity converter.
+"""
+
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.activity import read_vcd_activity, vcd_to_saif, switching_activity
+
+VCD = """$date today $end
+$timescale 1ps $end
+$scope module universal_testbench $end
+$var wire 1 ! clk $end
+$scope module dut $end
+$var wire 1 ! clk $end
+$var wire 4 " data [3:0] $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+bx "
+$end
+#5
+1!
+b101 "
+#10
+0!
+b1101 "
+#20
+"""
+
+@pytest.fixture
+def vcd_file(tmp_path):
+    path = tmp_path / "sim.vcd"
+    path.write_text(VCD)
+    return str(path)
+
+def test_toggle_counts_and_durations(vcd_file):
+    """Test toggle counts and time at 0/1/X for scalar and vector nets."""
+    activity = read_vcd_activity(vcd_file)
+    assert activity["timescale"] == "1 ps"
+    assert activity["duration"] == 20
+
+    nets = {(".".join(path), bit): net
+            for path, _, bits, nets in activity["declarations"]
+            for bit, net in zip(bits, nets)}
+    clk = nets[("universal_testbench", "clk")]
+    assert (clk.t0, clk.t1, clk.tx, clk.tc) == (15, 5, 0, 2)
+
+    # data[3]: x until 5, 0 until 10, then 1
+    data3 = nets[("universal_testbench.dut", "data[3]")]
+    assert (data3.t0, data3.t1, data3.tx, data3.tc, data3.ig) == (5, 10, 5, 1, 1)
+    data1 = nets[("universal_testbench.dut", "data[1]")]
+    assert (data1.t0, data1.t1, data1.tc) == (15, 0, 0)
+
+def test_saif_scope_filter(vcd_file):
+    """Test that the scope filter keeps only nets below the scope."""
+    saif = Path(vcd_to_saif(vcd_file, scope="universal_testbench.dut")).read_text()
+    assert saif.startswith("(SAIFILE")
+    assert "(DURATION 20)" in saif
+    assert "(INSTANCE dut" in saif
+    assert "(data\\[3\\] (T0 5) (T1 10) (TX 5) (TC 1) (IG 1))" in saif
+    # The testbench-level clk is outside the scope
+    assert saif.count("(clk ") == 1
+
+def test_switching_activity_reuses_saif(vcd_file):
+    """Test that a VCD is converted once and other files pass through."""
+    saif = switching_activity(vcd_file)
+    assert saif.endswith("sim.saif")
+    mtime = os.path.getmtime(saif)
+    assert switching_activity(vcd_file) == saif
+    assert os.path.getmtime(saif) == mtime
+    assert switching_activity(saif) == saif
+    assert switching_activity(None) is None
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
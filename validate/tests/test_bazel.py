@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched Bazel build utilities.
+"""
+
+import os
+import sys
+import stat
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.bazel import bazel_build_many
+
+FAKE_BAZEL = """#!/bin/sh
+echo "$@" >> calls.log
+if [ "$1" = "info" ]; then
+    echo "$PWD/execroot/_main"
+fi
+if [ "$1" = "cquery" ]; then
+    echo "@@//design/software/fft:executable bazel-out/bin/fft.hex"
+    echo "@@//design/software/crypto:executable bazel-out/bin/crypto.hex"
+fi
+exit 0
+"""
+
+@pytest.fixture
+def fake_bazel(tmp_path, monkeypatch):
+    """Put a fake bazel on PATH and run from a scratch workspace."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    bazel = bin_dir / "bazel"
+    bazel.write_text(FAKE_BAZEL)
+    bazel.chmod(bazel.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+    # Outputs live under the execution root only: .bazelrc moves the bazel-out link to output/
+    bin_out = tmp_path / "execroot" / "_main" / "bazel-out" / "bin"
+    bin_out.mkdir(parents=True)
+    (bin_out / "fft.hex").write_text("00000013\n")
+    return tmp_path
+
+def test_bazel_build_many_single_invocation(fake_bazel):
+    """Test that all targets are built at once and outputs are resolved per target."""
+    targets = [
+        "//design/software/fft:executable",
+        "//design/software/crypto:executable",
+    ]
+    results = bazel_build_many(targets, config="--config=picorv32")
+
+    calls = (fake_bazel / "calls.log").read_text().splitlines()
+    assert len(calls) == 3
+    assert calls[0].startswith("build --keep_going --config=picorv32")
+    assert calls[1].startswith("cquery --config=picorv32 --keep_going")
+    assert calls[2] == "info --config=picorv32 execution_root"
+
+    fft = results["//design/software/fft:executable"]
+    assert fft["success"]
+    assert fft["path"] == str(fake_bazel / "execroot" / "_main" / "bazel-out" / "bin" / "fft.hex")
+
+    # crypto.hex was never produced, so that target is reported as failed
+    assert not results["//design/software/crypto:executable"]["success"]
+
+PARTIAL_BAZEL = """#!/bin/sh
+if [ "$1" = "info" ]; then
+    echo "$PWD/execroot/_main"
+    exit 0
+fi
+if [ "$1" = "cquery" ]; then
+    echo "@@//design/software/fft:executable bazel-out/bin/fft.hex"
+    echo "@@//design/software/crypto:executable bazel-out/bin/crypto.hex"
+    echo "ERROR: no such package 'design/software/missing': BUILD file not found" >&2
+    exit 3
+fi
+echo "ERROR: no such package 'design/software/missing': BUILD file not found" >&2
+echo "ERROR: /ws/design/software/crypto/BUILD.bazel:3:10: Linking //design/software/crypto:executable failed" >&2
+exit 1
+"""
+
+def test_bazel_build_many_partial_failure(fake_bazel):
+    """Test that one unresolvable target only fails itself, with its own error."""
+    (fake_bazel / "bin" / "bazel").write_text(PARTIAL_BAZEL)
+    results = bazel_build_many([
+        "//design/software/fft:executable",
+        "//design/software/crypto:executable",
+        "//design/software/missing:executable",
+    ])
+
+    assert results["//design/software/fft:executable"]["success"]
+    assert "error" not in results["//design/software/fft:executable"]
+
+    crypto = results["//design/software/crypto:executable"]
+    assert not crypto["success"]
+    assert crypto["error"].startswith("ERROR: /ws/design/software/crypto/BUILD.bazel")
+    assert "missing" not in crypto["error"]
+
+    missing = results["//design/software/missing:executable"]
+    assert not missing["success"]
+    assert "no such package 'design/software/missing'" in missing["error"]
+    assert "crypto" not in missing["error"]
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for ISS checkpoints and the testbench restore stub.
+
+The stub is checked by running it on the ISS the way the testbench runs it
+on a core: memory image loaded, stub written over the reset vector, and the
+original words put back when the checkpoint PC is fetched.
+"""
+
+import sys
+import json
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.iss import InstructionSetSimulator
+from build.flows.utils.profiling import load_program_image
+from build.flows.utils.testbench import CHECKPOINT_BOOT, CHECKPOINT_MEMORY, testbench_plusargs
+from build.flows.utils.checkpoint import (
+    CHECKPOINT_STATE, STUB_BYTES, advance, load_checkpoint, restore_stub, take_checkpoint,
+    write_memory_image
+)
+
+from test_iss import ECALL, addi, jal, lui, r_type, s_type, b_type, write_hex
+
+def far_program(count):
+    """Jump over the stub region, set a few registers and run a store loop."""
+    words = [jal(0, 0x400)] + [0] * 255
+    words += [
+        lui(5, 0xDEADC),                # 400
+        addi(5, 5, -0x111),             # 404: x5 = 0xdeadbeef
+        lui(6, 0x80000),                # 408: x6 = 0x80000000
+        addi(7, 0, -1),                 # 40c: x7 = -1
+        addi(11, 0, count),             # 410
+        r_type(0, 11, 10, 0, 10),       # 414: x10 += x11
+        s_type(0x700, 10, 0, 2),        # 418: sw x10, 0x700(x0)
+        addi(11, 11, -1),               # 41c
+        b_type(-12, 0, 11, 1),          # 420: bne x11, x0, 414
+        ECALL,                          # 424
+    ]
+    return words
+
+def boot(directory, memory_size=0x10000):
+    """Start an ISS from a checkpoint the way the testbench does."""
+    iss = InstructionSetSimulator(memory_size)
+    iss.write_memory(0, load_program_image(str(Path(directory) / CHECKPOINT_MEMORY)))
+    values = [int(token, 16) for token in (Path(directory) / CHECKPOINT_BOOT).read_text().split()]
+    count, pc, pairs = values[0], values[1], values[2:]
+    assert len(pairs) == 2 * count
+
+    saved = {}
+    for address, word in zip(pairs[::2], pairs[1::2]):
+        saved[address] = bytes(iss.memory[address:address + 4])
+        iss.write_memory(address, word.to_bytes(4, "little"))
+    assert iss.run(10_000, stop_at=pc) == "stop_pc"
+    for address, data in saved.items():
+        iss.write_memory(address, data)
+    return iss
+
+@pytest.mark.parametrize("instructions, pc", [(500, None), (None, 0x418)])
+def test_checkpoint_restores_the_run(tmp_path, instructions, pc):
+    """Test that a run booted from a checkpoint continues like the original."""
+    reference = InstructionSetSimulator()
+    reference.load(write_hex(tmp_path / "program.hex", far_program(300)))
+    reference.run()
+
+    iss = InstructionSetSimulator()
+    iss.load(write_hex(tmp_path / "program.hex", far_program(300)))
+    state = take_checkpoint(iss, tmp_path / "checkpoint", instructions, pc, metadata={'name': 'loop'})
+    assert state['instructions'] >= (instructions or 0)
+    assert state['pc'] == (pc or state['pc'])
+    assert state['metadata'] == {'name': 'loop'}
+    assert json.loads((tmp_path / "checkpoint" / CHECKPOINT_STATE).read_text())['pc'] == state['pc']
+
+    booted = boot(tmp_path / "checkpoint")
+    assert booted.pc == state['pc']
+    assert list(booted.x) == state['registers']
+    assert booted.memory[:0x1000] == iss.memory[:0x1000]
+
+    assert booted.run() == "ecall"
+    assert list(booted.x) == list(reference.x)
+    assert booted.memory[:0x1000] == reference.memory[:0x1000]
+    # The near stub runs each of its instructions once
+    stub = restore_stub(state['registers'], state['pc'])
+    assert state['instructions'] + booted.retired - len(stub) == reference.retired
+
+def test_load_checkpoint_into_the_iss(tmp_path):
+    """Test that load_checkpoint continues the functional run exactly."""
+    reference = InstructionSetSimulator()
+    reference.load(write_hex(tmp_path / "program.hex", far_program(100)))
+    reference.run()
+
+    iss = InstructionSetSimulator()
+    iss.load(write_hex(tmp_path / "program.hex", far_program(100)))
+    take_checkpoint(iss, tmp_path / "checkpoint", instructions=200)
+
+    restored = InstructionSetSimulator()
+    state = load_checkpoint(tmp_path / "checkpoint", restored)
+    assert restored.retired == state['instructions']
+    assert restored.run() == "ecall"
+    assert restored.retired == reference.retired
+    assert list(restored.x) == list(reference.x)
+
+def test_far_checkpoint_uses_a_trampoline():
+    """Test the stub for a PC out of jal range: registers, x1 and the jump."""
+    registers = [0] + [(0x9E3779B9 * rd) & 0xFFFFFFFF for rd in range(1, 32)]
+    pc = 0x300000
+    stub = restore_stub(registers, pc)
+    assert any(address == pc - 8 for address, _ in stub)
+    assert all(address < STUB_BYTES for address, _ in stub if address < pc - 8)
+
+    iss = InstructionSetSimulator(pc + 0x100)
+    iss.write_memory(pc, ECALL.to_bytes(4, "little"))
+    for address, word in stub:
+        iss.write_memory(address, word.to_bytes(4, "little"))
+    assert iss.run(1000, stop_at=pc) == "stop_pc"
+    assert list(iss.x) == registers
+
+def test_checkpoint_position_errors(tmp_path):
+    """Test the positions a checkpoint cannot be taken at."""
+    with pytest.raises(ValueError):
+        restore_stub([0] * 32, 0x40)
+
+    iss = InstructionSetSimulator()
+    iss.load(write_hex(tmp_path / "program.hex", far_program(10)))
+    with pytest.raises(ValueError):
+        advance(iss, instructions=10, pc=0x418)
+    with pytest.raises(ValueError):
+        advance(iss, pc=0x10)
+    with pytest.raises(RuntimeError):
+        advance(iss, instructions=10_000)
+
+def test_sparse_memory_image(tmp_path):
+    """Test that the memory image skips zero runs and loads back the same bytes."""
+    memory = bytearray(0x1000)
+    memory[0:8] = bytes(range(1, 9))
+    memory[0xF00:0xF03] = b"\xaa\xbb\xcc"
+    write_memory_image(tmp_path / "memory.hex", memory)
+
+    text = (tmp_path / "memory.hex").read_text().split()
+    assert text == ["@0", "04030201", "08070605", "@3c0", "00ccbbaa"]
+    image = load_program_image(str(tmp_path / "memory.hex"))
+    assert image == memory[:len(image)] and not any(memory[len(image):])
+
+def test_checkpoint_plusargs(tmp_path):
+    """Test the testbench plusargs of a checkpoint directory."""
+    assert testbench_plusargs({'checkpoint': str(tmp_path), 'end_on': []}) == [
+        f"+checkpoint_memory={tmp_path / CHECKPOINT_MEMORY}",
+        f"+checkpoint_boot={tmp_path / CHECKPOINT_BOOT}",
+    ]
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
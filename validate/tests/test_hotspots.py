@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the PC trace hotspot analyzer.
+"""
+
+import sys
+import struct
+import pytest
+import numpy as np
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.hotspots import (
+    read_elf_symbols, read_pc_trace, flat_profile, basic_block_profile, analyze_pc_trace
+)
+from build.flows.utils.testbench import testbench_plusargs
+
+# (name, address, size, type) of the test program's symbols
+SYMBOLS = [("_start", 0x0, 0, 0), ("fft", 0x100, 0x40, 2), ("bit_reverse", 0x140, 0x20, 2), ("$x", 0x100, 0, 0)]
+
+def write_elf32(path, symbols):
+    """Write a minimal RV32 ELF file holding only a symbol table."""
+    strtab = b"\0"
+    symtab = bytes(16)
+    for name, address, size, sym_type in symbols:
+        symtab += struct.pack("<IIIBBH", len(strtab), address, size, (1 << 4) | sym_type, 0, 1)
+        strtab += name.encode() + b"\0"
+    strtab += bytes(-len(strtab) % 4)
+
+    strtab_offset = 52
+    symtab_offset = strtab_offset + len(strtab)
+    shoff = symtab_offset + len(symtab)
+    header = b"\x7fELF" + bytes([1, 1, 1]) + bytes(9) + struct.pack(
+        "<HHIIIIIHHHHHH", 2, 0xF3, 1, 0, 0, shoff, 0, 52, 0, 0, 40, 3, 0)
+    sections = (bytes(40) +
+                struct.pack("<IIIIIIIIII", 0, 3, 0, 0, strtab_offset, len(strtab), 0, 0, 1, 0) +
+                struct.pack("<IIIIIIIIII", 0, 2, 0, 0, symtab_offset, len(symtab), 1, 1, 4, 16))
+    path.write_bytes(header + strtab + symtab + sections)
+
+def write_trace(path, records):
+    path.write_bytes(np.array(records, dtype="<u4").tobytes())
+
+# fft loops twice over 0x100-0x108, calling bit_reverse (0x140-0x144) each time
+TRACE = [
+    (0x0, 1), (0x4, 1),
+    (0x100, 1), (0x104, 3), (0x108, 1), (0x140, 3), (0x144, 1),
+    (0x100, 1), (0x104, 3), (0x108, 1), (0x140, 3), (0x144, 1),
+    (0x300, 2),
+]
+
+def test_read_elf_symbols(tmp_path):
+    """Test that code symbols are read and mapping symbols skipped."""
+    write_elf32(tmp_path / "fft.elf", SYMBOLS)
+    addresses, sizes, names = read_elf_symbols(tmp_path / "fft.elf")
+    assert list(names) == ["_start", "fft", "bit_reverse"]
+    assert list(addresses) == [0x0, 0x100, 0x140]
+    assert list(sizes) == [0, 0x40, 0x20]
+
+def test_flat_profile(tmp_path):
+    """Test that cycles are attributed to the enclosing function."""
+    write_elf32(tmp_path / "fft.elf", SYMBOLS)
+    pcs, cycles = np.array(TRACE).T
+    profile = flat_profile(pcs, cycles, read_elf_symbols(tmp_path / "fft.elf"))
+    assert [(entry["symbol"], entry["cycles"]) for entry in profile] == [
+        ("fft", 10), ("bit_reverse", 8), ("0x00000300", 2), ("_start", 2)
+    ]
+    assert profile[0]["pcs"] == 3
+    assert sum(entry["share"] for entry in profile) == pytest.approx(1.0)
+
+def test_basic_block_profile():
+    """Test that straight-line runs are aggregated by their start and end PCs."""
+    pcs, cycles = np.array(TRACE).T
+    blocks = basic_block_profile(pcs, cycles)
+    assert [(b["start"], b["end"], b["executions"], b["cycles"], b["instructions"]) for b in blocks] == [
+        ("0x00000100", "0x00000108", 2, 10, 3),
+        ("0x00000140", "0x00000144", 2, 8, 2),
+        ("0x00000000", "0x00000004", 1, 2, 2),
+        ("0x00000300", "0x00000300", 1, 2, 1),
+    ]
+    assert blocks[-1]["symbol"] == "0x00000300"
+    assert basic_block_profile(pcs, cycles, top=1)[0]["start"] == "0x00000100"
+
+def test_analyze_pc_trace(tmp_path):
+    """Test the analysis of a trace written by the testbench."""
+    write_trace(tmp_path / "pc_trace.bin", TRACE)
+    write_elf32(tmp_path / "fft.elf", SYMBOLS)
+    pcs, cycles = read_pc_trace(tmp_path / "pc_trace.bin")
+    assert list(pcs[:3]) == [0x0, 0x4, 0x100]
+
+    hotspots = analyze_pc_trace(str(tmp_path), tmp_path / "fft.elf", top=2)
+    assert hotspots["cycles"] == 22
+    assert [entry["symbol"] for entry in hotspots["flat"]] == ["fft", "bit_reverse"]
+    assert hotspots["blocks"][0]["symbol"] == "fft"
+    assert analyze_pc_trace(str(tmp_path / "missing")) is None
+
+def test_pc_trace_plusarg():
+    """Test that the PC trace plusarg cannot be mistaken for +trace."""
+    plusargs = testbench_plusargs({"pc_trace": True})
+    assert "+pc_trace" in plusargs
+    assert not [arg for arg in plusargs if arg.startswith("+trace")]
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the flow entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime``.
+Heavy dependencies must not be loaded at import time, and the total import
+time must stay within a generous budget so that startup regressions show up.
+"""
+
+import os
+import ast
+import sys
+import importlib
+import subprocess
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "build"))
+
+# Dependencies that may only be imported inside the stages that use them
+HEAVY_MODULES = {"prefect", "matplotlib", "pandas", "numpy", "pyarrow"}
+
+# Total import time allowed per entry point, in microseconds
+IMPORT_BUDGET_US = 1_000_000
+
+FLOW_MODULES = [
+    "flows.software_flow",
+    "flows.simulation_flow",
+    "flows.synthesis_flow",
+    "flows.analysis_flow",
+    "flows.verification_flow",
+    "flows.main_study_flow",
+]
+
+def measure_imports(args):
+    """
+    Run Python with -X importtime and collect the imported modules.
+
+    Args:
+        args: Interpreter arguments after -X importtime
+
+    Returns:
+        Tuple of (set of imported top-level packages, total import time in us)
+    """
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT / "build"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    packages = set()
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        # Top-level imports are not indented; their cumulative times add up to the total
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return packages, total
+
+@pytest.mark.parametrize("module", FLOW_MODULES)
+def test_flow_import_budget(module):
+    """Test that importing a flow module stays light."""
+    packages, total = measure_imports(["-c", f"import {module}"])
+    assert not packages & HEAVY_MODULES, f"{module} imports {sorted(packages & HEAVY_MODULES)}"
+    assert total < IMPORT_BUDGET_US, f"{module} took {total / 1000:.0f} ms to import"
+
+def module_level_imports(tree):
+    """Yield the modules imported outside of function and class bodies."""
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            yield node.module or ""
+        nodes.extend(ast.iter_child_nodes(node))
+
+@pytest.mark.parametrize("module", FLOW_MODULES)
+def test_flow_reaches_prefect_through_lazy(module):
+    """Test that a flow module decorates its stages with flows.utils.lazy, not Prefect.
+
+    Unlike the import-time check, this holds whether or not Prefect is installed.
+    """
+    imported = importlib.import_module(module)
+    tree = ast.parse(Path(imported.__file__).read_text())
+    prefect_imports = [name for name in module_level_imports(tree) if name.split(".")[0] == "prefect"]
+    assert not prefect_imports, f"{module} imports {prefect_imports} at module level"
+
+    # Flow modules import the utilities as flows.utils or build.flows.utils
+    for name in ("task", "flow"):
+        if hasattr(imported, name):
+            assert getattr(imported, name).__module__.endswith("flows.utils.lazy"), \
+                f"{module}.{name} is not the deferred decorator"
+
+    decorated = [
+        node.name for node in tree.body if isinstance(node, ast.FunctionDef)
+        and any(ast.unparse(d).split("(")[0] in ("task", "flow") for d in node.decorator_list)
+    ]
+    for name in decorated:
+        kind = type(getattr(imported, name))
+        assert kind.__name__ == "_Deferred" and kind.__module__.endswith("flows.utils.lazy"), \
+            f"{module}.{name} is not deferred"
+
+def test_orchestration_help_budget():
+    """Test that orchestration.py --help does not load heavy dependencies."""
+    packages, total = measure_imports(["build/scripts/orchestration.py", "--help"])
+    assert not packages & HEAVY_MODULES, f"--help imports {sorted(packages & HEAVY_MODULES)}"
+    assert total < IMPORT_BUDGET_US, f"--help took {total / 1000:.0f} ms of imports"
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Tests for the Python RV32IM instruction-set simulator.
+
+Programs are assembled here from the instruction formats, so the tests do
+not need a RISC-V toolchain.
+"""
+
+import sys
+import struct
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.iss import (
+    InstructionSetSimulator, compare_retire_trace, read_elf_segments, run_iss
+)
+
+def r_type(funct7, rs2, rs1, funct3, rd, opcode=0x33):
+    return funct7 << 25 | rs2 << 20 | rs1 << 15 | funct3 << 12 | rd << 7 | opcode
+
+def i_type(imm, rs1, funct3, rd, opcode=0x13):
+    return (imm & 0xFFF) << 20 | rs1 << 15 | funct3 << 12 | rd << 7 | opcode
+
+def s_type(imm, rs2, rs1, funct3):
+    imm &= 0xFFF
+    return (imm >> 5) << 25 | rs2 << 20 | rs1 << 15 | funct3 << 12 | (imm & 31) << 7 | 0x23
+
+def b_type(offset, rs2, rs1, funct3):
+    offset &= 0x1FFF
+    return ((offset >> 12) << 31 | ((offset >> 5) & 0x3F) << 25 | rs2 << 20 | rs1 << 15 |
+            funct3 << 12 | ((offset >> 1) & 0xF) << 8 | ((offset >> 11) & 1) << 7 | 0x63)
+
+def jal(rd, offset):
+    offset &= 0x1FFFFF
+    return ((offset >> 20) << 31 | ((offset >> 1) & 0x3FF) << 21 | ((offset >> 11) & 1) << 20 |
+            ((offset >> 12) & 0xFF) << 12 | rd << 7 | 0x6F)
+
+def lui(rd, imm):
+    return (imm & 0xFFFFF) << 12 | rd << 7 | 0x37
+
+def addi(rd, rs1, imm):
+    return i_type(imm, rs1, 0, rd)
+
+ECALL = 0x00000073
+
+def write_hex(path, words):
+    path.write_text("".join(f"{word:08x}\n" for word in words))
+    return str(path)
+
+def run_words(tmp_path, words, **kwargs):
+    iss = InstructionSetSimulator(**kwargs)
+    iss.load(write_hex(tmp_path / "program.hex", words))
+    return iss, iss.run(kwargs.get('max_instructions', 1_000_000))
+
+def sum_loop(count):
+    """Sum 1..count into x10, then ecall."""
+    return [
+        addi(10, 0, 0),                 # 0: x10 = 0
+        addi(11, 0, count),             # 4: x11 = count
+        r_type(0, 11, 10, 0, 10),       # 8: x10 += x11
+        addi(11, 11, -1),               # c: x11 -= 1
+        b_type(-8, 0, 11, 1),           # 10: bne x11, x0, 8
+        ECALL,                          # 14
+    ]
+
+def test_loop_counts_instructions(tmp_path):
+    """Test a counted loop: result, instruction count and halt reason."""
+    iss, reason = run_words(tmp_path, sum_loop(100))
+    assert reason == "ecall"
+    assert iss.x[10] == 5050
+    assert iss.retired == 2 + 3 * 100 + 1
+    assert iss.pc == 0x14
+
+def test_uart_output(tmp_path):
+    """Test that byte stores to the UART register are collected."""
+    words = [lui(5, 0x02000)]
+    for char in b"Hi\n":
+        words += [addi(6, 0, char), s_type(0, 6, 5, 0)]
+    words.append(jal(0, 0))
+    iss, reason = run_words(tmp_path, words)
+    assert reason == "self_loop"
+    assert bytes(iss.uart) == b"Hi\n"
+
+def test_loads_stores_and_arithmetic(tmp_path):
+    """Test sign extension, shifts, comparisons and M-extension corner cases."""
+    words = [
+        addi(1, 0, 0x100),              # x1 = data pointer
+        addi(2, 0, -2),                 # x2 = 0xfffffffe
+        s_type(0, 2, 1, 2),             # sw x2, 0(x1)
+        i_type(0, 1, 0, 3, 0x03),       # lb x3, 0(x1)
+        i_type(0, 1, 4, 4, 0x03),       # lbu x4, 0(x1)
+        i_type(2, 1, 1, 5, 0x03),       # lh x5, 2(x1)
+        i_type(2, 1, 5, 6, 0x03),       # lhu x6, 2(x1)
+        i_type(0x400 | 1, 2, 5, 7),     # srai x7, x2, 1
+        i_type(1, 2, 5, 8),             # srli x8, x2, 1
+        r_type(0, 0, 2, 2, 9),          # slt x9, x2, x0
+        r_type(0, 0, 2, 3, 12),         # sltu x12, x2, x0
+        r_type(1, 0, 2, 4, 13),         # div x13, x2, x0 (divide by zero)
+        r_type(1, 0, 2, 6, 14),         # rem x14, x2, x0
+        addi(15, 0, 3),
+        r_type(1, 15, 2, 4, 16),        # div x16, x2, x15 (-2 / 3 rounds to 0)
+        r_type(1, 15, 2, 6, 17),        # rem x17, x2, x15
+        r_type(1, 2, 2, 3, 18),         # mulhu x18, x2, x2
+        r_type(1, 2, 2, 1, 19),         # mulh x19, x2, x2
+        ECALL,
+    ]
+    iss, reason = run_words(tmp_path, words)
+    x = iss.x
+    assert reason == "ecall"
+    assert (x[3], x[4], x[5], x[6]) == (0xFFFFFFFE, 0xFE, 0xFFFFFFFF, 0xFFFF)
+    assert (x[7], x[8], x[9], x[12]) == (0xFFFFFFFF, 0x7FFFFFFF, 1, 0)
+    assert (x[13], x[14], x[16], x[17]) == (0xFFFFFFFF, 0xFFFFFFFE, 0, 0xFFFFFFFE)
+    assert (x[18], x[19]) == (0xFFFFFFFC, 0)
+    assert x[0] == 0
+
+def test_tohost_and_faults(tmp_path):
+    """Test the tohost mailbox and an access outside memory."""
+    words = [addi(5, 0, 0x200), addi(6, 0, 7), s_type(0, 6, 5, 2), ECALL]
+    iss, reason = run_words(tmp_path, words, tohost=0x200)
+    assert (reason, iss.tohost_value, iss.retired) == ("tohost", 7, 3)
+
+    words = [lui(5, 0x40000), i_type(0, 5, 2, 6, 0x03), ECALL]
+    iss, reason = run_words(tmp_path, words)
+    assert (reason, iss.pc, iss.retired) == ("load_fault", 4, 1)
+
+    iss, reason = run_words(tmp_path, [addi(1, 0, 1), 0xFFFFFFFF])
+    assert (reason, iss.pc, iss.retired) == ("illegal_instruction", 4, 1)
+
+def test_instruction_limit_and_resume(tmp_path):
+    """Test that a run stopped at the limit resumes where it left off."""
+    iss = InstructionSetSimulator()
+    iss.load(write_hex(tmp_path / "program.hex", sum_loop(1000)))
+    assert iss.run(100) == "max_instructions"
+    assert 100 <= iss.retired < 100 + 3
+    assert iss.run() == "ecall"
+    assert iss.x[10] == 500500
+    assert iss.retired == 2 + 3 * 1000 + 1
+
+def test_instret_csr(tmp_path):
+    """Test that rdinstret reads the instructions retired before it."""
+    words = [addi(1, 0, 1), addi(1, 1, 1), i_type(0xC02, 0, 2, 10, 0x73), ECALL]
+    iss, reason = run_words(tmp_path, words)
+    assert reason == "ecall" and iss.x[10] == 2
+
+def test_fence_i_makes_stores_visible(tmp_path):
+    """Test self-modifying code: the patched instruction runs after FENCE.I."""
+    patched = addi(10, 0, 42)
+    words = [
+        lui(5, (patched + 0x800) >> 12),
+        addi(5, 5, ((patched & 0xFFF) ^ 0x800) - 0x800),
+        s_type(0x10, 5, 0, 2),          # sw x5, 0x10(x0)
+        0x0000100F,                     # fence.i
+        addi(10, 0, 1),                 # 0x10: replaced by addi x10, x0, 42
+        ECALL,
+    ]
+    iss, reason = run_words(tmp_path, words)
+    assert reason == "ecall" and iss.x[10] == 42
+
+def make_elf(path, segments, entry):
+    """Write a minimal ELF32 executable with one PT_LOAD per (address, data, memsz)."""
+    header_size, phentsize = 52, 32
+    offset = header_size + phentsize * len(segments)
+    program_headers = b""
+    payload = b""
+    for address, data, memsz in segments:
+        program_headers += struct.pack("<IIIIIIII", 1, offset + len(payload), address, address,
+                                       len(data), memsz, 5, 4)
+        payload += data
+    header = struct.pack("<4sBBBB8xHHIIIIIHHHHHH", b"\x7fELF", 1, 1, 1, 0, 2, 0xF3, 1,
+                         entry, header_size, 0, 0, header_size, phentsize, len(segments), 40, 0, 0)
+    path.write_bytes(header + program_headers + payload)
+    return str(path)
+
+def test_elf_entry_and_segments(tmp_path):
+    """Test that ELF segments load at their address and the run starts at the entry."""
+    code = struct.pack("<3I", lui(5, 0), i_type(0x400, 5, 2, 10, 0x03), ECALL)
+    elf = make_elf(tmp_path / "program.elf", [(0x80, code, len(code)), (0x400, b"\x2a\0\0\0", 8)], 0x80)
+
+    segments, entry = read_elf_segments(elf)
+    assert entry == 0x80 and [(a, len(d)) for a, d in segments] == [(0x80, 12), (0x400, 8)]
+
+    stats = run_iss(elf)
+    assert stats["halt_reason"] == "ecall"
+    assert stats["instructions"] == 3
+    assert stats["pc"] == 0x88
+
+    iss = InstructionSetSimulator()
+    assert iss.load(elf) == 0x80
+    iss.run()
+    assert iss.x[10] == 42
+
+def test_run_iss_reads_core_json(tmp_path):
+    """Test that the UART address and memory size come from core.json."""
+    core = tmp_path / "core"
+    core.mkdir()
+    (core / "core.json").write_text('{"memory": {"size": "128K"}, "uart": {"base_address": "0x10000000"}}')
+    words = [lui(5, 0x10000), addi(6, 0, ord("A")), s_type(0, 6, 5, 0),
+             lui(7, 0x1F), s_type(0, 6, 7, 2), ECALL]
+    stats = run_iss(write_hex(tmp_path / "program.hex", words), str(core))
+    assert stats["halt_reason"] == "ecall"
+    assert stats["uart"] == "A"
+
+def test_retire_trace_reference(tmp_path):
+    """Test the retired PCs and their comparison with an RTL trace."""
+    iss, _ = run_words(tmp_path, sum_loop(2), trace=True)
+    pcs = list(iss.retired_pcs())
+    assert pcs == [0x0, 0x4, 0x8, 0xC, 0x10, 0x8, 0xC, 0x10, 0x14]
+    assert len(pcs) == iss.retired
+
+    # An RTL trace holds a PC for several cycles of a multi-cycle core
+    rtl = [pc for pc in pcs for _ in range(3)]
+    assert compare_retire_trace(pcs, rtl) is None
+    rtl[9:12] = [0x20] * 3
+    assert compare_retire_trace(pcs, rtl) == {"index": 3, "expected": 0xC, "actual": 0x20}
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the binary to memory image converter (make_hex.py).
+"""
+
+import sys
+import random
+import importlib.util
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+MAKE_HEX = PROJECT_ROOT / "design/software/hello-world/make_hex.py"
+
+@pytest.fixture(scope="module")
+def make_hex():
+    spec = importlib.util.spec_from_file_location("make_hex", MAKE_HEX)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def reference_hex(data):
+    """The original per-word conversion."""
+    data += bytes(-len(data) % 4)
+    return "".join("{:02x}{:02x}{:02x}{:02x}\n".format(data[i + 3], data[i + 2], data[i + 1], data[i])
+                   for i in range(0, len(data), 4))
+
+def load_readmemh(text):
+    """Interpret a readmemh file as {word address: value}."""
+    memory = {}
+    address = 0
+    for token in text.split():
+        if token.startswith("@"):
+            address = int(token[1:], 16)
+        else:
+            memory[address] = int(token, 16)
+            address += 1
+    return memory
+
+@pytest.fixture
+def image(tmp_path):
+    rng = random.Random(0)
+    data = (bytes(rng.randrange(256) for _ in range(1001)) + bytes(300) +
+            bytes(rng.randrange(1, 256) for _ in range(70)) + bytes(4096) + b"\x13\x00\x00")
+    path = tmp_path / "program.elf.bin"
+    path.write_bytes(data)
+    return path, data
+
+@pytest.mark.parametrize("chunk_bytes", [64, 1 << 20])
+def test_hex_matches_word_loop(make_hex, image, tmp_path, chunk_bytes):
+    """Test that the chunked conversion matches the per-word conversion."""
+    path, data = image
+    output = tmp_path / "program.hex"
+    with output.open("w") as outfile:
+        make_hex.write_hex(make_hex.read_chunks(path, chunk_bytes), outfile)
+    assert output.read_text() == reference_hex(data)
+
+@pytest.mark.parametrize("chunk_bytes", [64, 1 << 20])
+def test_sparse_skips_zero_regions(make_hex, image, tmp_path, chunk_bytes):
+    """Test that the sparse format loads to the same memory contents."""
+    path, data = image
+    output = tmp_path / "program.hex"
+    with output.open("w") as outfile:
+        make_hex.write_sparse(make_hex.read_chunks(path, chunk_bytes), outfile, base=0x100)
+
+    sparse = load_readmemh(output.read_text())
+    dense = {address + 0x40: value for address, value in load_readmemh(reference_hex(data)).items()}
+    assert all(dense[address] == value for address, value in sparse.items())
+    assert all(address in sparse for address, value in dense.items() if value)
+    # Only the two long zero runs are skipped
+    assert output.read_text().count("@") == 3
+    assert len(sparse) < len(dense) - 1000
+
+def test_binary_is_padded_little_endian(make_hex, image, tmp_path):
+    """Test that the binary format is the input padded to whole words."""
+    path, data = image
+    output = tmp_path / "program.bin"
+    make_hex.convert(str(path), str(output), "bin")
+    assert output.read_bytes() == data + bytes(-len(data) % 4)
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached, validated study plan.
+"""
+
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.plan import StudyPlan, load_study_plan
+
+CONFIG = """cores:
+  - simple_core
+  - picorv32
+benchmarks:
+  - fft
+  - crypto
+pdks:
+  - sky130
+cores_config:
+  simple_core:
+    simulator: verilator
+    options:
+      max_cycles: 10000
+"""
+
+def test_plan_expands_matrix_with_stable_keys():
+    """Test that the matrix is expanded in order and cell keys track the configuration."""
+    config = {"cores": ["simple_core", "picorv32"], "benchmarks": ["fft", "crypto"], "pdks": ["sky130"]}
+    plan = StudyPlan(config)
+    assert [(c.core, c.benchmark, c.pdk) for c in plan.cells] == [
+        ("simple_core", "fft", "sky130"), ("simple_core", "crypto", "sky130"),
+        ("picorv32", "fft", "sky130"), ("picorv32", "crypto", "sky130"),
+    ]
+    assert len({cell.key for cell in plan.cells}) == 4
+    assert [c.key for c in StudyPlan(dict(config)).cells] == [c.key for c in plan.cells]
+
+    # Changing one core's configuration only changes that core's cells
+    changed = StudyPlan({**config, "cores_config": {"picorv32": {"options": {"max_cycles": 5}}}})
+    assert changed.select(core="simple_core") == plan.select(core="simple_core")
+    assert all(a.key != b.key for a, b in zip(changed.select(core="picorv32"), plan.select(core="picorv32")))
+
+@pytest.mark.parametrize("config, message", [
+    ({"cores": "simple_core"}, "'cores' must be a list"),
+    ({"cores": ["a", "a"]}, "duplicates"),
+    ({"cores": ["a"], "cores_config": {"a": {"simulator": "modelsim"}}}, "unsupported simulator"),
+])
+def test_plan_validation(config, message):
+    """Test that malformed configurations are rejected when the plan is built."""
+    with pytest.raises(ValueError, match=message):
+        StudyPlan(config)
+
+def test_plan_cached_by_content(tmp_path):
+    """Test that a plan is reused until the configuration content changes."""
+    config_file = tmp_path / "study.yaml"
+    config_file.write_text(CONFIG)
+    plan = load_study_plan(str(config_file))
+    assert plan.cores == ["simple_core", "picorv32"]
+    assert plan.core_config("picorv32") == {}
+
+    # Touching the file without changing it keeps the plan
+    os.utime(config_file, (1, 1))
+    assert load_study_plan(str(config_file)) is plan
+
+    config_file.write_text(CONFIG.replace("  - crypto\n", ""))
+    replanned = load_study_plan(str(config_file))
+    assert replanned is not plan
+    assert replanned.benchmarks == ["fft"]
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the profiling port decoder.
+"""
+
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.profiling import load_program_image, region_breakdown, decode_profile
+from build.flows.utils.testbench import testbench_plusargs
+
+# A program image with the region names "fft" at 0x10 and "bit_reverse" at 0x14
+IMAGE = bytes(16) + b"fft\0bit_reverse\0" + bytes(12)
+
+def write_hex(path, data, base=None):
+    words = [data[i:i + 4][::-1].hex() for i in range(0, len(data), 4)]
+    path.write_text((f"@{base:x}\n" if base is not None else "") + "\n".join(words) + "\n")
+
+def test_load_program_image(tmp_path):
+    """Test that hex files (with @address records) and binaries load to the same bytes."""
+    write_hex(tmp_path / "program.hex", IMAGE)
+    (tmp_path / "program.bin").write_bytes(IMAGE)
+    assert load_program_image(tmp_path / "program.hex") == IMAGE
+    assert load_program_image(tmp_path / "program.bin") == IMAGE
+
+    write_hex(tmp_path / "sparse.hex", IMAGE[16:], base=4)
+    assert load_program_image(tmp_path / "sparse.hex") == IMAGE
+
+def test_nested_regions():
+    """Test inclusive and self cycles of nested and repeated regions."""
+    events = [
+        (10, 0, 1), (20, 0, 2), (50, 1, 2), (60, 0, 2), (70, 1, 2), (100, 1, 1),
+        (110, 1, 3),  # end without a start
+    ]
+    regions, unmatched = region_breakdown(events, {1: "outer", 2: "inner"})
+    assert regions["outer"] == {"calls": 1, "cycles": 90, "self_cycles": 50}
+    assert regions["inner"] == {"calls": 2, "cycles": 40, "self_cycles": 40}
+    assert unmatched == 1
+
+def test_decode_profile_names_regions(tmp_path):
+    """Test that region IDs are named from the strings in the program image."""
+    write_hex(tmp_path / "program.hex", IMAGE)
+    (tmp_path / "profile.log").write_text(
+        "100 0 00000010\n120 0 00000014\n180 1 00000014\n400 1 00000010\n500 0 00000007\n520 1 00000007\n"
+    )
+    profile = decode_profile(str(tmp_path), tmp_path / "program.hex", total_cycles=1000)
+    assert profile["regions"]["fft"]["cycles"] == 300
+    assert profile["regions"]["fft"]["share"] == 0.3
+    assert profile["regions"]["bit_reverse"]["self_cycles"] == 60
+    assert profile["regions"]["region_7"]["calls"] == 1
+    assert decode_profile(str(tmp_path / "missing")) is None
+
+def test_profile_plusarg():
+    """Test that profiling is off by default and enabled on the configured port."""
+    assert not [arg for arg in testbench_plusargs({}) if arg.startswith("+profile")]
+    assert "+profile=02000010" in testbench_plusargs({"profile": True})
+    assert "+profile=00001000" in testbench_plusargs({"profile": True, "profile_port": "0x1000"})
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
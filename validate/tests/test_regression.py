@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel regression engine.
+"""
+
+import os
+import sys
+import json
+import stat
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from validate.tools.regression import RegressionRunner
+from validate.tools.config import TestConfig
+from validate.tools.matcher import OutputMatcher
+
+FAKE_IVERILOG = """#!/bin/sh
+if [ "$1" = "-V" ]; then echo "Icarus Verilog version 0.0 (fake)"; exit 0; fi
+echo "compiled" > "$2"
+"""
+
+# The fake simulator hangs after the first line for the "slow" project
+FAKE_VVP = """#!/bin/sh
+echo "Loading program from $2"
+case "$*" in
+    *slow*) sleep 30 ;;
+esac
+echo "Simulation finished"
+"""
+
+def make_executable(path, text):
+    path.write_text(text)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Create a scratch workspace with two projects and two cores, and fake simulators on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    make_executable(bin_dir / "iverilog", FAKE_IVERILOG)
+    make_executable(bin_dir / "vvp", FAKE_VVP)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    root = tmp_path / "root"
+    testbench = root / "design/hardware/rtl/testbench/universal_tb.sv"
+    testbench.parent.mkdir(parents=True)
+    testbench.write_text("module universal_testbench; endmodule\n")
+    for core in ["core_a", "core_b"]:
+        core_dir = root / "design/hardware/rtl/cores" / core
+        core_dir.mkdir(parents=True)
+        (core_dir / "core.json").write_text(json.dumps({"name": core}))
+        (core_dir / "core.v").write_text(f"module core; // {core}\nendmodule\n")
+
+    for project, timeout in [("fast", 10000), ("slow", 500)]:
+        project_dir = root / "design/software" / project
+        project_dir.mkdir(parents=True)
+        (project_dir / "program.hex").write_text("00000013\n")
+        (project_dir / "test_config.json").write_text(json.dumps({
+            "tests": [{"expected_output": ["Simulation finished"], "timeout": timeout}]
+        }))
+    return root
+
+def test_discovery_and_matrix(workspace):
+    """Test that projects and cores are discovered and crossed."""
+    runner = RegressionRunner(workspace)
+    assert runner.list_projects() == ["fast", "slow"]
+    assert runner.list_cores() == ["core_a", "core_b"]
+
+    tests = runner.load_tests()
+    assert sorted((t.project_name, t.core_name) for t in tests) == [
+        ("fast", "core_a"), ("fast", "core_b"), ("slow", "core_a"), ("slow", "core_b")
+    ]
+    assert runner.load_tests(["fast"], ["core_b"])[0].timeout == 10000
+
+def test_run_test_checks_expected_output(workspace):
+    """Test that a test passes only when all expected strings are printed."""
+    runner = RegressionRunner(workspace, workers=2)
+    success, output, error = runner.run_test(TestConfig("fast", "core_a", ["Simulation finished"]))
+    assert success, error
+    assert "program.hex" in output
+
+    success, _, error = runner.run_test(TestConfig("fast", "core_a", ["Hello"]))
+    assert not success
+    assert "Hello" in error
+
+def test_timeout_kills_simulator(workspace):
+    """Test that a hanging simulation is killed and reported without blocking the others."""
+    runner = RegressionRunner(workspace, workers=4)
+    results = list(runner.iter_results(runner.load_tests()))
+    assert len(results) == 4
+
+    by_project = {}
+    for result in results:
+        by_project.setdefault(result.config.project_name, []).append(result)
+    assert all(r.success for r in by_project["fast"])
+    assert all(r.timed_out and not r.success for r in by_project["slow"])
+
+    assert not runner.run()
+    summary = json.loads((workspace / "output" / "regression_results.json").read_text())
+    assert sum(entry["success"] for entry in summary) == 2
+
+def test_matcher_overlapping_and_failure():
+    """Test that overlapping expectations match on one line and failures stop matching."""
+    matcher = OutputMatcher(["Hello", "Hello, World", "done"], failures=["FATAL"])
+    assert not matcher.feed("Hello, World from Rust\n")
+    assert matcher.missing == ["done"]
+    assert matcher.latencies["Hello, World"]["line"] == 1
+    assert matcher.feed("done\n")
+    assert matcher.matched
+
+    matcher = OutputMatcher(["done"], failures=["FATAL"])
+    assert matcher.feed("FATAL: illegal instruction\n")
+    assert matcher.failure == "FATAL"
+    assert not matcher.matched
+
+def test_stops_once_expectations_match(workspace):
+    """Test that the simulator is stopped as soon as every expectation has matched."""
+    runner = RegressionRunner(workspace)
+    result = runner.execute(TestConfig("slow", "core_a", ["Loading program"], timeout=10000))
+    assert result.success, result.error
+    assert not result.timed_out
+    assert result.latencies["Loading program"]["seconds"] < 5
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
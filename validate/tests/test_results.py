@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar PPA results table.
+"""
+
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.results import (
+    build_results_table, summarize_results, append_results_table, load_results_table
+)
+
+SIM_RESULTS = {
+    "simple_core": {
+        "fft": {"cycles": 2000, "instructions": 1000},
+        "crypto": {"cycles": 3000, "instructions": 1000},
+    },
+    "picorv32": {
+        "fft": {"cycles": 4000, "instructions": 1000},
+    },
+}
+
+SYNTH_RESULTS = {
+    "simple_core": {
+        "sky130": {
+            "fft": {"place_and_route": {"total_power": 10.0, "dynamic_power": 9.0, "total_area": 2.0}},
+            "crypto": {"place_and_route": {"total_power": 12.0, "dynamic_power": 11.0, "total_area": 2.0}},
+        }
+    }
+}
+
+def test_table_has_one_row_per_point():
+    """Test flattening into one row per (core, pdk, benchmark, run) with derived metrics."""
+    table = build_results_table(SIM_RESULTS, SYNTH_RESULTS, run="r1")
+    assert len(table) == 3
+    row = table[(table["core"] == "simple_core") & (table["benchmark"] == "crypto")].iloc[0]
+    assert row["pdk"] == "sky130"
+    assert row["cpi"] == 3.0
+    assert row["power_density"] == 6.0
+
+    # picorv32 was not implemented: no PDK and no power
+    row = table[table["core"] == "picorv32"].iloc[0]
+    assert row["cpi"] == 4.0
+    assert row.isna()["total_power"]
+
+def test_summary_aggregates_per_core_and_pdk():
+    """Test the vectorized per-(core, pdk) aggregation."""
+    summary = summarize_results(build_results_table(SIM_RESULTS, SYNTH_RESULTS))
+    simple = summary[summary["core"] == "simple_core"].iloc[0]
+    assert simple["benchmarks"] == 2
+    assert simple["cpi"] == 2.5
+    assert simple["total_power"] == 11.0
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_append_replaces_rows_of_same_run(tmp_path, fmt):
+    """Test that persisting a run keeps other runs and replaces the same run."""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "ppa_results")
+    append_results_table(build_results_table(SIM_RESULTS, SYNTH_RESULTS, run="r1"), path, fmt)
+    append_results_table(build_results_table(SIM_RESULTS, SYNTH_RESULTS, run="r2"), path, fmt)
+    written = append_results_table(build_results_table(SIM_RESULTS, SYNTH_RESULTS, run="r2"), path, fmt)
+
+    table = load_results_table(written)
+    assert written.endswith(f".{fmt}")
+    assert sorted(table["run"].unique()) == ["r1", "r2"]
+    assert len(table) == 6
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
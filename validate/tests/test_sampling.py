@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for BBV collection, SimPoint clustering and CPI extrapolation.
+"""
+
+import sys
+import pytest
+import numpy as np
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.iss import InstructionSetSimulator
+from build.flows.utils.testbench import testbench_plusargs
+from build.flows.utils.sampling import (
+    bbvs_from_pcs, choose_simpoints, collect_bbvs, extrapolate_cpi, kmeans
+)
+
+from test_iss import ECALL, addi, b_type, r_type, s_type, write_hex
+
+def two_phase_program(first, second):
+    """An add loop of `first` iterations followed by a store loop of `second` iterations."""
+    return [
+        addi(11, 0, first),             # 0
+        r_type(0, 11, 10, 0, 10),       # 4: x10 += x11
+        addi(11, 11, -1),               # 8
+        b_type(-8, 0, 11, 1),           # c: bne x11, x0, 4
+        addi(11, 0, second),            # 10
+        s_type(0x100, 11, 0, 2),        # 14: sw x11, 0x100(x0)
+        addi(11, 11, -1),               # 18
+        b_type(-8, 0, 11, 1),           # 1c: bne x11, x0, 14
+        ECALL,                          # 20
+    ]
+
+def test_collect_bbvs_from_the_iss(tmp_path):
+    """Test that ISS intervals cover the run and separate the program phases."""
+    iss = InstructionSetSimulator(trace=True)
+    iss.load(write_hex(tmp_path / "program.hex", two_phase_program(1000, 1000)))
+    bbvs = collect_bbvs(iss, interval=300)
+
+    assert bbvs["instructions"].sum() == iss.retired == 1 + 3000 + 1 + 3000 + 1
+    assert np.all(np.abs(bbvs["instructions"][:-1] - 300) < 3)
+    assert bbvs["vectors"].sum() == iss.retired
+    # The store loop counts one fewer register write per iteration
+    assert bbvs["writes"].sum() == 1 + 2000 + 1 + 1000
+
+    # The retire trace gives the same vectors with exact intervals
+    traced = InstructionSetSimulator(trace=True)
+    traced.load(write_hex(tmp_path / "program.hex", two_phase_program(1000, 1000)))
+    traced.run()
+    from_pcs = bbvs_from_pcs(traced.retired_pcs(), interval=300, image=traced.memory)
+    assert from_pcs["instructions"].sum() == iss.retired
+    assert from_pcs["writes"].sum() == bbvs["writes"].sum()
+    assert set(from_pcs["blocks"].tolist()) >= {0x4, 0x14}
+
+def test_kmeans_separates_clusters():
+    """Test k-means on three well separated groups of points."""
+    rng = np.random.default_rng(1)
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    data = np.vstack([center + rng.normal(scale=0.1, size=(20, 2)) for center in centers])
+    labels, centroids = kmeans(data, 3)
+    assert len(set(labels[:20])) == len(set(labels[20:40])) == len(set(labels[40:])) == 1
+    assert len(set(labels)) == 3
+
+def phase_bbvs(phases):
+    """Synthetic BBVs: each interval runs one of several disjoint sets of blocks."""
+    vectors = np.zeros((len(phases), 3 * 4))
+    for row, phase in enumerate(phases):
+        vectors[row, phase * 4:(phase + 1) * 4] = [40, 30, 20, 10]
+    return {
+        "interval": 100,
+        "blocks": np.arange(12) * 16,
+        "vectors": vectors,
+        "instructions": np.full(len(phases), 100),
+        "writes": np.full(len(phases), 80),
+    }
+
+def test_choose_simpoints_and_extrapolate():
+    """Test that one sample per phase reproduces the CPI of the whole run."""
+    phases = [0] * 10 + [1] * 5 + [2] * 5
+    selection = choose_simpoints(phase_bbvs(phases), samples_per_cluster=2)
+    assert len(selection["clusters"]) == 3
+    assert sorted(c["weight"] for c in selection["clusters"]) == [0.25, 0.25, 0.5]
+    assert len(selection["points"]) == 6
+
+    point = selection["points"][0]
+    assert point["stop"] - point["start"] == 100
+    assert point["writes_start"] == 80 * point["interval"]
+
+    # Every interval of a phase has the same CPI, so the estimate is exact
+    phase_cpi = [1.0, 2.0, 4.0]
+    cycles = {p["interval"]: 100 * phase_cpi[phases[p["interval"]]] for p in selection["points"]}
+    estimate = extrapolate_cpi(selection, cycles)
+    assert estimate["cpi"] == pytest.approx(0.5 * 1.0 + 0.25 * 2.0 + 0.25 * 4.0)
+    assert estimate["cycles"] == pytest.approx(estimate["cpi"] * 2000)
+    assert estimate["error_bound"] == pytest.approx(0.0)
+
+def test_error_bound_reflects_sample_spread():
+    """Test that the bound grows with the spread within clusters and needs two samples."""
+    phases = [0] * 10 + [1] * 10
+    selection = choose_simpoints(phase_bbvs(phases), samples_per_cluster=2)
+    cycles = {p["interval"]: 100 * (1.0 + 0.2 * (i % 2)) for i, p in enumerate(selection["points"])}
+    estimate = extrapolate_cpi(selection, cycles)
+    assert estimate["error_bound"] > 0
+    assert estimate["relative_error"] == pytest.approx(estimate["error_bound"] / estimate["cpi"])
+
+    single = choose_simpoints(phase_bbvs(phases))
+    estimate = extrapolate_cpi(single, {p["interval"]: 150 for p in single["points"]})
+    assert estimate["cpi"] == pytest.approx(1.5)
+    assert estimate["error_bound"] is None
+
+    with pytest.raises(ValueError):
+        extrapolate_cpi(single, {})
+
+def test_sampling_window_plusargs():
+    """Test the testbench plusargs of the sampling window."""
+    assert testbench_plusargs({'sample_start': 800, 'sample_stop': 1600, 'end_on': []}) == [
+        "+sample_start=800",
+        "+sample_stop=1600",
+    ]
+    assert testbench_plusargs({'sample_start': 800, 'end_on': []}) == []
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
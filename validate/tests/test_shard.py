@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for sharded execution of the PPA study.
+
+The shards run as separate processes sharing a directory, as the pods of
+the indexed Kubernetes Job share the results volume.
+"""
+
+import os
+import sys
+import multiprocessing
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "build"))
+
+from build.flows.utils.plan import StudyPlan
+
+import flows.main_study_flow as study
+
+CONFIG = """cores:
+  - name: simple_core
+  - name: picorv32
+  - name: rocket
+benchmarks:
+  - name: fft
+  - name: crypto
+pdks:
+  - name: sky130
+  - name: generic
+"""
+
+def fake_compile(plan):
+    return {b: {c: {'path': f"{b}-{c}.elf"} for c, b2 in plan.pairs("core", "benchmark") if b2 == b}
+            for b in dict.fromkeys(b for _, b in plan.pairs("core", "benchmark"))}
+
+def fake_simulate(sw_artifacts, plan):
+    return {c: {b: {'cycles': 100 + len(c) + len(b), 'instructions': 50}
+                for c2, b in plan.pairs("core", "benchmark") if c2 == c}
+            for c in dict.fromkeys(c for c, _ in plan.pairs("core", "benchmark"))}
+
+def fake_synthesize(sim_results, plan):
+    return {c: {p: {cell.benchmark: {'place_and_route': {'total_area': len(c) * 10.0}}
+                    for cell in plan.select(core=c, pdk=p)}
+                for c2, p in plan.pairs("core", "pdk") if c2 == c}
+            for c in dict.fromkeys(c for c, _ in plan.pairs("core", "pdk"))}
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    monkeypatch.setattr(study, "verification_flow", lambda: True)
+    monkeypatch.setattr(study, "compile_software", fake_compile)
+    monkeypatch.setattr(study, "run_simulations", fake_simulate)
+    monkeypatch.setattr(study, "run_synthesis", fake_synthesize)
+    monkeypatch.setattr(study, "analyze_results", lambda sim, synth, plan: {'sim': sim, 'synth': synth})
+
+def test_shards_are_disjoint_and_cover_the_matrix():
+    """Test that every cell belongs to exactly one shard."""
+    plan = StudyPlan({"cores": ["a", "b", "c"], "benchmarks": ["x", "y"], "pdks": ["p", "q"]})
+    shards = [plan.shard(index, 4) for index in range(4)]
+    cells = [cell for shard in shards for cell in shard.cells]
+    assert sorted(cells, key=plan.cells.index) == plan.cells
+
+    # A simulation (core, benchmark) pair is never split across shards
+    for shard in shards:
+        for core, benchmark in shard.pairs("core", "benchmark"):
+            assert len(shard.select(core=core, benchmark=benchmark)) == 2
+
+    with pytest.raises(ValueError):
+        plan.shard(4, 4)
+
+def test_shards_spread_the_cells():
+    """Test that a study with few cores still gives work to every shard."""
+    plan = StudyPlan({"cores": ["a", "b", "c"], "benchmarks": ["x", "y", "z"], "pdks": ["p", "q"]})
+    for count in (4, 6, 9):
+        shards = [plan.shard(index, count) for index in range(count)]
+        assert all(shard.cells for shard in shards)
+
+    # Implementations are shared through the result store instead of owned by one shard
+    implementations = [key for index in range(4) for key in plan.shard(index, 4).pairs("core", "pdk")]
+    assert len(implementations) > len(set(implementations)) == len(plan.pairs("core", "pdk"))
+
+
+def test_config_map_entries_with_names():
+    """Test that list entries given as mappings with a name are accepted."""
+    plan = StudyPlan({"cores": [{"name": "rocket", "width": 32}], "benchmarks": ["fft"]})
+    assert plan.cores == ["rocket"]
+    assert [(c.core, c.pdk) for c in plan.cells] == [("rocket", None)]
+
+def run_shard(config_path, index, count, shard_dir):
+    assert study.main_ppa_study_flow(config_path, index, count, shard_dir=shard_dir)
+
+def test_sharded_study_matches_full_run(tmp_path, fake_stages):
+    """Test that shards run in separate processes merge into the full study results."""
+    config_path = tmp_path / "study.yaml"
+    config_path.write_text(CONFIG)
+    shard_dir = str(tmp_path / "shards")
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=run_shard, args=(str(config_path), index, 3, shard_dir))
+               for index in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    assert sorted(os.listdir(shard_dir)) == [f"shard-{i}-of-3.json" for i in range(3)]
+
+    merged = study.main_ppa_study_flow(str(config_path), shard_count=3, merge=True, shard_dir=shard_dir)
+    full = study.main_ppa_study_flow(str(config_path))
+    assert merged == full
+    assert list(merged['sim']) == ["simple_core", "picorv32", "rocket"]
+
+def test_more_shards_than_pairs(tmp_path, fake_stages):
+    """Test that a shard without cells writes empty results and the merge is complete."""
+    config_path = tmp_path / "study.yaml"
+    config_path.write_text(CONFIG)
+    shard_dir = str(tmp_path / "shards")
+    for index in range(8):
+        run_shard(str(config_path), index, 8, shard_dir)
+
+    merged = study.main_ppa_study_flow(str(config_path), shard_count=8, merge=True, shard_dir=shard_dir)
+    assert merged == study.main_ppa_study_flow(str(config_path))
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
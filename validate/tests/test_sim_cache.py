@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed compiled simulator cache.
+"""
+
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.cache import compute_build_key, cached_build
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+def test_build_key_tracks_rtl_content(tmp_path):
+    """Test that the key changes with RTL content, include files and tool version."""
+    include_dir = tmp_path / "include"
+    include_dir.mkdir()
+    header = include_dir / "defs.vh"
+    header.write_text("`define WIDTH 32\n")
+    tb = write(tmp_path / "tb.sv", "module tb; endmodule\n")
+    core = write(tmp_path / "core.v", "module core; endmodule\n")
+
+    key = compute_build_key([tb, core], [str(include_dir)], "iverilog 12.0")
+    assert key == compute_build_key([tb, core], [str(include_dir)], "iverilog 12.0")
+    assert key != compute_build_key([tb, core], [str(include_dir)], "iverilog 11.0")
+
+    header.write_text("`define WIDTH 64\n")
+    assert key != compute_build_key([tb, core], [str(include_dir)], "iverilog 12.0")
+
+def test_cached_build_reuses_artifact(tmp_path):
+    """Test that a second build with the same key is a cache hit."""
+    builds = []
+
+    def build(build_dir):
+        builds.append(build_dir)
+        Path(build_dir, "sim_core").write_text("compiled")
+
+    cache_dir = str(tmp_path / "cache")
+    path, hit = cached_build("abc123", build, "sim_core", cache_dir=cache_dir)
+    assert not hit
+    assert Path(path).read_text() == "compiled"
+
+    path2, hit2 = cached_build("abc123", build, "sim_core", cache_dir=cache_dir)
+    assert hit2
+    assert path2 == path
+    assert len(builds) == 1
+
+def test_cached_build_failure_leaves_no_entry(tmp_path):
+    """Test that a failed build does not poison the cache."""
+    def build(build_dir):
+        raise RuntimeError("compile error")
+
+    cache_dir = tmp_path / "cache"
+    with pytest.raises(RuntimeError):
+        cached_build("deadbeef", build, "sim_core", cache_dir=str(cache_dir))
+    assert os.listdir(cache_dir) == []
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
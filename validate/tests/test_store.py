@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent result store used for incremental study execution.
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "build"))
+
+from build.flows.utils.store import ResultStore, hash_path, stage_key
+
+import flows.software_flow as software
+import flows.synthesis_flow as synthesis
+
+def test_stage_key_depends_on_inputs(tmp_path):
+    """Test that changing any input hash changes the stage key."""
+    binary = tmp_path / "program.hex"
+    binary.write_text("00000013\n")
+    key = stage_key("simulate", core="picorv32", binary=hash_path(str(binary)))
+    assert key == stage_key("simulate", binary=hash_path(str(binary)), core="picorv32")
+
+    binary.write_text("00100093\n")
+    assert key != stage_key("simulate", core="picorv32", binary=hash_path(str(binary)))
+    assert key != stage_key("synthesize", core="picorv32", binary=hash_path(str(binary)))
+
+def test_cached_skips_recomputation(tmp_path):
+    """Test that a stored result is reused across store instances."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"cycles": 42, "success": True}
+
+    key = stage_key("simulate", core="simple_core")
+    first = ResultStore(str(tmp_path)).cached("simulate", key, compute)
+    second = ResultStore(str(tmp_path)).cached("simulate", key, compute)
+    assert first == second == {"cycles": 42, "success": True}
+    assert len(calls) == 1
+
+def test_failed_and_invalid_results_are_recomputed(tmp_path):
+    """Test that failures are not stored and stale results are rejected."""
+    store = ResultStore(str(tmp_path))
+    key = stage_key("compile", target="//design/software/fft:executable")
+
+    store.cached("compile", key, lambda: {"path": None, "success": False})
+    assert store.get("compile", key) is None
+
+    store.put("compile", key, {"path": str(tmp_path / "gone.hex"), "success": True})
+    result = store.cached(
+        "compile", key,
+        lambda: {"path": "fresh.hex", "success": True},
+        valid=lambda r: Path(r["path"]).exists()
+    )
+    assert result["path"] == "fresh.hex"
+
+@pytest.mark.parametrize("failing", ["run_yosys", "run_openroad"])
+def test_failed_implementation_is_not_stored(tmp_path, monkeypatch, failing):
+    """Test that a failed synthesis or place and route is recomputed on the next run."""
+    monkeypatch.setattr(synthesis, "run_yosys", lambda **kwargs: {"netlist": "netlist.v", "success": True})
+    monkeypatch.setattr(synthesis, "run_openroad", lambda **kwargs: {"odb": "layout.odb", "success": True})
+    monkeypatch.setattr(synthesis, failing, lambda **kwargs: {"success": False, "netlist": None, "odb": None})
+
+    store = ResultStore(str(tmp_path))
+    key = stage_key("implement", core="picorv32", pdk="sky130")
+    result = store.cached("implement", key, lambda: synthesis.implement_core("rtl", "pdk", {}))
+    assert result["success"] is False
+    assert store.get("implement", key) is None
+
+def test_power_is_not_run_on_a_failed_implementation(tmp_path, monkeypatch):
+    """Test that power analysis is skipped, and nothing stored, when the implementation failed."""
+    monkeypatch.setattr(synthesis, "implement_core", lambda *args: {
+        "synthesis": {"success": True}, "place_and_route": {"odb": None, "success": False}, "success": False
+    })
+    monkeypatch.setattr(synthesis, "run_openroad_power",
+                        lambda **kwargs: pytest.fail("power analysis ran without a routed design"))
+    plan = {"cores": ["picorv32"], "benchmarks": ["fft"], "pdks": ["sky130"], "result_store": str(tmp_path)}
+
+    results = synthesis.run_synthesis({"picorv32": {"fft": {"switching": None}}}, plan)
+    assert results["picorv32"]["sky130"]["fft"]["success"] is False
+    assert not any(tmp_path.rglob("*.json"))
+
+def test_compile_outputs_are_kept_per_core(tmp_path, monkeypatch):
+    """Test that per-core builds sharing a Bazel output path are not mixed up on reuse."""
+    shared = tmp_path / "bazel-out" / "fft.hex"
+    shared.parent.mkdir()
+    builds = []
+
+    def fake_build(targets, config=None):
+        builds.append(config)
+        shared.write_text(f"{config}\n")
+        return {t: {"path": str(shared), "outputs": [str(shared)], "target": t, "success": True} for t in targets}
+
+    monkeypatch.setattr(software, "bazel_build_many", fake_build)
+    plan = {"cores": ["simple_core", "picorv32"], "benchmarks": ["fft"],
+            "output_dir": str(tmp_path / "out"), "result_store": str(tmp_path / "store")}
+
+    artifacts = software.compile_software(plan)["fft"]
+    assert Path(artifacts["simple_core"]["path"]).read_text() == "--config=simple_core\n"
+    assert Path(artifacts["picorv32"]["path"]).read_text() == "--config=picorv32\n"
+
+    # Reused while unchanged, rebuilt once the kept output no longer matches its hash
+    assert software.compile_software(plan)["fft"] == artifacts and len(builds) == 2
+    Path(artifacts["picorv32"]["path"]).write_text("--config=simple_core\n")
+    software.compile_software(plan)
+    assert builds == ["--config=simple_core", "--config=picorv32", "--config=picorv32"]
+
+def compute_shared(root, key, fail):
+    """Compute a shared key in a worker process, counting computations in the store root."""
+    def compute():
+        with open(os.path.join(root, "computed"), "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        return {"total_area": 1.0, "success": not fail}
+
+    store = ResultStore(root)
+    store.poll_seconds = 0.05
+    store.cached("implement", key, compute, shared=True)
+
+@pytest.mark.parametrize("fail_first", [False, True])
+def test_shared_key_is_computed_once(tmp_path, fail_first):
+    """Test that processes sharing a store wait for each other's computation."""
+    root = str(tmp_path)
+    key = stage_key("implement", core="rocket", pdk="sky130")
+    context = multiprocessing.get_context("fork")
+
+    workers = [context.Process(target=compute_shared, args=(root, key, fail_first and index == 0))
+               for index in range(3)]
+    workers[0].start()
+    while not os.path.exists(os.path.join(root, "computed")):
+        time.sleep(0.01)
+    for worker in workers[1:]:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    # A failed computation is retried by one of the waiting processes
+    computed = (tmp_path / "computed").read_text().split()
+    assert len(computed) == (2 if fail_first else 1)
+    assert ResultStore(root).get("implement", key) == {"total_area": 1.0, "success": True}
+    assert not list(tmp_path.rglob("*.lock"))
+
+def test_disabled_store(tmp_path):
+    """Test that a disabled store never hits or writes."""
+    store = ResultStore(str(tmp_path), enabled=False)
+    store.put("simulate", "abc", {"cycles": 1})
+    assert store.get("simulate", "abc") is None
+    assert list(tmp_path.iterdir()) == []
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
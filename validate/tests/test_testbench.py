@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the universal testbench helpers.
+"""
+
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "build"))
+
+from build.flows.utils.testbench import (
+    testbench_plusargs, parse_simulation_output, program_plusarg,
+    parse_size, memory_words, memory_flags
+)
+
+import flows.simulation_flow as simulation
+
+def test_trace_disabled_by_default():
+    """Test that no dump plusargs are produced unless tracing is enabled."""
+    for options in [None, {'trace': False, 'dump_start': 100}]:
+        plusargs = testbench_plusargs(options)
+        assert not [arg for arg in plusargs if arg.startswith(("+trace", "+dump"))]
+
+def test_trace_window_plusargs():
+    """Test that trace options map onto the testbench plusargs."""
+    plusargs = testbench_plusargs({
+        'trace': True,
+        'trace_scope': 'all',
+        'trace_depth': 2,
+        'dump_start': 100,
+        'dump_stop': 200,
+    })
+    assert plusargs[:5] == [
+        "+trace",
+        "+dump_scope=all",
+        "+dump_depth=2",
+        "+dump_start=100",
+        "+dump_stop=200",
+    ]
+
+def test_end_of_test_plusargs():
+    """Test the default and configured end-of-test conditions."""
+    assert testbench_plusargs({}) == ["+end_ecall", "+end_selfloop"]
+    assert testbench_plusargs({'max_cycles': 500, 'end_on': 'tohost', 'tohost': '0x1000'}) == [
+        "+max_cycles=500",
+        "+tohost=00001000",
+    ]
+    with pytest.raises(ValueError):
+        testbench_plusargs({'end_on': ['tohost']})
+
+def test_parse_simulation_output():
+    """Test that the statistics record is parsed from the output stream."""
+    echoed = []
+    stats = parse_simulation_output([
+        "Loading program from program.hex",
+        "Simulation halted on ecall at PC 00000040",
+        "Simulation finished after        2048 cycles",
+        '@@STATS {"cycles": 2048, "instructions": 1024, "cpi": 2.000000, '
+        '"halt_reason": "           ecall", "tohost_value": 0}',
+    ], on_line=echoed.append)
+    assert stats == {
+        'cycles': 2048,
+        'instructions': 1024,
+        'cpi': 2.0,
+        'halt_reason': 'ecall',
+        'tohost_value': 0,
+    }
+    assert len(echoed) == 4
+    assert parse_simulation_output(["Simulation finished after 10 cycles"]) == {}
+
+def test_program_plusarg():
+    """Test that raw images use the binary loader and hex files $readmemh."""
+    assert program_plusarg("out/program.bin") == "+bin=out/program.bin"
+    assert program_plusarg(Path("hello_world.hex")) == "+hex=hello_world.hex"
+
+def test_parse_size():
+    """Test the memory size notations accepted in core.json and the configuration."""
+    assert [parse_size(size) for size in (4096, "0x1000", "64K", "64KB", "4M")] == \
+        [4096, 4096, 65536, 65536, 4 << 20]
+
+def test_memory_words(tmp_path):
+    """Test that the memory holds the declared size, the requested size and the program."""
+    (tmp_path / "core.json").write_text('{"memory": {"size": "64K"}}')
+    assert memory_words(tmp_path) == 16384
+    assert memory_words(tmp_path, memory_size="100K") == 32768
+
+    program = tmp_path / "program.bin"
+    program.write_bytes(bytes(300 * 1024))
+    assert memory_words(tmp_path, program) == 131072
+
+    sparse = tmp_path / "program.hex"
+    sparse.write_text("@0\n00000013\n@80000\n00000013\n")
+    assert memory_words(tmp_path, sparse) == 1 << 20
+
+    # Cores without a core.json get the testbench default
+    assert memory_words(tmp_path / "missing") == 16384
+
+def test_memory_flags():
+    """Test that large memories are sparse on simulators that support it."""
+    assert memory_flags(16384, "iverilog") == ["-Puniversal_testbench.MEM_WORDS=16384"]
+    assert memory_flags(16384, "verilator") == ["-GMEM_WORDS=16384"]
+    assert memory_flags(1 << 22, "verilator") == ["-GMEM_WORDS=4194304", "+define+SPARSE_MEM"]
+    assert memory_flags(1 << 22, "iverilog") == ["-Puniversal_testbench.MEM_WORDS=4194304"]
+
+def test_study_cycle_limit_reaches_the_simulator(tmp_path, monkeypatch):
+    """Test that max_simulation_cycles is passed on unless a core sets max_cycles."""
+    calls = {}
+
+    def fake_simulate(core, benchmark, executable, core_config, output_dir):
+        calls[core] = testbench_plusargs(core_config['options'])
+        return {'success': False}
+
+    monkeypatch.setattr(simulation, "simulate_core_benchmark", fake_simulate)
+    simulation.run_simulations({'fft': {'simple_core': 'fft.hex', 'picorv32': 'fft.hex'}}, {
+        'cores': ['simple_core', 'picorv32'],
+        'benchmarks': ['fft'],
+        'cores_config': {'picorv32': {'options': {'max_cycles': 500}}},
+        'max_simulation_cycles': 2000000,
+        'result_store': str(tmp_path),
+    })
+    assert "+max_cycles=2000000" in calls['simple_core']
+    assert "+max_cycles=500" in calls['picorv32']
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the Verilator wrappers, with the Verilator build and the model run mocked.
+"""
+
+import io
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "build"))
+
+import build.flows.utils.tools as tools
+
+import flows.simulation_flow as simulation
+
+STATS = '@@STATS {"cycles": 120, "instructions": 100, "cpi": 1.2, "halt_reason": "ecall", "tohost_value": 0}\n'
+
+class FakeProcess:
+    """Popen stand-in printing a testbench statistics record."""
+
+    def __init__(self, cmd, cwd=None, stdout=None, text=None):
+        self.cmd = cmd
+        self.stdout = io.StringIO("Loaded program\n" + STATS)
+
+    def wait(self):
+        return 0
+
+@pytest.fixture
+def fake_verilator(tmp_path, monkeypatch):
+    """Mock the Verilator build and model runs, recording their commands."""
+    calls = {'build': [], 'run': []}
+
+    def fake_run(cmd, **kwargs):
+        calls['build'].append(cmd)
+        mdir = Path(cmd[cmd.index("--Mdir") + 1])
+        mdir.mkdir(parents=True)
+        (mdir / "sim_core").write_text("")
+
+    def fake_popen(cmd, **kwargs):
+        calls['run'].append(cmd)
+        return FakeProcess(cmd, **kwargs)
+
+    monkeypatch.setattr(tools.subprocess, "run", fake_run)
+    monkeypatch.setattr(tools.subprocess, "Popen", fake_popen)
+    monkeypatch.setattr(tools, "get_tool_version", lambda cmd: "Verilator 5.020")
+
+    core_rtl = tmp_path / "cores" / "simple_core"
+    core_rtl.mkdir(parents=True)
+    (core_rtl / "core.v").write_text("module core; endmodule\n")
+    testbench = tmp_path / "tb.sv"
+    testbench.write_text("module universal_testbench; endmodule\n")
+    program = tmp_path / "program.hex"
+    program.write_text("00000013\n00000073\n")
+    calls['paths'] = (str(core_rtl), str(testbench), str(program))
+    return calls
+
+def test_build_verilator_model_is_cached(tmp_path, fake_verilator):
+    """Test that the model is built once per sources and memory size."""
+    core_rtl, testbench, _ = fake_verilator['paths']
+    cache_dir = str(tmp_path / "cache")
+
+    model, hit = tools.build_verilator_model(core_rtl, testbench, cache_dir=cache_dir, words=4096)
+    assert not hit and os.path.exists(model)
+    assert tools.build_verilator_model(core_rtl, testbench, cache_dir=cache_dir, words=4096) == (model, True)
+    assert len(fake_verilator['build']) == 1
+    assert "--top-module" in fake_verilator['build'][0]
+
+    tools.build_verilator_model(core_rtl, testbench, cache_dir=cache_dir, words=8192)
+    assert len(fake_verilator['build']) == 2
+
+def test_run_verilator_parses_statistics(tmp_path, fake_verilator):
+    """Test that the program is passed to the model and its statistics are returned."""
+    core_rtl, testbench, program = fake_verilator['paths']
+    result = tools.run_verilator(core_rtl, testbench, {'path': program, 'success': True},
+                                 options={'cache_dir': str(tmp_path / "cache"), 'max_cycles': 5000},
+                                 output_dir=str(tmp_path / "sim"))
+
+    assert result['success']
+    assert (result['cycles'], result['instructions'], result['halt_reason']) == (120, 100, "ecall")
+    cmd = fake_verilator['run'][0]
+    assert "+max_cycles=5000" in cmd
+    assert any(arg.startswith("+hex=") and arg.endswith("program.hex") for arg in cmd)
+
+@pytest.mark.parametrize("executable", [
+    {'path': None, 'success': False, 'error': "no such package"},
+    {'path': "stale.hex", 'success': False},
+    None,
+])
+def test_run_verilator_without_program_fails(tmp_path, fake_verilator, executable):
+    """Test that a failed build is not simulated with the testbench's default program."""
+    core_rtl, testbench, _ = fake_verilator['paths']
+    result = tools.run_verilator(core_rtl, testbench, executable,
+                                 options={'cache_dir': str(tmp_path / "cache")},
+                                 output_dir=str(tmp_path / "sim"))
+    assert result['success'] is False
+    assert fake_verilator['build'] == [] and fake_verilator['run'] == []
+
+def test_run_simulations_skips_failed_builds(tmp_path, monkeypatch):
+    """Test that failed software builds are reported as failed and not stored."""
+    monkeypatch.setattr(simulation, "simulate_core_benchmark",
+                        lambda *args: pytest.fail("a failed build was simulated"))
+    plan = {
+        'cores': ['simple_core'],
+        'benchmarks': ['fft'],
+        'result_store': str(tmp_path / "store"),
+    }
+    failed = {'fft': {'simple_core': {'path': None, 'success': False, 'error': "no such package"}}}
+
+    results = simulation.run_simulations(failed, plan)
+    assert results == {'simple_core': {'fft': {'success': False, 'error': "no such package"}}}
+    assert not (tmp_path / "store").exists() or not any((tmp_path / "store").rglob("*.json"))
+
+def test_stored_simulations_need_their_outputs(tmp_path, monkeypatch):
+    """Test that stored results are keyed by output directory and need their VCD to be reused."""
+    runs = []
+
+    def fake_simulate(core, benchmark, executable, core_config, output_dir):
+        runs.append(benchmark)
+        os.makedirs(output_dir, exist_ok=True)
+        vcd = os.path.join(output_dir, "sim.vcd")
+        Path(vcd).write_text("$enddefinitions $end\n")
+        return {'cycles': 10, 'switching': vcd, 'success': True}
+
+    monkeypatch.setattr(simulation, "simulate_core_benchmark", fake_simulate)
+    program = tmp_path / "program.hex"
+    program.write_text("00000073\n")
+    artifact = {'path': str(program), 'success': True}
+    plan = {
+        'cores': ['simple_core'],
+        'benchmarks': ['fft', 'crypto'],
+        'output_dir': str(tmp_path / "out"),
+        'result_store': str(tmp_path / "store"),
+    }
+    sw_artifacts = {'fft': {'simple_core': artifact}, 'crypto': {'simple_core': artifact}}
+
+    # Identical binaries still get their own results and directories
+    first = simulation.run_simulations(sw_artifacts, plan)
+    assert sorted(runs) == ['crypto', 'fft']
+    assert first['simple_core']['fft']['switching'] != first['simple_core']['crypto']['switching']
+
+    assert simulation.run_simulations(sw_artifacts, plan) == first
+    assert len(runs) == 2
+
+    os.remove(first['simple_core']['fft']['switching'])
+    simulation.run_simulations(sw_artifacts, plan)
+    assert sorted(runs) == ['crypto', 'fft', 'fft']
+
+def simulate_or_raise(core, benchmark, executable, core_config, output_dir):
+    """Module-level (picklable) stand-in for simulate_core_benchmark."""
+    if benchmark == "crypto":
+        raise RuntimeError("model crashed")
+    return {'cycles': 10, 'success': True}
+
+def test_parallel_simulation_failure_keeps_other_results(tmp_path, monkeypatch):
+    """Test that one raising worker is recorded as failed and the others are stored."""
+    monkeypatch.setattr(simulation, "simulate_core_benchmark", simulate_or_raise)
+    program = tmp_path / "program.hex"
+    program.write_text("00000073\n")
+    artifact = {'path': str(program), 'success': True}
+    plan = {
+        'cores': ['simple_core'],
+        'benchmarks': ['fft', 'crypto', 'sha256'],
+        'output_dir': str(tmp_path / "out"),
+        'result_store': str(tmp_path / "store"),
+        'simulation_workers': 2,
+    }
+    sw_artifacts = {b: {'simple_core': artifact} for b in plan['benchmarks']}
+
+    results = simulation.run_simulations(sw_artifacts, plan)['simple_core']
+    assert results['crypto'] == {'success': False, 'error': "model crashed"}
+    assert results['fft']['success'] and results['sha256']['success']
+    assert len(list((tmp_path / "store").rglob("*.json"))) == 2
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for PPA plot rendering and plot caching.
+"""
+
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Define the project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from build.flows.utils.results import build_results_table
+from build.flows.utils.visualization import generate_plots
+
+def results_for(cycles):
+    sim = {"simple_core": {"fft": {"cycles": cycles, "instructions": 1000}}}
+    synth = {"simple_core": {"sky130": {"fft": {"place_and_route": {
+        "total_power": 10.0, "logic_area": 1.5, "memory_area": 0.5, "total_area": 2.0
+    }}}}}
+    return {"table": build_results_table(sim, synth)}
+
+def test_plots_are_rendered_and_cached(tmp_path):
+    """Test that plots are real images and only out-of-date plots are re-rendered."""
+    output_dir = str(tmp_path / "plots")
+    paths = generate_plots(results_for(2000), output_dir, workers=2)
+
+    cpi_plot = paths["performance"]["cpi"]
+    power_plot = paths["power"]["total"]
+    for path in [cpi_plot, power_plot, paths["area"]["total"], paths["ppa"]["radar"]]:
+        assert Path(path).read_bytes().startswith(b"\x89PNG")
+
+    # Pretend the plots are old, so a re-render would be visible in the mtime
+    for path in [cpi_plot, power_plot]:
+        os.utime(path, (0, 0))
+
+    generate_plots(results_for(2000), output_dir, workers=2)
+    assert os.path.getmtime(cpi_plot) == 0
+    assert os.path.getmtime(power_plot) == 0
+
+    # Only the plots showing CPI change
+    generate_plots(results_for(3000), output_dir, workers=2)
+    assert os.path.getmtime(cpi_plot) > 0
+    assert os.path.getmtime(power_plot) == 0
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
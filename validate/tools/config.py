@@ -15,6 +15,7 @@ class TestConfig:
     expected_output: List[str]
     timeout: int = 30000  # Default timeout in milliseconds
     extra_args: Dict[str, Any] = None
+    failure_output: List[str] = None  # Strings that fail the test as soon as they appear
     
     # Indicate to pytest that this is not a test class
     __test__ = False
@@ -26,7 +27,8 @@ class TestConfig:
             "core_name": self.core_name,
             "expected_output": self.expected_output,
             "timeout": self.timeout,
-            "extra_args": self.extra_args or {}
+            "extra_args": self.extra_args or {},
+            "failure_output": self.failure_output or []
         }
     
     @classmethod
@@ -37,7 +39,8 @@ class TestConfig:
             core_name=data["core_name"],
             expected_output=data["expected_output"],
             timeout=data.get("timeout", 30000),
-            extra_args=data.get("extra_args", {})
+            extra_args=data.get("extra_args", {}),
+            failure_output=data.get("failure_output", [])
         )
     
     @classmethod
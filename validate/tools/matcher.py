@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Streaming matcher for the expected output of regression tests.
+"""
+
+import re
+import time
+
+class OutputMatcher:
+    """
+    Match expected and failure strings against simulator output line by line.
+
+    All pending expectations are combined into one compiled regex, so each
+    line is scanned once regardless of how many strings are expected. The
+    regex is rebuilt from the remaining expectations whenever one matches,
+    which also lets overlapping expectations match on the same line.
+    """
+
+    def __init__(self, expected, failures=None):
+        """
+        Initialize the matcher.
+
+        Args:
+            expected: List of strings that must all appear in the output
+            failures: List of strings whose appearance fails the test immediately
+        """
+        self.expected = list(expected)
+        self.failures = list(failures or [])
+        self.latencies = {}
+        self.lines = 0
+        self.failure = None
+        self.start = time.monotonic()
+
+        self._pending = list(dict.fromkeys(self.expected))
+        self._expected_re = self._compile(self._pending)
+        self._failure_re = self._compile(self.failures)
+
+    @staticmethod
+    def _compile(strings):
+        """Compile a list of literal strings into one alternation regex."""
+        if not strings:
+            return None
+        return re.compile("|".join(f"(?P<s{i}>{re.escape(s)})" for i, s in enumerate(strings)))
+
+    @property
+    def done(self):
+        """True once every expectation has matched or a failure string appeared."""
+        return self.failure is not None or (bool(self.expected) and not self._pending)
+
+    @property
+    def matched(self):
+        """True if every expectation matched and no failure string appeared."""
+        return self.failure is None and not self._pending
+
+    @property
+    def missing(self):
+        """Expectations that have not matched yet."""
+        return list(self._pending)
+
+    def feed(self, line):
+        """
+        Match one line of output.
+
+        Args:
+            line: A line of simulator output
+
+        Returns:
+            True once the matcher is done (see ``done``)
+        """
+        self.lines += 1
+
+        if self._failure_re is not None:
+            match = self._failure_re.search(line)
+            if match is not None:
+                self.failure = self.failures[int(match.lastgroup[1:])]
+                return True
+
+        while self._expected_re is not None:
+            matches = {int(m.lastgroup[1:]) for m in self._expected_re.finditer(line)}
+            if not matches:
+                break
+            elapsed = time.monotonic() - self.start
+            for index in matches:
+                self.latencies[self._pending[index]] = {"seconds": elapsed, "line": self.lines}
+            self._pending = [s for i, s in enumerate(self._pending) if i not in matches]
+            self._expected_re = self._compile(self._pending)
+
+        return self.done
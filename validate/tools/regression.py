@@ -1,47 +1,408 @@
 #!/usr/bin/env python3
 """
 Regression test runner for the Silicon Design Environment.
+
+Projects are discovered from ``design/software/*/test_config.json`` and cores
+from ``design/hardware/rtl/cores/*/core.json``. Each (project, core) test is
+run on a worker pool; the simulator is compiled once per core and killed
+when a test exceeds its timeout.
 """
 
 import os
 import sys
+import json
+import argparse
+import signal
 import logging
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
 
+# Import utilities
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from build.flows.utils.cache import compute_build_key, cached_build, get_tool_version
+from build.flows.utils.tools import find_core_sources
+from build.flows.utils.testbench import (
+    TESTBENCH_PATH, testbench_plusargs, program_plusarg, memory_words, memory_flags
+)
+
+from tools.config import TestConfig
+from tools.matcher import OutputMatcher
+
+# Locations relative to the project root
+SOFTWARE_DIR = "design/software"
+CORES_DIR = "design/hardware/rtl/cores"
+
+# Program images looked up (in order) in a project directory
+PROGRAM_CANDIDATES = (
+    "target/riscv32i-unknown-none-elf/release/firmware.hex",
+    "hello_world.hex",
+    "program.hex",
+    "program.bin",
+)
+
+# Number of trailing output lines kept in memory per test (the full log is written to disk)
+OUTPUT_TAIL_LINES = 1000
+
+@dataclass
+class TestResult:
+    """Result of a single regression test."""
+    config: TestConfig
+    success: bool
+    output: str = ""
+    error: str = ""
+    timed_out: bool = False
+    missing: list = field(default_factory=list)
+    latencies: dict = field(default_factory=dict)
+
+    # Indicate to pytest that this is not a test class
+    __test__ = False
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            **self.config.to_dict(),
+            "success": self.success,
+            "error": self.error,
+            "timed_out": self.timed_out,
+            "missing": self.missing,
+            "latencies": self.latencies
+        }
+
 class RegressionRunner:
     """
     A class for running regression tests on the Silicon Design Environment.
     """
-    
-    def __init__(self, config_path=None, output_dir=None):
+
+    def __init__(self, project_root=None, output_dir=None, workers=None, cache_dir=None):
         """
         Initialize the regression runner.
-        
+
         Args:
-            config_path: Path to the configuration file
-            output_dir: Directory to store the output
+            project_root: Path to the project root (default: the root of this checkout)
+            output_dir: Directory to store the output (default: <project_root>/output)
+            workers: Number of tests run concurrently (default: number of CPUs)
+            cache_dir: Compiled simulator cache directory (default: <output_dir>/.sim_cache)
         """
-        self.config_path = config_path
-        self.output_dir = output_dir or "output"
+        self.project_root = Path(project_root or Path(__file__).parent.parent.parent).absolute()
+        self.output_dir = Path(output_dir or self.project_root / "output").absolute()
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = Path(cache_dir or self.output_dir / ".sim_cache")
         self.logger = logging.getLogger(__name__)
-    
+
+        # Compiled simulators per (core, memory words) (path, or the exception raised while compiling)
+        self._simulators = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
     def setup(self):
         """Set up the regression environment."""
         os.makedirs(self.output_dir, exist_ok=True)
         self.logger.info(f"Set up regression environment in {self.output_dir}")
         return True
-    
-    def run(self, test_name=None):
+
+    def list_projects(self):
+        """
+        List the software projects that have a test configuration.
+
+        Returns:
+            Sorted list of project names
+        """
+        return sorted(path.parent.name for path in (self.project_root / SOFTWARE_DIR).glob("*/test_config.json"))
+
+    def list_cores(self):
+        """
+        List the cores that have a core description.
+
+        Returns:
+            Sorted list of core names
+        """
+        return sorted(path.parent.name for path in (self.project_root / CORES_DIR).glob("*/core.json"))
+
+    def load_tests(self, projects=None, cores=None):
+        """
+        Build the test matrix from the project test configurations.
+
+        A test entry runs on the cores it lists, or on every discovered core
+        if it lists none.
+
+        Args:
+            projects: Project names to include (default: all)
+            cores: Core names to include (default: all)
+
+        Returns:
+            List of TestConfig
+        """
+        available_cores = self.list_cores()
+        tests = []
+        for project in projects or self.list_projects():
+            config_path = self.project_root / SOFTWARE_DIR / project / "test_config.json"
+            with open(config_path, 'r') as f:
+                entries = json.load(f).get("tests", [])
+
+            for entry in entries:
+                for core in entry.get("cores") or available_cores:
+                    if cores and core not in cores:
+                        continue
+                    tests.append(TestConfig.from_dict({
+                        **entry,
+                        "project_name": project,
+                        "core_name": core,
+                        "expected_output": entry.get("expected_output", [])
+                    }))
+        return tests
+
+    def find_program(self, test_config):
+        """
+        Locate the program image (hex file or raw binary) of a test.
+
+        Args:
+            test_config: Test configuration (``extra_args.hex_file`` overrides the lookup)
+
+        Returns:
+            Path to the program image, or None to run the testbench's default program
+        """
+        extra_args = test_config.extra_args or {}
+        project_dir = self.project_root / SOFTWARE_DIR / test_config.project_name
+        if extra_args.get("hex_file"):
+            return project_dir / extra_args["hex_file"]
+        for candidate in PROGRAM_CANDIDATES:
+            if (project_dir / candidate).exists():
+                return project_dir / candidate
+        return None
+
+    def _compile(self, core, words=None):
+        """Compile the testbench and a core with iverilog (cached by RTL content and memory size)."""
+        core_rtl = self.project_root / CORES_DIR / core
+        testbench = str(self.project_root / TESTBENCH_PATH)
+        sources = [testbench] + find_core_sources(str(core_rtl))
+        include_dirs = [str(core_rtl.parent)]
+        flags = memory_flags(words, "iverilog") if words is not None else []
+
+        def build(build_dir):
+            sim_binary = os.path.join(build_dir, "sim_core")
+            cmd = ["iverilog", "-o", sim_binary] + flags + ["-I", include_dirs[0]] + sources
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+        key = compute_build_key(
+            sources,
+            include_dirs=include_dirs,
+            tool_version=get_tool_version(["iverilog", "-V"]),
+            flags=flags
+        )
+        sim_binary, cache_hit = cached_build(key, build, "sim_core", cache_dir=str(self.cache_dir))
+        self.logger.info(f"Simulator for {core}: {sim_binary} (cache {'hit' if cache_hit else 'miss'})")
+        return sim_binary
+
+    def get_simulator(self, core, words=None):
+        """
+        Get the compiled simulator for a core, compiling it on first use.
+
+        Concurrent tests on the same core and memory size wait for a single compilation.
+
+        Args:
+            core: Name of the core
+            words: Testbench memory size in words (see memory_words), or None for the default
+
+        Returns:
+            Path to the compiled simulator
+        """
+        build = (core, words)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(build, threading.Lock())
+
+        with build_lock:
+            if build not in self._simulators:
+                try:
+                    self._simulators[build] = self._compile(core, words)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    self._simulators[build] = e
+
+        simulator = self._simulators[build]
+        if isinstance(simulator, Exception):
+            raise simulator
+        return simulator
+
+    def run_test(self, test_config):
+        """
+        Run a single regression test.
+
+        Args:
+            test_config: Test configuration
+
+        Returns:
+            Tuple of (success, output, error)
+        """
+        result = self.execute(test_config)
+        return result.success, result.output, result.error
+
+    def execute(self, test_config):
+        """
+        Run a single regression test and return its detailed result.
+
+        Args:
+            test_config: Test configuration
+
+        Returns:
+            TestResult
+        """
+        extra_args = test_config.extra_args or {}
+        options = extra_args.get("options") or {}
+        program = self.find_program(test_config)
+
+        # Size the memories for the core and program
+        words = memory_words(str(self.project_root / CORES_DIR / test_config.core_name),
+                             program, options.get("memory_size"))
+        try:
+            sim_binary = self.get_simulator(test_config.core_name, words)
+        except subprocess.CalledProcessError as e:
+            return TestResult(test_config, False, e.stdout or "", f"Compilation failed: {e.stderr or e}")
+        except OSError as e:
+            return TestResult(test_config, False, "", f"Compilation failed: {e}")
+
+        test_dir = self.output_dir / "regression" / test_config.project_name / test_config.core_name
+        os.makedirs(test_dir, exist_ok=True)
+
+        cmd = ["vvp", sim_binary]
+        if program is not None:
+            cmd.append(program_plusarg(program))
+        else:
+            self.logger.warning(f"No program found for {test_config.project_name}, using the default test program")
+        cmd += testbench_plusargs(options)
+
+        try:
+            # Run in its own process group so a timeout kills any children too
+            process = subprocess.Popen(cmd, cwd=test_dir, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, text=True, start_new_session=True)
+        except OSError as e:
+            return TestResult(test_config, False, "", f"Failed to start simulator: {e}")
+
+        # Stream the output through the matcher, stopping the simulator as soon
+        # as the outcome is known or the timeout expires
+        matcher = OutputMatcher(test_config.expected_output, test_config.failure_output)
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            self._kill(process)
+
+        timer = threading.Timer(test_config.timeout / 1000.0, expire)
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        stopped = False
+        timer.start()
+        try:
+            with open(test_dir / "output.log", 'w') as log:
+                for line in process.stdout:
+                    log.write(line)
+                    tail.append(line)
+                    if matcher.feed(line):
+                        stopped = True
+                        self._kill(process)
+                        break
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            process.wait()
+        timed_out = expired.is_set() and not matcher.done
+
+        if matcher.failure is not None:
+            error = f"Failure output found: {matcher.failure}"
+        elif stopped:
+            error = ""
+        elif timed_out:
+            error = f"Timed out after {test_config.timeout} ms"
+        elif process.returncode != 0:
+            error = f"Simulator exited with code {process.returncode}"
+        elif not matcher.matched:
+            error = f"Expected output not found: {matcher.missing}"
+        else:
+            error = ""
+
+        return TestResult(test_config, not error, "".join(tail), error, timed_out,
+                          matcher.missing, matcher.latencies)
+
+    @staticmethod
+    def _kill(process):
+        """Kill a simulator and any processes it started."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def iter_results(self, tests):
+        """
+        Run tests on the worker pool, yielding results as they complete.
+
+        Args:
+            tests: List of TestConfig
+
+        Yields:
+            TestResult, in completion order
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.execute, test) for test in tests]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run(self, test_name=None, cores=None):
         """
         Run the regression tests.
-        
+
         Args:
-            test_name: Name of the test to run, or None for all tests
+            test_name: Name of the project to test, or None for all projects
+            cores: Core names to test on (default: all)
+
+        Returns:
+            True if every test passed
         """
         self.logger.info(f"Running regression test: {test_name or 'all'}")
-        return True
-    
+        tests = self.load_tests([test_name] if test_name else None, cores)
+
+        results = []
+        for result in self.iter_results(tests):
+            status = "PASS" if result.success else "FAIL"
+            message = f"[{status}] {result.config.project_name} on {result.config.core_name}"
+            if result.error:
+                message += f": {result.error}"
+            self.logger.info(message)
+            results.append(result)
+
+        passed = sum(result.success for result in results)
+        self.logger.info(f"{passed}/{len(results)} tests passed")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.output_dir / "regression_results.json", 'w') as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
+
+        return passed == len(results)
+
     def cleanup(self):
         """Clean up after the regression tests."""
         self.logger.info("Cleaning up regression environment")
         return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the regression test matrix')
+    parser.add_argument('--project', type=str, default=None,
+                        help='Project to test (default: all discovered projects)')
+    parser.add_argument('--core', action='append', default=None,
+                        help='Core to test on; may be repeated (default: all discovered cores)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of tests run concurrently (default: number of CPUs)')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Output directory (default: <project root>/output)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    runner = RegressionRunner(output_dir=args.output_dir, workers=args.workers)
+    runner.setup()
+    success = runner.run(args.project, args.core)
+    runner.cleanup()
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()